@@ -13,4 +13,27 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+
+async def application(scope, receive, send):
+    """
+    Django, plus the ASGI lifespan protocol: each worker starts its
+    emergency card cache (patients/emergency_cards.py) on startup and closes
+    its shared async HTTP client (integration/async_http.py) on shutdown
+    """
+    if scope["type"] != "lifespan":
+        await django_application(scope, receive, send)
+        return
+    from integration.async_http import close_async_client
+    from patients.emergency_cards import start_emergency_card_cache
+
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            start_emergency_card_cache()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await close_async_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
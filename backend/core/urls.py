@@ -26,6 +26,7 @@ from patients.views import router as patient_router
 from patients.views import router as patient_router
 from hospitals.views import router as hospital_router
 from referrals.views import router as referral_router
+from integration.views import router as integration_router
 
 
 api = NinjaAPI(title="CATs Backend API")
@@ -35,6 +36,7 @@ api.add_router("/users", auth_router, tags=["auth"])
 api.add_router("/doctor", doctor_router, tags=["doctor"])
 api.add_router("/patient", patient_router, tags=["patient"])
 api.add_router("/referrals", referral_router, tags=["referrals"])
+api.add_router("/integration", integration_router, tags=["integration"])
 api.add_router("", hospital_router, tags=["hospital"])
 
 
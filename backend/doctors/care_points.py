@@ -0,0 +1,41 @@
+"""
+CarePoints rewards and doctor streaks
+"""
+from django.utils import timezone
+from datetime import timedelta
+
+from .models import DoctorProfile
+
+
+def calculate_care_points_reward(doctor_profile: DoctorProfile) -> int:
+    """
+    Calculate CarePoints reward based on streak
+    Formula: 10 base + 2 per streak day
+    """
+    base_reward = 10
+    streak_bonus = doctor_profile.current_streak * 2
+    return base_reward + streak_bonus
+
+
+def update_doctor_streak(doctor_profile: DoctorProfile):
+    """
+    Update doctor's streak based on last record date
+    """
+    today = timezone.now().date()
+    last_date = doctor_profile.last_record_date
+    
+    if last_date is None:
+        # First record
+        doctor_profile.current_streak = 1
+    elif last_date == today:
+        # Already created a record today, no change
+        pass
+    elif last_date == today - timedelta(days=1):
+        # Maintained streak
+        doctor_profile.current_streak += 1
+    else:
+        # Streak broken, reset to 1
+        doctor_profile.current_streak = 1
+    
+    doctor_profile.last_record_date = today
+    doctor_profile.save()
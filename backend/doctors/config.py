@@ -0,0 +1,11 @@
+"""
+Doctors Configuration
+Configuration for bulk patient import
+"""
+import os
+
+# Bulk patient import (see doctors/patient_import.py)
+PATIENT_IMPORT_BATCH_SIZE = int(os.getenv("PATIENT_IMPORT_BATCH_SIZE", "500"))  # rows per insert/anchor batch
+PATIENT_IMPORT_MAX_ROWS = int(os.getenv("PATIENT_IMPORT_MAX_ROWS", "50000"))
+PATIENT_IMPORT_MAX_ERRORS = int(os.getenv("PATIENT_IMPORT_MAX_ERRORS", "1000"))  # rejected rows kept on the job
+PATIENT_IMPORT_LEASE_SECONDS = int(os.getenv("PATIENT_IMPORT_LEASE_SECONDS", "300"))
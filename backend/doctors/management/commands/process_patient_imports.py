@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from doctors.patient_import import claim_import_job, process_import_job
+from doctors.config import PATIENT_IMPORT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Run queued bulk patient imports (POST /doctor/patients/import/)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=PATIENT_IMPORT_BATCH_SIZE, help="Rows per insert batch")
+        parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds to sleep when no job is queued")
+        parser.add_argument("--once", action="store_true", help="Run queued jobs once and exit")
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_import_job()
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+
+            started = time.perf_counter()
+            job = process_import_job(job, batch_size=options["batch_size"])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"Import {job.id} {job.status}: {job.created_count} created, {job.failed_count} rejected "
+                f"of {job.total_rows} rows in {elapsed:.1f}s ({job.care_points_awarded} CarePoints)"
+            )
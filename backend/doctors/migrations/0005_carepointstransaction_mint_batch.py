@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0004_remove_appointment_updated_at_and_more'),
+        ('integration', '0003_mintbatch_alter_cardanooutbox_kind_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carepointstransaction',
+            name='mint_batch',
+            field=models.ForeignKey(blank=True, help_text='Aggregated mint that paid out this transaction', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='care_points_transactions', to='integration.mintbatch'),
+        ),
+    ]
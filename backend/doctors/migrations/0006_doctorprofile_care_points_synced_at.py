@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0005_carepointstransaction_mint_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctorprofile',
+            name='care_points_synced_at',
+            field=models.DateTimeField(blank=True, help_text='When care_points_balance was last synced from Cardano', null=True),
+        ),
+    ]
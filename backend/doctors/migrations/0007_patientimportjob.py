@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0006_doctorprofile_care_points_synced_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('file', models.CharField(help_text='default_storage path of the uploaded file', max_length=255)),
+                ('format', models.CharField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')], max_length=8)),
+                ('total_rows', models.IntegerField(default=0)),
+                ('processed_rows', models.IntegerField(default=0, help_text='Rows handled so far; a resumed job continues after them')),
+                ('created_count', models.IntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list, help_text='[{row, error}] for rejected rows (capped)')),
+                ('care_points_awarded', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('lease_until', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='patient_import_jobs', to='doctors.doctorprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'lease_until'], name='doctors_pat_status_13feba_idx')],
+            },
+        ),
+    ]
@@ -21,6 +21,11 @@ class DoctorProfile(models.Model):
         default=0,
         help_text="Total CarePoints earned (synced from Cardano)"
     )
+    care_points_synced_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When care_points_balance was last synced from Cardano"
+    )
     last_record_date = models.DateField(
         null=True, 
         blank=True,
@@ -101,7 +106,72 @@ class CarePointsTransaction(models.Model):
         default="other"
     )
     cardano_tx_hash = models.CharField(max_length=128, blank=True, null=True)
+    mint_batch = models.ForeignKey(
+        "integration.MintBatch",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="care_points_transactions",
+        help_text="Aggregated mint that paid out this transaction"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.doctor} - {self.amount} CP ({self.transaction_type}) on {self.created_at.date()}"
+
+
+class PatientImportJob(models.Model):
+    """
+    Bulk patient import from an uploaded CSV/NDJSON file, processed in
+    batches by the process_patient_imports command
+    """
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_COMPLETED, "Completed"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    FORMAT_CSV = "csv"
+    FORMAT_NDJSON = "ndjson"
+
+    FORMAT_CHOICES = [
+        (FORMAT_CSV, "CSV"),
+        (FORMAT_NDJSON, "NDJSON"),
+    ]
+
+    doctor = models.ForeignKey(
+        DoctorProfile,
+        related_name="patient_import_jobs",
+        on_delete=models.CASCADE
+    )
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    file = models.CharField(max_length=255, help_text="default_storage path of the uploaded file")
+    format = models.CharField(max_length=8, choices=FORMAT_CHOICES)
+    total_rows = models.IntegerField(default=0)
+    processed_rows = models.IntegerField(
+        default=0,
+        help_text="Rows handled so far; a resumed job continues after them"
+    )
+    created_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True, help_text="[{row, error}] for rejected rows (capped)")
+    care_points_awarded = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    lease_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "lease_until"]),
+        ]
+
+    def __str__(self):
+        return f"PatientImportJob {self.id} [{self.status}] {self.processed_rows}/{self.total_rows}"
@@ -0,0 +1,356 @@
+"""
+Bulk Patient Import
+Creates patients from an uploaded CSV or NDJSON file, one batch of rows at a
+time, instead of one create-patient request per patient. Per batch: one
+reservation of a block of health IDs, one hashing pass, batched IPFS
+uploads, a bulk insert of users, profiles and their decode-qr snapshots, and
+one Merkle anchor batch. The job earns one aggregated CarePoints award when
+it completes. QR images are not rendered here; they are rendered on first
+request (or by render_qr_codes).
+
+Jobs are queued by POST /doctor/patients/import/ and run by the
+process_patient_imports command; progress is saved with every batch, so an
+interrupted job resumes after its last committed row.
+"""
+import csv
+import io
+import json
+from datetime import timedelta
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from pydantic import ValidationError
+
+from users.models import User
+from patients.models import PatientProfile, PatientSnapshot
+from patients.health_ids import allocate_health_ids
+from patients.snapshots import new_patient_snapshot
+from integration.record_hashing import hash_records_bulk
+from integration.encryption import get_data_keys
+from integration.ipfs_service import upload_many_to_ipfs
+from integration.anchor_batching import open_anchor_batch
+from integration.outbox import enqueue_care_points_mint
+from integration.uploads import save_upload
+from integration.cardano_config import (
+    CARDANO_ANCHOR_ISSUER_ID,
+    CARDANO_MINT_MODE,
+    CAREPOINTS_MAX_MINT,
+)
+from .config import (
+    PATIENT_IMPORT_BATCH_SIZE,
+    PATIENT_IMPORT_MAX_ROWS,
+    PATIENT_IMPORT_MAX_ERRORS,
+    PATIENT_IMPORT_LEASE_SECONDS,
+)
+from .models import DoctorProfile, CarePointsTransaction, PatientImportJob
+from .schemas import CreatePatientSchema
+from .care_points import calculate_care_points_reward, update_doctor_streak
+
+INSERT_ATTEMPTS = 3
+
+
+class ImportFileError(Exception):
+    """The uploaded file cannot be imported"""
+
+
+def detect_format(name: str, head: bytes) -> str:
+    """
+    CSV or NDJSON, from the file extension or else the first byte
+    """
+    lower = name.lower()
+    if lower.endswith(".csv"):
+        return PatientImportJob.FORMAT_CSV
+    if lower.endswith((".ndjson", ".jsonl", ".json")):
+        return PatientImportJob.FORMAT_NDJSON
+    return PatientImportJob.FORMAT_NDJSON if head.lstrip()[:1] == b"{" else PatientImportJob.FORMAT_CSV
+
+
+def iter_rows(path: str, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Stream rows from a stored import file
+
+    Yields:
+        (row number starting at 1, dict) or (row number, error message)
+        for NDJSON lines that are not JSON objects
+    """
+    with default_storage.open(path, "rb") as f:
+        text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+        if fmt == PatientImportJob.FORMAT_CSV:
+            for number, row in enumerate(csv.DictReader(text), start=1):
+                # Empty cells mean "not given", like a missing JSON key
+                yield number, {key.strip(): (value or "").strip() or None for key, value in row.items() if key}
+            return
+
+        number = 0
+        for line in text:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, f"Invalid JSON: {e}"
+                continue
+            yield number, row if isinstance(row, dict) else "Expected a JSON object"
+
+
+def count_rows(path: str, fmt: str) -> int:
+    return sum(1 for _ in iter_rows(path, fmt))
+
+
+def create_import_job(doctor: DoctorProfile, upload) -> PatientImportJob:
+    """
+    Store an uploaded file and queue it for import
+
+    Raises:
+        ImportFileError if the file is empty, unreadable or too large
+    """
+    stored = save_upload(upload, f"patient_imports/{upload.name}")
+    with default_storage.open(stored.path, "rb") as f:
+        head = f.read(64)
+    fmt = detect_format(upload.name, head)
+    try:
+        total = count_rows(stored.path, fmt)
+    except (UnicodeDecodeError, csv.Error) as e:
+        default_storage.delete(stored.path)
+        raise ImportFileError(f"Could not read the file as {fmt}: {e}")
+    if not total or total > PATIENT_IMPORT_MAX_ROWS:
+        default_storage.delete(stored.path)
+        raise ImportFileError(
+            "File has no rows" if not total else f"File has {total} rows; the limit is {PATIENT_IMPORT_MAX_ROWS}"
+        )
+    return PatientImportJob.objects.create(doctor=doctor, file=stored.path, format=fmt, total_rows=total)
+
+
+def _parse_rows(rows: List[Tuple[int, Any]]) -> Tuple[List[Tuple[int, CreatePatientSchema]], List[Dict[str, Any]]]:
+    valid = []
+    errors = []
+    for number, row in rows:
+        if isinstance(row, str):
+            errors.append({"row": number, "error": row})
+            continue
+        try:
+            valid.append((number, CreatePatientSchema(**row)))
+        except ValidationError as e:
+            problems = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+            errors.append({"row": number, "error": problems})
+        except TypeError as e:
+            errors.append({"row": number, "error": str(e)})
+    return valid, errors
+
+
+def _free_phones(contacts: List[Optional[str]]) -> List[Optional[str]]:
+    """
+    create_patient stores the emergency contact as the patient user's phone,
+    which is unique; contacts already taken (in the database or earlier in
+    the batch) are left off the user and kept on the profile only
+    """
+    wanted = [contact for contact in contacts if contact]
+    taken = set(User.objects.filter(phone__in=wanted).values_list("phone", flat=True))
+    phones = []
+    for contact in contacts:
+        if contact and contact not in taken:
+            taken.add(contact)
+            phones.append(contact)
+        else:
+            phones.append(None)
+    return phones
+
+
+def _renew_lease(job: PatientImportJob):
+    job.lease_until = timezone.now() + timedelta(seconds=PATIENT_IMPORT_LEASE_SECONDS)
+    PatientImportJob.objects.filter(id=job.id).update(lease_until=job.lease_until)
+
+
+def _import_batch(job: PatientImportJob, doctor: DoctorProfile, rows: List[Tuple[int, CreatePatientSchema]]) -> int:
+    """
+    Create the patients of one batch of valid rows. Committed together
+    with the job's progress, which the caller has already advanced.
+
+    Returns:
+        Number of patients created
+    """
+    author = doctor.user.full_name or doctor.user.username
+    created_at = timezone.now().isoformat()
+    for attempt in range(INSERT_ATTEMPTS):
+        health_ids = allocate_health_ids(len(rows))
+        phones = _free_phones([payload.emergency_contact for _, payload in rows])
+        records = [
+            {
+                "patient_id": health_id,
+                "full_name": payload.full_name,
+                "age": payload.age,
+                "date_of_birth": payload.date_of_birth,
+                "gender": payload.gender,
+                "condition": payload.condition,
+                "notes": payload.notes,
+                "created_at": created_at,
+                "created_by_doctor": author,
+            }
+            for health_id, (_, payload) in zip(health_ids, rows)
+        ]
+        record_hashes = hash_records_bulk(records)
+        keys = get_data_keys(health_ids)
+        # The upload can take a while; don't let another worker claim the job meanwhile
+        _renew_lease(job)
+        ipfs_hashes = upload_many_to_ipfs(records, [keys[health_id] for health_id in health_ids])
+
+        try:
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(
+                        username=f"patient_{health_id.lower()}",
+                        email=f"patient_{health_id.lower()}@temp.local",
+                        full_name=payload.full_name,
+                        role=User.ROLE_PATIENT,
+                        phone=phone,
+                    )
+                    for health_id, (_, payload), phone in zip(health_ids, rows, phones)
+                ])
+                # One Merkle batch anchors the whole import batch
+                batch, proofs = open_anchor_batch(list(zip(health_ids, record_hashes)), CARDANO_ANCHOR_ISSUER_ID)
+                profiles = PatientProfile.objects.bulk_create([
+                    PatientProfile(
+                        user=user,
+                        health_id=health_id,
+                        emergency_contact=payload.emergency_contact or "",
+                        ipfs_hash=ipfs_hash,
+                        cardano_record_hash=record_hash,
+                        cardano_merkle_proof=proof,
+                        anchor_batch=batch,
+                        created_by_doctor=doctor,
+                        import_job=job,
+                    )
+                    for user, health_id, (_, payload), ipfs_hash, record_hash, proof
+                    in zip(users, health_ids, rows, ipfs_hashes, record_hashes, proofs)
+                ])
+                PatientSnapshot.objects.bulk_create([
+                    new_patient_snapshot(profile, record) for profile, record in zip(profiles, records)
+                ])
+
+                job.created_count += len(profiles)
+                job.lease_until = timezone.now() + timedelta(seconds=PATIENT_IMPORT_LEASE_SECONDS)
+                job.save()
+            return len(profiles)
+        except IntegrityError:
+            # A phone was taken between the check and the insert; try again with fresh IDs
+            if attempt == INSERT_ATTEMPTS - 1:
+                raise
+    return 0
+
+
+def award_import_care_points(job: PatientImportJob) -> int:
+    """
+    One CarePoints award for everything the job created, at the rate one
+    create-patient call earns today (split only to respect the per-mint cap).
+    Call it through complete_import_job, which records the award.
+
+    Returns:
+        Amount awarded
+    """
+    if not job.created_count:
+        return 0
+    with transaction.atomic():
+        doctor = DoctorProfile.objects.select_for_update().get(id=job.doctor_id)
+        update_doctor_streak(doctor)
+        total = calculate_care_points_reward(doctor) * job.created_count
+        doctor.care_points_balance += total
+        doctor.save()
+
+        remaining = total
+        while remaining > 0:
+            amount = min(remaining, CAREPOINTS_MAX_MINT)
+            remaining -= amount
+            tx = CarePointsTransaction.objects.create(
+                doctor=doctor,
+                amount=amount,
+                description=f"Bulk patient import #{job.id}: {job.created_count} records",
+                transaction_type="patient_record",
+            )
+            if doctor.cardano_address and CARDANO_MINT_MODE != "batch":
+                enqueue_care_points_mint(
+                    tx,
+                    address=doctor.cardano_address,
+                    owner_pubkey_hash=CARDANO_ANCHOR_ISSUER_ID,
+                )
+    return total
+
+
+def complete_import_job(job: PatientImportJob) -> PatientImportJob:
+    """
+    Award CarePoints and mark the job completed in one transaction, so a
+    job re-claimed after a crash or an expired lease is never awarded twice
+
+    Returns:
+        The completed job, as saved
+    """
+    with transaction.atomic():
+        job = PatientImportJob.objects.select_for_update().get(id=job.id)
+        if not job.care_points_awarded:
+            job.care_points_awarded = award_import_care_points(job)
+        job.status = PatientImportJob.STATUS_COMPLETED
+        job.finished_at = timezone.now()
+        job.lease_until = None
+        job.save()
+    return job
+
+
+def claim_import_job() -> Optional[PatientImportJob]:
+    """
+    Lease the oldest queued job, or a running one whose worker stopped renewing its lease
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=PATIENT_IMPORT_LEASE_SECONDS)
+    candidates = PatientImportJob.objects.filter(
+        Q(status=PatientImportJob.STATUS_QUEUED)
+        | Q(status=PatientImportJob.STATUS_RUNNING, lease_until__lt=now)
+    ).order_by("id")[:5]
+    for job in candidates:
+        claimed = PatientImportJob.objects.filter(
+            id=job.id, status=job.status, lease_until=job.lease_until
+        ).update(status=PatientImportJob.STATUS_RUNNING, lease_until=lease_until)
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def process_import_job(job: PatientImportJob, batch_size: int = PATIENT_IMPORT_BATCH_SIZE) -> PatientImportJob:
+    """
+    Import the rows of a claimed job that are not processed yet, then award CarePoints
+    """
+    doctor = DoctorProfile.objects.select_related("user").get(id=job.doctor_id)
+    if job.started_at is None:
+        job.started_at = timezone.now()
+        job.save(update_fields=["started_at"])
+
+    try:
+        rows = islice(iter_rows(job.file, job.format), job.processed_rows, None)
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            valid, errors = _parse_rows(chunk)
+            job.processed_rows += len(chunk)
+            job.failed_count += len(errors)
+            job.errors = (job.errors + errors)[:PATIENT_IMPORT_MAX_ERRORS]
+            if valid:
+                _import_batch(job, doctor, valid)
+            else:
+                job.lease_until = timezone.now() + timedelta(seconds=PATIENT_IMPORT_LEASE_SECONDS)
+                job.save()
+
+        return complete_import_job(job)
+    except Exception as e:
+        print(f"Patient import {job.id} failed: {e}")
+        job.refresh_from_db()
+        job.status = PatientImportJob.STATUS_FAILED
+        job.last_error = str(e)[:1000] or e.__class__.__name__
+    job.finished_at = timezone.now()
+    job.lease_until = None
+    job.save()
+    return job
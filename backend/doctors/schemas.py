@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List, Dict
 
 # Payload for scanning QR / searching patient
 class ScanPatientSchema(BaseModel):
@@ -50,6 +50,29 @@ class CreatePatientResponse(BaseModel):
     health_id: str
     qr_code_url: Optional[str] = None
 
+# Bulk Patient Import Job
+class PatientImportJobSchema(BaseModel):
+    id: int
+    status: str
+    format: str
+    total_rows: int
+    processed_rows: int
+    created_count: int
+    failed_count: int
+    progress: float
+    errors: List[Dict]
+    care_points_awarded: int
+    last_error: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+# Patient created by an import job
+class ImportedPatientSchema(BaseModel):
+    patient_id: int
+    health_id: str
+    full_name: Optional[str] = None
+
 # Doctor Profile Schema
 class DoctorProfileSchema(BaseModel):
     full_name: Optional[str] = None
@@ -65,12 +88,18 @@ class CarePointsResponse(BaseModel):
     balance: int
     current_streak: int
     last_record_date: Optional[str] = None
+    synced_at: Optional[str] = None
 
 # Verify Cardano Hash Request
 class VerifyCardanoHashSchema(BaseModel):
     record_hash: str
     patient_id: str
     tx_hash: Optional[str] = None
+    merkle_proof: Optional[List[Dict[str, str]]] = None
+
+# Bulk Verify Cardano Hash Request
+class BulkVerifyCardanoHashSchema(BaseModel):
+    items: List[VerifyCardanoHashSchema]
 
 # QR Decode Request
 class QRDecodeSchema(BaseModel):
@@ -0,0 +1,174 @@
+import json
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from ninja_jwt.tokens import AccessToken
+
+from doctors.models import CarePointsTransaction, DoctorProfile, PatientImportJob
+from doctors.patient_import import claim_import_job, process_import_job
+from integration.models import AnchoredRecord
+from patients.models import Medication, PatientProfile
+from users.models import User
+
+
+def make_doctor(username="doc", **fields):
+    user = User.objects.create(username=username, role=User.ROLE_DOCTOR)
+    fields.setdefault("hospital", "General")
+    return DoctorProfile.objects.create(user=user, **fields)
+
+
+class DoctorApiTestCase(TestCase):
+    def setUp(self):
+        self.doctor = make_doctor()
+        token = str(AccessToken.for_user(self.doctor.user))
+        self.auth = {"Authorization": f"Bearer {token}"}
+
+
+class BulkVerifyTests(DoctorApiTestCase):
+    async def test_results_stream_as_ndjson(self):
+        await AnchoredRecord.objects.acreate(tx_hash="tx1", record_hash="ab" * 32, patient_id="PAT-1")
+        items = [
+            {"record_hash": "ab" * 32, "patient_id": "PAT-1"},
+            {"record_hash": "cd" * 32, "patient_id": "PAT-2"},
+        ]
+        response = await self.async_client.post(
+            "/api/doctor/verify-cardano-hash/bulk/", {"items": items}, content_type="application/json", headers=self.auth
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = [json.loads(line) async for line in response.streaming_content]
+        results = {line["index"]: line for line in lines}
+        self.assertEqual(sorted(results), [0, 1])
+        self.assertTrue(results[0]["verified"])
+        self.assertFalse(results[1]["verified"])
+
+
+@mock.patch("integration.encryption.IPFS_ENCRYPTION_KEY", "")
+class MissingEncryptionKeyTests(DoctorApiTestCase):
+    def test_create_patient_answers_503(self):
+        response = self.client.post(
+            "/api/doctor/create-patient/", {"full_name": "Ada", "gender": "F"},
+            content_type="application/json", headers=self.auth,
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("IPFS_ENCRYPTION_KEY", response.json()["error"])
+        self.assertFalse(PatientProfile.objects.exists())
+
+    def test_import_is_not_queued(self):
+        upload = ContentFile(b'{"full_name": "Ada", "gender": "F"}\n', name="rows.ndjson")
+        response = self.client.post("/api/doctor/patients/import/", {"file": upload}, headers=self.auth)
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(PatientImportJob.objects.exists())
+
+
+class AddMedicationTests(DoctorApiTestCase):
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create(username="patient_1", role=User.ROLE_PATIENT)
+        self.patient = PatientProfile.objects.create(user=user, health_id="PAT-1")
+
+    def add_medication(self):
+        return self.client.post(
+            "/api/doctor/meds/",
+            {"patient_id": self.patient.id, "drug_name": "Aspirin", "dosage": "100mg"},
+            content_type="application/json",
+            headers=self.auth,
+        )
+
+    def test_counter_and_snapshot_follow_the_medication(self):
+        self.assertEqual(self.add_medication().status_code, 200)
+        self.patient.refresh_from_db()
+        self.assertEqual(self.patient.medications_count, 1)
+        self.assertIsNotNone(self.patient.last_activity_at)
+        self.assertEqual(self.patient.snapshot.record_data["medications"][0]["drug_name"], "Aspirin")
+
+    def test_failed_snapshot_refresh_rolls_back_the_medication(self):
+        with mock.patch("doctors.views.refresh_patient_snapshot", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                self.add_medication()
+        self.patient.refresh_from_db()
+        self.assertEqual(self.patient.medications_count, 0)
+        self.assertFalse(Medication.objects.filter(patient=self.patient).exists())
+
+
+def no_upload(records, keys=None):
+    return [None] * len(records)
+
+
+def no_keys(health_ids):
+    return {health_id: None for health_id in health_ids}
+
+
+@mock.patch("doctors.patient_import.get_data_keys", no_keys)
+class PatientImportTests(TestCase):
+    ROWS = [
+        {"full_name": "Ada", "gender": "F", "age": 36},
+        {"full_name": "Bob"},
+        {"full_name": "Cy", "gender": "M", "emergency_contact": "555-0100"},
+    ]
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.doctor = make_doctor()
+        content = "".join(json.dumps(row) + "\n" for row in self.ROWS)
+        path = default_storage.save("patient_imports/rows.ndjson", ContentFile(content.encode()))
+        self.job = PatientImportJob.objects.create(
+            doctor=self.doctor, file=path, format=PatientImportJob.FORMAT_NDJSON, total_rows=len(self.ROWS)
+        )
+
+    def run_job(self):
+        job = claim_import_job()
+        self.assertEqual(job.id, self.job.id)
+        with mock.patch("doctors.patient_import.upload_many_to_ipfs", no_upload):
+            return process_import_job(job, batch_size=2)
+
+    def test_valid_rows_are_imported_and_invalid_ones_reported(self):
+        job = self.run_job()
+        self.assertEqual(job.status, PatientImportJob.STATUS_COMPLETED)
+        self.assertEqual((job.processed_rows, job.created_count, job.failed_count), (3, 2, 1))
+        self.assertEqual([error["row"] for error in job.errors], [2])
+        self.assertIsNone(job.lease_until)
+        patients = PatientProfile.objects.filter(import_job=job)
+        self.assertEqual(patients.count(), 2)
+        self.assertEqual(patients.exclude(snapshot=None).count(), 2)
+
+    def test_care_points_are_awarded_once(self):
+        job = self.run_job()
+        self.assertGreater(job.care_points_awarded, 0)
+        self.doctor.refresh_from_db()
+        self.assertEqual(self.doctor.care_points_balance, job.care_points_awarded)
+
+        # A worker that dies after the award leaves nothing to re-award
+        PatientImportJob.objects.filter(id=job.id).update(
+            status=PatientImportJob.STATUS_RUNNING, lease_until=timezone.now() - timedelta(seconds=1)
+        )
+        again = self.run_job()
+        self.assertEqual(again.status, PatientImportJob.STATUS_COMPLETED)
+        self.assertEqual(again.care_points_awarded, job.care_points_awarded)
+        self.assertEqual(CarePointsTransaction.objects.filter(doctor=self.doctor).count(), 1)
+        self.doctor.refresh_from_db()
+        self.assertEqual(self.doctor.care_points_balance, job.care_points_awarded)
+
+    def test_lease_is_renewed_before_the_upload(self):
+        job = claim_import_job()
+        stale = timezone.now() + timedelta(seconds=1)
+        PatientImportJob.objects.filter(id=job.id).update(lease_until=stale)
+        leases = []
+
+        def upload(records, keys=None):
+            leases.append(PatientImportJob.objects.get(id=job.id).lease_until)
+            return no_upload(records)
+
+        with mock.patch("doctors.patient_import.upload_many_to_ipfs", upload):
+            process_import_job(job, batch_size=2)
+        self.assertEqual(len(leases), 2)
+        self.assertTrue(all(lease > stale for lease in leases))
@@ -1,33 +1,45 @@
 from ninja import Router, Form, File
 from ninja.files import UploadedFile
-from users.auth import AuthBearer
-from .models import DoctorProfile, CarePointsTransaction
+from users.auth import AuthBearer, AsyncAuthBearer
+from .models import DoctorProfile, CarePointsTransaction, PatientImportJob
+from .care_points import calculate_care_points_reward, update_doctor_streak
 from patients.models import PatientProfile, Visit, Medication, LabResult
+from patients.health_ids import allocate_health_id
+from patients.snapshots import new_patient_snapshot, refresh_patient_snapshot
+from patients.counters import record_patient_activity
+from patients.emergency_cards import get_emergency_card_cache
 from patients.schemas import VisitModel, MedicationModel, LabResultModel, PatientProfileModel
 from .schemas import (
     ScanPatientSchema, PatientSummarySchema, VisitCreateSchema, 
     MedicationCreateSchema, LabCreateSchema, CreatePatientSchema, CreatePatientResponse,
-    DoctorProfileSchema, CarePointsResponse, VerifyCardanoHashSchema, QRDecodeSchema
+    DoctorProfileSchema, CarePointsResponse, VerifyCardanoHashSchema, BulkVerifyCardanoHashSchema,
+    QRDecodeSchema, PatientImportJobSchema, ImportedPatientSchema
 )
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from .patient_import import create_import_job, ImportFileError
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import timezone
+from asgiref.sync import sync_to_async
 from users.models import User
-from integration.cardano_service import (
-    submit_record_to_cardano,
-    mint_care_points,
-    verify_record_hash,
-    get_care_points_balance,
-    hash_record_data,
+from integration.cardano_service import hash_record_data
+from integration import async_cardano_service, async_ipfs_service
+from integration.outbox import enqueue_record_anchor, enqueue_care_points_mint
+from integration.bulk_verify import verify_records_bulk
+from integration.cardano_config import (
+    CARDANO_ANCHOR_MODE,
+    CARDANO_MINT_MODE,
+    CARDANO_BULK_VERIFY_MAX_ITEMS,
+    IPFS_PIN_LAB_FILES,
 )
 from integration.ipfs_service import upload_to_ipfs
-import qrcode
-import io
+from integration.uploads import save_upload, queue_file_pin
+from integration.encryption import check_master_key, get_data_key
+from integration.qr_codes import refresh_qr_digest, qr_code_url
 import json
-import secrets
-import string
 from typing import Optional, List
-from datetime import date, timedelta
+from datetime import date
 
 router = Router(tags=["Doctor Views"])
 
@@ -35,7 +47,7 @@ router = Router(tags=["Doctor Views"])
 @router.post("/scan/", response=PatientSummarySchema, auth=AuthBearer())
 def scan_patient(request, payload: ScanPatientSchema):
     try:
-        patient = PatientProfile.objects.get(health_id=payload.health_id)
+        patient = PatientProfile.objects.select_related("user").get(health_id=payload.health_id)
     except PatientProfile.DoesNotExist:
         return {}
 
@@ -44,12 +56,24 @@ def scan_patient(request, payload: ScanPatientSchema):
         "full_name": patient.user.full_name,
         "health_id": patient.health_id,
         "emergency_contact": patient.emergency_contact,
-        "visits_count": patient.visits.count(),
-        "medications_count": patient.medications.count(),
-        "lab_results_count": patient.lab_results.count()
+        "visits_count": patient.visits_count,
+        "medications_count": patient.medications_count,
+        "lab_results_count": patient.lab_results_count
     }
 
 
+@router.get("/emergency-card/{health_id}/", response={404: dict}, auth=AuthBearer())
+def get_emergency_card(request, health_id: str):
+    """
+    Name, emergency contact and critical summary of a patient, from memory.
+    Fields are capped, so the card is always a few hundred bytes.
+    """
+    content = get_emergency_card_cache().get(health_id)
+    if content is None:
+        return 404, {"error": "Patient not found"}
+    return HttpResponse(content, content_type="application/json")
+
+
 @router.post("/visit/", response=VisitModel, auth=AuthBearer())
 def add_visit(request, payload: VisitCreateSchema):
     try:
@@ -57,43 +81,40 @@ def add_visit(request, payload: VisitCreateSchema):
     except PatientProfile.DoesNotExist:
         return {}
 
-    visit = Visit.objects.create(
-        patient=patient,
-        doctor=getattr(request.user, "doctor_profile"),
-        summary=payload.summary,
-        diagnosis=payload.diagnosis or "",
-        cardano_hash=payload.cardano_hash or ""
-    )
-    # Update doctor streak
-    doctor_profile = getattr(request.user, "doctor_profile", None)
-    if doctor_profile:
-        update_doctor_streak(doctor_profile)
-        
-        # Calculate and mint CarePoints (Activity reward = 5 points)
-        care_points_amount = 5
-        
-        # Update local balance
-        doctor_profile.care_points_balance += care_points_amount
-        doctor_profile.save()
-        
-        # Record transaction
-        tx = CarePointsTransaction.objects.create(
-            doctor=doctor_profile,
-            amount=care_points_amount,
-            description=f"Patient visit: {patient.health_id}",
-            transaction_type="patient_visit",
+    with transaction.atomic():
+        visit = Visit.objects.create(
+            patient=patient,
+            doctor=getattr(request.user, "doctor_profile"),
+            summary=payload.summary,
+            diagnosis=payload.diagnosis or "",
+            cardano_hash=payload.cardano_hash or ""
         )
-        
-        # Mint on Cardano if address exists
-        if doctor_profile.cardano_address:
-            mint_result = mint_care_points(
-                address=doctor_profile.cardano_address,
+        record_patient_activity(patient, "visits", at=visit.created_at)
+        refresh_patient_snapshot(patient)
+        # Update doctor streak
+        doctor_profile = getattr(request.user, "doctor_profile", None)
+        if doctor_profile:
+            update_doctor_streak(doctor_profile)
+            
+            # Calculate and mint CarePoints (Activity reward = 5 points)
+            care_points_amount = 5
+            
+            # Update local balance
+            doctor_profile.care_points_balance += care_points_amount
+            doctor_profile.save()
+            
+            # Record transaction
+            tx = CarePointsTransaction.objects.create(
+                doctor=doctor_profile,
                 amount=care_points_amount,
+                description=f"Patient visit: {patient.health_id}",
+                transaction_type="patient_visit",
             )
             
-            if mint_result:
-                tx.cardano_tx_hash = mint_result.get("tx_hash")
-                tx.save()
+            # Queue the mint; the outbox worker back-fills cardano_tx_hash.
+            # In batch mode the row is picked up by the aggregated minter.
+            if doctor_profile.cardano_address and CARDANO_MINT_MODE != "batch":
+                enqueue_care_points_mint(tx, address=doctor_profile.cardano_address)
 
     return {
         "id": visit.id,
@@ -134,14 +155,17 @@ def add_medication(request, payload: MedicationCreateSchema):
     except PatientProfile.DoesNotExist:
         return {}
 
-    med = Medication.objects.create(
-        patient=patient,
-        doctor=getattr(request.user, "doctor_profile"),
-        drug_name=payload.drug_name,
-        dosage=payload.dosage,
-        duration=payload.duration or "",
-        verified=False
-    )
+    with transaction.atomic():
+        med = Medication.objects.create(
+            patient=patient,
+            doctor=getattr(request.user, "doctor_profile"),
+            drug_name=payload.drug_name,
+            dosage=payload.dosage,
+            duration=payload.duration or "",
+            verified=False
+        )
+        record_patient_activity(patient, "medications")
+        refresh_patient_snapshot(patient)
     return {
         "id": med.id,
         "drug_name": med.drug_name,
@@ -163,16 +187,27 @@ def upload_lab(
     except PatientProfile.DoesNotExist:
         return {}
 
-    # Save file
-    file_path = f"lab_results/{file.name}"
-    default_storage.save(file_path, ContentFile(file.read()))
-
-    lab = LabResult.objects.create(
-        patient=patient,
-        file=file_path,
-        summary=summary or "",
-        date=date.today()
+    # Stream the file to storage; identical files are stored once
+    stored = save_upload(
+        file,
+        f"lab_results/{file.name}",
+        find_existing=lambda sha256: LabResult.objects.filter(sha256=sha256).values_list("file", flat=True).first(),
     )
+    ipfs_cid = stored.cid
+    if IPFS_PIN_LAB_FILES:
+        ipfs_cid = queue_file_pin(stored, subject=patient.health_id)
+
+    with transaction.atomic():
+        lab = LabResult.objects.create(
+            patient=patient,
+            file=stored.path,
+            sha256=stored.sha256,
+            ipfs_cid=ipfs_cid,
+            summary=summary or "",
+            date=date.today()
+        )
+        record_patient_activity(patient, "lab_results")
+        refresh_patient_snapshot(patient)
     return {
         "id": lab.id,
         "summary": lab.summary or None,
@@ -180,46 +215,16 @@ def upload_lab(
     }
 
 
-def calculate_care_points_reward(doctor_profile: DoctorProfile) -> int:
-    """
-    Calculate CarePoints reward based on streak
-    Formula: 10 base + 2 per streak day
-    """
-    base_reward = 10
-    streak_bonus = doctor_profile.current_streak * 2
-    return base_reward + streak_bonus
+ENCRYPTION_KEY_MISSING = {"error": "Encryption key not configured (IPFS_ENCRYPTION_KEY)"}
 
 
-def update_doctor_streak(doctor_profile: DoctorProfile):
-    """
-    Update doctor's streak based on last record date
-    """
-    today = timezone.now().date()
-    last_date = doctor_profile.last_record_date
-    
-    if last_date is None:
-        # First record
-        doctor_profile.current_streak = 1
-    elif last_date == today:
-        # Already created a record today, no change
-        pass
-    elif last_date == today - timedelta(days=1):
-        # Maintained streak
-        doctor_profile.current_streak += 1
-    else:
-        # Streak broken, reset to 1
-        doctor_profile.current_streak = 1
-    
-    doctor_profile.last_record_date = today
-    doctor_profile.save()
-
-
-@router.post("/create-patient/", response=CreatePatientResponse, auth=AuthBearer())
+@router.post("/create-patient/", response={200: CreatePatientResponse, 503: dict}, auth=AuthBearer())
 def create_patient(request, payload: CreatePatientSchema):
     """
     Create a new patient profile with QR code generation and Cardano integration.
     The health_id is generated automatically and used in the QR code.
-    Submits record to Cardano and mints CarePoints for the doctor.
+    Queues the record anchor and the doctor's CarePoints mint on the Cardano
+    outbox; cardano_tx_hash is filled in by the outbox worker.
     """
     # Get or create doctor profile
     doctor_profile = getattr(request.user, "doctor_profile", None)
@@ -231,28 +236,13 @@ def create_patient(request, payload: CreatePatientSchema):
             specialization="General",
         )
     
-    # Generate unique health_id (PAT-XXXXXXXX format)
-    def generate_health_id():
-        while True:
-            random_part = ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(8))
-            health_id = f"PAT-{random_part}"
-            if not PatientProfile.objects.filter(health_id=health_id).exists():
-                return health_id
-    
-    health_id = generate_health_id()
+    # Unique health_id (PAT-XXXXXXXX format) from this process's reserved block
+    health_id = allocate_health_id()
     
     # Create user for the patient
     temp_username = f"patient_{health_id.lower()}"
     temp_email = f"{temp_username}@temp.local"
     
-    user = User.objects.create(
-        username=temp_username,
-        email=temp_email,
-        full_name=payload.full_name,
-        role=User.ROLE_PATIENT,
-        phone=payload.emergency_contact or "",
-    )
-    
     # Prepare record data for Cardano
     record_data = {
         "patient_id": health_id,
@@ -265,106 +255,162 @@ def create_patient(request, payload: CreatePatientSchema):
         "created_at": timezone.now().isoformat(),
         "created_by_doctor": doctor_profile.user.full_name or doctor_profile.user.username,
     }
+    record_hash = hash_record_data(record_data)
     
-    # Upload to IPFS (optional, for decentralized storage)
-    ipfs_hash = upload_to_ipfs(record_data, encrypt=False)
+    # Upload to IPFS (optional, for decentralized storage), encrypted with the patient's data key
+    try:
+        data_key = get_data_key(health_id)
+    except ImproperlyConfigured as e:
+        print(f"Cannot create patient: {e}")
+        return 503, ENCRYPTION_KEY_MISSING
+    ipfs_hash = upload_to_ipfs(record_data, encrypt=True, key=data_key)
     
-    # Submit to Cardano
     # Get issuer_id (doctor's pubkey hash) - for now use a placeholder
     # In production, this should come from the doctor's wallet
     issuer_id = "08ee30a2e0e28b3eaf109642374971c5aa4675f5a0ff71dc8d5988ae"  # Default from policy
     
-    cardano_result = submit_record_to_cardano(
-        record_data=record_data,
-        issuer_id=issuer_id,
-        patient_id=health_id,
-        doctor_address=doctor_profile.cardano_address,
-    )
-    
-    # Create patient profile
-    patient_profile = PatientProfile.objects.create(
-        user=user,
-        health_id=health_id,
-        emergency_contact=payload.emergency_contact or "",
-        ipfs_hash=ipfs_hash,
-        cardano_tx_hash=cardano_result.get("tx_hash") if cardano_result else None,
-        cardano_record_hash=cardano_result.get("record_hash") if cardano_result else None,
-        created_by_doctor=doctor_profile,
-    )
-    
-    # Update doctor streak
-    update_doctor_streak(doctor_profile)
-    
-    # Calculate and mint CarePoints
-    care_points_amount = calculate_care_points_reward(doctor_profile)
-    
-    # Update doctor's CarePoints balance locally first
-    doctor_profile.care_points_balance += care_points_amount
-    doctor_profile.save()
-    
-    # Record transaction
-    tx = CarePointsTransaction.objects.create(
-        doctor=doctor_profile,
-        amount=care_points_amount,
-        description=f"Patient record creation: {health_id}",
-        transaction_type="patient_record",
-    )
-    
-    if doctor_profile.cardano_address:
-        mint_result = mint_care_points(
-            address=doctor_profile.cardano_address,
+    with transaction.atomic():
+        user = User.objects.create(
+            username=temp_username,
+            email=temp_email,
+            full_name=payload.full_name,
+            role=User.ROLE_PATIENT,
+            phone=payload.emergency_contact or "",
+        )
+        
+        # Create patient profile; cardano_tx_hash is back-filled by the outbox worker
+        patient_profile = PatientProfile.objects.create(
+            user=user,
+            health_id=health_id,
+            emergency_contact=payload.emergency_contact or "",
+            ipfs_hash=ipfs_hash,
+            cardano_record_hash=record_hash,
+            created_by_doctor=doctor_profile,
+        )
+        new_patient_snapshot(patient_profile, record_data).save(force_insert=True)
+        
+        # Queue submission to Cardano. In batch mode the outbox worker folds
+        # the record hash into the next Merkle batch instead.
+        if CARDANO_ANCHOR_MODE != "batch":
+            enqueue_record_anchor(
+                patient_profile,
+                record_data=record_data,
+                record_hash=record_hash,
+                issuer_id=issuer_id,
+                doctor_address=doctor_profile.cardano_address,
+            )
+        
+        # Update doctor streak
+        update_doctor_streak(doctor_profile)
+        
+        # Calculate and mint CarePoints
+        care_points_amount = calculate_care_points_reward(doctor_profile)
+        
+        # Update doctor's CarePoints balance locally first
+        doctor_profile.care_points_balance += care_points_amount
+        doctor_profile.save()
+        
+        # Record transaction
+        tx = CarePointsTransaction.objects.create(
+            doctor=doctor_profile,
             amount=care_points_amount,
-            owner_pubkey_hash=issuer_id,
+            description=f"Patient record creation: {health_id}",
+            transaction_type="patient_record",
         )
         
-        if mint_result:
-            tx.cardano_tx_hash = mint_result.get("tx_hash")
-            tx.save()
-    
-    # Generate QR code with record hash
-    qr_data = {
-        "patient_id": patient_profile.id,
-        "health_id": health_id,
-        "record_hash": cardano_result.get("record_hash") if cardano_result else None,
-        "tx_hash": cardano_result.get("tx_hash") if cardano_result else None,
-        "type": "patient_access"
-    }
-    
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_M,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(json.dumps(qr_data))
-    qr.make(fit=True)
-    
-    # Create QR code image
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Save QR code to patient profile
-    buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
-    
-    qr_filename = f"qrcodes/{patient_profile.id}.png"
-    patient_profile.qr_code.save(
-        qr_filename,
-        ContentFile(buffer.read()),
-        save=True
-    )
+        if doctor_profile.cardano_address and CARDANO_MINT_MODE != "batch":
+            enqueue_care_points_mint(
+                tx,
+                address=doctor_profile.cardano_address,
+                owner_pubkey_hash=issuer_id,
+            )
     
-    # Build QR code URL
-    media_url = "/media/"
-    qr_code_url = request.build_absolute_uri(f"{media_url}{patient_profile.qr_code.name}") if patient_profile.qr_code else None
+    # QR image is rendered on first request (or by render_qr_codes), not here
+    qr_digest = refresh_qr_digest(patient_profile)
     
     return {
         "patient_id": patient_profile.id,
         "health_id": health_id,
-        "qr_code_url": qr_code_url
+        "qr_code_url": qr_code_url(request, qr_digest)
+    }
+
+
+def _import_job_response(job: PatientImportJob):
+    return {
+        "id": job.id,
+        "status": job.status,
+        "format": job.format,
+        "total_rows": job.total_rows,
+        "processed_rows": job.processed_rows,
+        "created_count": job.created_count,
+        "failed_count": job.failed_count,
+        "progress": round(job.processed_rows / job.total_rows, 4) if job.total_rows else 0.0,
+        "errors": job.errors,
+        "care_points_awarded": job.care_points_awarded,
+        "last_error": job.last_error or None,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
     }
 
 
+@router.post("/patients/import/", response={202: PatientImportJobSchema, 400: dict, 503: dict}, auth=AuthBearer())
+def import_patients(request, file: UploadedFile = File(...)):
+    """
+    Queue a bulk patient import from a CSV (header row) or NDJSON file with
+    the create-patient fields. The process_patient_imports worker runs it;
+    poll the returned job for progress.
+    """
+    doctor_profile = getattr(request.user, "doctor_profile", None)
+    if not doctor_profile:
+        doctor_profile = DoctorProfile.objects.create(
+            user=request.user,
+            hospital="Unknown Hospital",
+            specialization="General",
+        )
+    try:
+        # The worker encrypts every record; don't queue a job it cannot run
+        check_master_key()
+        job = create_import_job(doctor_profile, file)
+    except ImproperlyConfigured as e:
+        print(f"Cannot queue patient import: {e}")
+        return 503, ENCRYPTION_KEY_MISSING
+    except ImportFileError as e:
+        return 400, {"error": str(e)}
+    return 202, _import_job_response(job)
+
+
+@router.get("/patients/import/{job_id}/", response={200: PatientImportJobSchema, 404: dict}, auth=AuthBearer())
+def get_patient_import(request, job_id: int):
+    job = PatientImportJob.objects.filter(id=job_id, doctor__user=request.user).first()
+    if not job:
+        return 404, {"error": "Import job not found"}
+    return 200, _import_job_response(job)
+
+
+@router.get(
+    "/patients/import/{job_id}/patients/",
+    response={200: List[ImportedPatientSchema], 404: dict},
+    auth=AuthBearer(),
+)
+def get_patient_import_patients(request, job_id: int, offset: int = 0, limit: int = 500):
+    """
+    Patients created by an import job, in file order
+    """
+    if not PatientImportJob.objects.filter(id=job_id, doctor__user=request.user).exists():
+        return 404, {"error": "Import job not found"}
+    limit = max(1, min(limit, 5000))
+    patients = (
+        PatientProfile.objects.filter(import_job_id=job_id)
+        .order_by("id")
+        .values_list("id", "health_id", "user__full_name")[offset:offset + limit]
+    )
+    return 200, [
+        {"patient_id": patient_id, "health_id": health_id, "full_name": full_name or None}
+        for patient_id, health_id, full_name in patients
+    ]
+
+
 @router.get("/patients/", response=list[dict], auth=AuthBearer())
 def get_doctor_patients(request):
     """
@@ -390,7 +436,9 @@ def get_doctor_patients(request):
 @router.get("/care-points/", response=CarePointsResponse, auth=AuthBearer())
 def get_care_points_endpoint(request):
     """
-    Get doctor's CarePoints balance and streak
+    Get doctor's CarePoints balance and streak.
+    The balance is kept in sync from Cardano by the sync_care_points_balances
+    command, so this only reads local state.
     """
     doctor_profile = getattr(request.user, "doctor_profile", None)
     if not doctor_profile:
@@ -398,46 +446,57 @@ def get_care_points_endpoint(request):
             "balance": 0,
             "current_streak": 0,
             "last_record_date": None,
+            "synced_at": None,
         }
     
-    # Sync balance from Cardano if address is set
-    if doctor_profile.cardano_address:
-        try:
-            blockchain_balance = get_care_points_balance(doctor_profile.cardano_address)
-            if blockchain_balance > 0:
-                doctor_profile.care_points_balance = blockchain_balance
-                doctor_profile.save()
-        except Exception as e:
-            print(f"Error syncing CarePoints balance: {e}")
-    
     return {
         "balance": doctor_profile.care_points_balance,
         "current_streak": doctor_profile.current_streak,
         "last_record_date": doctor_profile.last_record_date.isoformat() if doctor_profile.last_record_date else None,
+        "synced_at": doctor_profile.care_points_synced_at.isoformat() if doctor_profile.care_points_synced_at else None,
+    }
+
+
+def _verification_response(result):
+    return {
+        "verified": result.get("verified", False),
+        "tx_hash": result.get("tx_hash"),
+        "record_hash": result.get("record_hash"),
+        "patient_id": result.get("patient_id"),
+        "validator_match": result.get("validator_match"),
+        "hash_match": result.get("hash_match"),
+        "patient_match": result.get("patient_match"),
     }
 
 
-@router.post("/verify-cardano-hash/", response=dict, auth=AuthBearer())
-def verify_cardano_hash_endpoint(request, payload: VerifyCardanoHashSchema):
+@router.post("/verify-cardano-hash/", response=dict, auth=AsyncAuthBearer())
+async def verify_cardano_hash_endpoint(request, payload: VerifyCardanoHashSchema):
     """
-    Verify a Cardano record hash
+    Verify a Cardano record hash.
+    Records anchored in a Merkle batch are verified with their inclusion proof;
+    if the caller does not send one, the stored proof is used.
     """
-    result = verify_record_hash(
+    tx_hash = payload.tx_hash
+    merkle_proof = payload.merkle_proof
+    if merkle_proof is None:
+        patient = await PatientProfile.objects.filter(
+            health_id=payload.patient_id,
+            cardano_record_hash=payload.record_hash,
+            anchor_batch__isnull=False,
+        ).only("cardano_tx_hash", "cardano_merkle_proof").afirst()
+        if patient:
+            merkle_proof = patient.cardano_merkle_proof
+            tx_hash = tx_hash or patient.cardano_tx_hash
+    
+    result = await async_cardano_service.verify_record_hash(
         record_hash=payload.record_hash,
         patient_id=payload.patient_id,
-        tx_hash=payload.tx_hash,
+        tx_hash=tx_hash,
+        merkle_proof=merkle_proof,
     )
     
     if result:
-        return {
-            "verified": result.get("verified", False),
-            "tx_hash": result.get("tx_hash"),
-            "record_hash": result.get("record_hash"),
-            "patient_id": result.get("patient_id"),
-            "validator_match": result.get("validator_match"),
-            "hash_match": result.get("hash_match"),
-            "patient_match": result.get("patient_match"),
-        }
+        return _verification_response(result)
     
     return {
         "verified": False,
@@ -445,6 +504,48 @@ def verify_cardano_hash_endpoint(request, payload: VerifyCardanoHashSchema):
     }
 
 
+def _attach_stored_proofs(items):
+    """
+    Fill in the stored Merkle proof (and anchor tx) for batched records whose
+    caller sent no proof, with one query per 500 patients
+    """
+    missing = [item for item in items if item["merkle_proof"] is None]
+    health_ids = sorted({item["patient_id"] for item in missing})
+    stored = {}
+    for start in range(0, len(health_ids), 500):
+        rows = PatientProfile.objects.filter(
+            health_id__in=health_ids[start:start + 500],
+            anchor_batch__isnull=False,
+        ).values_list("health_id", "cardano_record_hash", "cardano_tx_hash", "cardano_merkle_proof")
+        for health_id, record_hash, tx_hash, merkle_proof in rows:
+            stored[(health_id, record_hash)] = (tx_hash, merkle_proof)
+    for item in missing:
+        if (item["patient_id"], item["record_hash"]) in stored:
+            tx_hash, merkle_proof = stored[(item["patient_id"], item["record_hash"])]
+            item["merkle_proof"] = merkle_proof
+            item["tx_hash"] = item["tx_hash"] or tx_hash
+
+
+@router.post("/verify-cardano-hash/bulk/", response={400: dict}, auth=AsyncAuthBearer())
+async def verify_cardano_hash_bulk_endpoint(request, payload: BulkVerifyCardanoHashSchema):
+    """
+    Verify many Cardano record hashes in one request.
+    Each distinct tx_hash is looked up once. Results stream back as NDJSON,
+    one line per record in completion order, with "index" pointing into items.
+    """
+    if len(payload.items) > CARDANO_BULK_VERIFY_MAX_ITEMS:
+        return 400, {"error": f"At most {CARDANO_BULK_VERIFY_MAX_ITEMS} records per request"}
+    
+    items = [item.model_dump() for item in payload.items]
+    await sync_to_async(_attach_stored_proofs)(items)
+    
+    async def ndjson_lines():
+        async for index, result in verify_records_bulk(items):
+            yield json.dumps({"index": index, **_verification_response(result)}) + "\n"
+    
+    return StreamingHttpResponse(ndjson_lines(), content_type="application/x-ndjson")
+
+
 @router.get("/care-points/transactions/", response=list[dict], auth=AuthBearer())
 def get_care_points_transactions(request):
     """
@@ -469,74 +570,55 @@ def get_care_points_transactions(request):
     ]
 
 
-@router.post("/decode-qr/", response=dict, auth=AuthBearer())
-def decode_qr_code(request, payload: QRDecodeSchema):
+@router.post("/decode-qr/", response=dict, auth=AsyncAuthBearer())
+async def decode_qr_code(request, payload: QRDecodeSchema):
     """
     Decode QR code and fetch patient record from database/IPFS.
     Accepts: patient_id, health_id, record_hash, or tx_hash
     """
-    from integration.ipfs_service import fetch_from_ipfs
-    
+    lookup = Q()
+    if payload.patient_id:
+        lookup |= Q(id=payload.patient_id)
+    if payload.health_id:
+        lookup |= Q(health_id=payload.health_id)
+
     patient = None
-    record_data = None
-    
-    # Try to find patient by different identifiers
-    if payload.get("patient_id"):
-        try:
-            patient = PatientProfile.objects.get(id=payload["patient_id"])
-        except PatientProfile.DoesNotExist:
-            pass
-    
-    if not patient and payload.get("health_id"):
-        try:
-            patient = PatientProfile.objects.get(health_id=payload["health_id"])
-        except PatientProfile.DoesNotExist:
-            pass
-    
+    if lookup:
+        # One indexed read for the patient, its user and its snapshot
+        matches = [
+            p async for p in PatientProfile.objects.select_related("user", "snapshot").filter(lookup)[:2]
+        ]
+        # patient_id takes precedence over health_id
+        matches.sort(key=lambda p: p.id != payload.patient_id)
+        patient = matches[0] if matches else None
+
     if not patient:
         return {
             "error": "Patient not found",
             "patient_id": None,
             "health_id": None,
         }
-    
-    # Fetch record data from IPFS if available
-    if patient.ipfs_hash:
-        try:
-            record_data = fetch_from_ipfs(patient.ipfs_hash)
-        except Exception as e:
-            print(f"Error fetching from IPFS: {e}")
-    
-    # If no IPFS data, construct from database
-    if not record_data:
-        record_data = {
-            "patient_id": patient.health_id,
-            "full_name": patient.user.full_name or patient.user.username,
-            "emergency_contact": patient.emergency_contact,
-            "visits": [
-                {
-                    "summary": v.summary,
-                    "diagnosis": v.diagnosis,
-                    "created_at": v.created_at.isoformat() if v.created_at else None,
-                }
-                for v in patient.visits.all()[:10]  # Limit to recent visits
-            ],
-            "medications": [
-                {
-                    "drug_name": m.drug_name,
-                    "dosage": m.dosage,
-                    "duration": m.duration,
-                }
-                for m in patient.medications.all()[:10]
-            ],
-        }
-    
+
+    snapshot = getattr(patient, "snapshot", None)
+    if snapshot is None or (snapshot.record is None and patient.ipfs_hash):
+        # No snapshot yet, or the creation record is not fetched yet
+        record = None
+        if patient.ipfs_hash:
+            try:
+                key = await sync_to_async(get_data_key)(patient.health_id, create=False)
+                record = await async_ipfs_service.fetch_from_ipfs(patient.ipfs_hash, key=key)
+            except Exception as e:
+                print(f"Error fetching from IPFS: {e}")
+        if snapshot is None or record:
+            snapshot = await sync_to_async(refresh_patient_snapshot)(patient, record)
+
     return {
         "patient_id": patient.id,
         "health_id": patient.health_id,
         "full_name": patient.user.full_name or patient.user.username,
-        "record_data": record_data,
+        "record_data": snapshot.record_data,
         "ipfs_hash": patient.ipfs_hash,
         "cardano_tx_hash": patient.cardano_tx_hash,
         "cardano_record_hash": patient.cardano_record_hash,
+        "cardano_merkle_proof": patient.cardano_merkle_proof,
     }
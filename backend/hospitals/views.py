@@ -78,7 +78,7 @@ def get_hospital_patient_records(request):
     
     # Also include patients without visits
     for patient in patients:
-        if not visits.filter(patient=patient).exists():
+        if not patient.visits_count:
             result.append({
                 "id": patient.id,
                 "patient_id": patient.id,
@@ -108,13 +108,13 @@ def get_hospital_stats(request):
     doctors = DoctorProfile.objects.all()
     doctor_ids = [d.id for d in doctors]
     
-    # Count patients created by these doctors
-    total_patients = PatientProfile.objects.filter(created_by_doctor_id__in=doctor_ids).count()
-    
-    # Count visits
-    patients = list(PatientProfile.objects.filter(created_by_doctor_id__in=doctor_ids))
-    patient_ids = [p.id for p in patients]
-    total_visits = Visit.objects.filter(patient_id__in=patient_ids).count()
+    # Count patients created by these doctors and their visits (from the
+    # per-patient counters)
+    totals = PatientProfile.objects.filter(created_by_doctor_id__in=doctor_ids).aggregate(
+        patients=Count("id"), visits=Sum("visits_count")
+    )
+    total_patients = totals["patients"]
+    total_visits = totals["visits"] or 0
     
     # Sum care points
     total_care_points = sum([d.care_points_balance or 0 for d in doctors])
@@ -0,0 +1,123 @@
+"""
+Merkle-batched record anchoring
+Folds pending record hashes into AnchorBatch rows so the chain sees one
+transaction per batch instead of one per record (CARDANO_ANCHOR_MODE=batch).
+"""
+from datetime import timedelta
+from typing import List, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AnchorBatch
+from .merkle import merkle_leaf, build_merkle_tree
+from .outbox import enqueue_anchor_batch
+from .cardano_config import (
+    CARDANO_ANCHOR_BATCH_SIZE,
+    CARDANO_ANCHOR_BATCH_MAX_WAIT,
+    CARDANO_ANCHOR_ISSUER_ID,
+)
+
+
+class BatchConflict(Exception):
+    """Another worker sealed one of the records first"""
+
+
+def pending_anchor_records():
+    """
+    Patients whose record hash is not yet anchored or queued for anchoring
+    """
+    from patients.models import PatientProfile
+    return PatientProfile.objects.filter(
+        cardano_record_hash__isnull=False,
+        cardano_tx_hash__isnull=True,
+        anchor_batch__isnull=True,
+        cardano_outbox_entries__isnull=True,
+    ).order_by("id")
+
+
+def open_anchor_batch(
+    records: List[Tuple[str, str]],
+    issuer_id: str = CARDANO_ANCHOR_ISSUER_ID,
+) -> Tuple[AnchorBatch, list]:
+    """
+    Create an AnchorBatch over (health_id, record_hash) pairs and queue its
+    root on the Cardano outbox. Call inside a transaction; the caller stores
+    each proof on its PatientProfile.
+
+    Returns:
+        (batch, inclusion proofs in the order of records)
+    """
+    leaves = [merkle_leaf(health_id, record_hash) for health_id, record_hash in records]
+    merkle_root, proofs = build_merkle_tree(leaves)
+    batch = AnchorBatch.objects.create(
+        merkle_root=merkle_root,
+        record_count=len(leaves),
+        issuer_id=issuer_id,
+    )
+    enqueue_anchor_batch(batch)
+    return batch, proofs
+
+
+def seal_anchor_batch(patients, issuer_id: str = CARDANO_ANCHOR_ISSUER_ID) -> AnchorBatch:
+    """
+    Build a Merkle tree over the patients' record hashes, store each inclusion
+    proof on its PatientProfile and queue the root on the Cardano outbox
+
+    Args:
+        patients: PatientProfile rows with cardano_record_hash set
+        issuer_id: Public key hash signing the anchor transaction
+
+    Returns:
+        The new AnchorBatch
+    """
+    from patients.models import PatientProfile
+
+    with transaction.atomic():
+        batch, proofs = open_anchor_batch([(p.health_id, p.cardano_record_hash) for p in patients], issuer_id)
+        for patient, proof in zip(patients, proofs):
+            updated = PatientProfile.objects.filter(
+                id=patient.id,
+                anchor_batch__isnull=True,
+            ).update(anchor_batch=batch, cardano_merkle_proof=proof)
+            if not updated:
+                raise BatchConflict(f"Patient {patient.health_id} already belongs to a batch")
+    return batch
+
+
+def anchor_pending_records(
+    batch_size: int = CARDANO_ANCHOR_BATCH_SIZE,
+    max_wait: int = CARDANO_ANCHOR_BATCH_MAX_WAIT,
+    force: bool = False,
+) -> List[AnchorBatch]:
+    """
+    Seal every full batch of pending records, plus a final partial batch once
+    its oldest record has waited max_wait seconds (or immediately with force)
+
+    Returns:
+        Batches sealed during this call
+    """
+    batches = []
+    while True:
+        pending = list(
+            pending_anchor_records().select_related("user").only(
+                "id", "health_id", "cardano_record_hash", "user__date_joined"
+            )[:batch_size]
+        )
+        if not pending:
+            break
+
+        if len(pending) < batch_size and not force:
+            oldest = min(p.user.date_joined for p in pending)
+            if timezone.now() - oldest < timedelta(seconds=max_wait):
+                break
+
+        try:
+            batches.append(seal_anchor_batch(pending))
+        except BatchConflict as e:
+            print(f"Skipping anchor batch: {e}")
+            continue
+
+        if len(pending) < batch_size:
+            break
+    return batches
@@ -0,0 +1,26 @@
+from django.apps import AppConfig
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+
+
+def check_encryption_key(app_configs, **kwargs):
+    """
+    Deployment check (manage.py check --deploy): patient records are always
+    encrypted before they go to IPFS, so a missing or invalid
+    IPFS_ENCRYPTION_KEY is an error, with DEBUG too
+    """
+    from .cardano_config import IPFS_ENCRYPTION_KEY
+    from .encryption import parse_master_key
+
+    try:
+        parse_master_key(IPFS_ENCRYPTION_KEY)
+    except ImproperlyConfigured as e:
+        return [checks.Error(str(e), id="integration.E001")]
+    return []
+
+
+class IntegrationConfig(AppConfig):
+    name = 'integration'
+
+    def ready(self):
+        checks.register(check_encryption_key, checks.Tags.security, deploy=True)
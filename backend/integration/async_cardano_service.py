@@ -0,0 +1,194 @@
+"""
+Async Cardano Service
+asyncio counterparts of the request-path functions in cardano_service, built
+on the shared async HTTP client so one ASGI worker can keep many chain calls
+in flight. Payloads, checks and mock fallbacks are shared with the sync module.
+"""
+from typing import Optional, Dict, Any, List
+
+import httpx
+from asgiref.sync import sync_to_async
+
+from .cardano_config import (
+    CAREPOINTS_POLICY_HASH,
+    CARDANO_SERVICE_URL,
+    CARDANO_SERVICE_CONNECT_TIMEOUT,
+    CARDANO_SERVICE_TIMEOUT,
+    CARDANO_ALLOW_MOCK,
+)
+from .cardano_service import (
+    _idempotency_headers,
+    _record_submission,
+    _unsubmitted_record_result,
+    _indexed_result,
+    _unanchored_result,
+    _mint_request,
+    _unminted_result,
+    _care_points_quantity,
+    check_anchor_metadata,
+    record_service_response,
+)
+from .async_http import get_async_client
+from .blockfrost_client import get_blockfrost_client
+from .circuit_breaker import cardano_service_breaker
+from .tx_cache import alookup_transaction
+from .indexer import find_anchored_record
+
+
+async def _post_to_service(
+    path: str,
+    body: Dict[str, Any],
+    idempotency_key: Optional[str],
+) -> Optional[httpx.Response]:
+    """
+    Async counterpart of cardano_service._post_to_service (same circuit breaker)
+    """
+    if not cardano_service_breaker.allow_request():
+        return None
+    try:
+        response = await get_async_client().post(
+            f"{CARDANO_SERVICE_URL}{path}",
+            json=body,
+            headers=_idempotency_headers(idempotency_key),
+            timeout=httpx.Timeout(CARDANO_SERVICE_TIMEOUT, connect=CARDANO_SERVICE_CONNECT_TIMEOUT)
+        )
+    except httpx.RequestError:
+        cardano_service_breaker.record_failure()
+        return None
+    record_service_response(response.status_code)
+    return response
+
+
+async def submit_record_to_cardano(
+    record_data: Dict[str, Any],
+    issuer_id: str,
+    patient_id: str,
+    doctor_address: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+    allow_mock: bool = CARDANO_ALLOW_MOCK,
+) -> Optional[Dict[str, Any]]:
+    """
+    Async counterpart of cardano_service.submit_record_to_cardano
+
+    Returns:
+        Dictionary with record_hash and tx_hash if successful, None otherwise
+    """
+    try:
+        record_hash, datum, body = _record_submission(
+            record_data, issuer_id, patient_id, doctor_address, idempotency_key
+        )
+
+        response = await _post_to_service("/submitRecord", body, idempotency_key)
+        if response is not None and response.status_code == 200:
+            result = response.json()
+            return {
+                "record_hash": record_hash,
+                "tx_hash": result.get("tx_hash"),
+                "datum": datum,
+            }
+        # If service is not available, fall through to mock mode
+
+        return _unsubmitted_record_result(record_hash, issuer_id, patient_id, datum, allow_mock)
+
+    except Exception as e:
+        print(f"Error submitting record to Cardano: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+async def verify_record_hash(
+    record_hash: str,
+    patient_id: str,
+    tx_hash: Optional[str] = None,
+    merkle_proof: Optional[List[Dict[str, str]]] = None,
+    allow_mock: bool = CARDANO_ALLOW_MOCK,
+) -> Optional[Dict[str, Any]]:
+    """
+    Async counterpart of cardano_service.verify_record_hash
+
+    On a cache miss the transaction and its metadata are fetched concurrently.
+
+    Returns:
+        Verification result with record data if verified, None otherwise
+    """
+    try:
+        if tx_hash:
+            cached = await alookup_transaction(tx_hash)
+            record_metadata = cached["metadata"] if cached else None
+            if record_metadata:
+                return check_anchor_metadata(record_metadata, record_hash, patient_id, tx_hash, merkle_proof)
+
+        if not tx_hash:
+            anchored = await sync_to_async(find_anchored_record)(record_hash, patient_id, merkle_proof)
+            if anchored:
+                return _indexed_result(anchored, record_hash, patient_id)
+
+        return _unanchored_result(record_hash, patient_id, tx_hash, allow_mock)
+
+    except Exception as e:
+        print(f"Error verifying record hash: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+async def mint_care_points(
+    address: str,
+    amount: int,
+    owner_pubkey_hash: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+    allow_mock: bool = CARDANO_ALLOW_MOCK,
+) -> Optional[Dict[str, Any]]:
+    """
+    Async counterpart of cardano_service.mint_care_points
+
+    Returns:
+        Dictionary with tx_hash and policy_id if successful, None otherwise
+    """
+    try:
+        body = _mint_request(address, amount, owner_pubkey_hash, idempotency_key)
+        if body is None:
+            return None
+
+        response = await _post_to_service("/mintCarePoints", body, idempotency_key)
+        if response is not None and response.status_code == 200:
+            result = response.json()
+            return {
+                "tx_hash": result.get("tx_hash"),
+                "policy_id": CAREPOINTS_POLICY_HASH,
+                "amount": amount,
+                "address": address,
+            }
+
+        return _unminted_result(address, amount, allow_mock)
+
+    except Exception as e:
+        print(f"Error minting CarePoints: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+async def get_care_points_balance(address: str) -> int:
+    """
+    Async counterpart of cardano_service.get_care_points_balance
+
+    Returns:
+        Balance as integer, 0 if error or not found
+    """
+    try:
+        response = await get_blockfrost_client().aget(
+            f"/addresses/{address}",
+            endpoint="/addresses/{address}",
+        )
+        if response.status_code == 200:
+            return _care_points_quantity(response.json()) or 0
+        return 0
+
+    except httpx.RequestError as e:
+        print(f"Error querying Blockfrost API for balance: {e}")
+        return 0
+    except Exception as e:
+        print(f"Error getting CarePoints balance: {e}")
+        return 0
@@ -0,0 +1,40 @@
+"""
+Shared async HTTP client
+One httpx.AsyncClient per event loop, so all coroutines in an ASGI worker
+share one keep-alive connection pool for Cardano, Blockfrost and IPFS calls
+"""
+import asyncio
+import weakref
+
+import httpx
+
+from .cardano_config import ASYNC_HTTP_MAX_CONNECTIONS, ASYNC_HTTP_MAX_KEEPALIVE
+
+# httpx clients are bound to the loop they were first used on
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Client for the running event loop, created on first use
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=ASYNC_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=ASYNC_HTTP_MAX_KEEPALIVE,
+            ),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_async_client():
+    """
+    Close the running loop's client (e.g. on ASGI lifespan shutdown)
+    """
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
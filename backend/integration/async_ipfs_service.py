@@ -0,0 +1,65 @@
+"""
+Async IPFS Service
+asyncio counterparts of ipfs_service on the shared async HTTP client
+"""
+import asyncio
+from typing import Dict, Any, Optional
+
+import httpx
+from asgiref.sync import sync_to_async
+
+from .cid import compute_cid
+from .models import IPFSPin
+from .ipfs_client import get_ipfs_client, IPFSError
+from .ipfs_cache import get_cid_cache
+from .ipfs_service import seal_record, open_record, _mark_pinned, _queue_pins, _accept_fetched
+
+
+async def upload_to_ipfs(data: Dict[str, Any], encrypt: bool = True, key: Optional[bytes] = None) -> Optional[str]:
+    """
+    Async counterpart of ipfs_service.upload_to_ipfs
+
+    Returns:
+        IPFS hash (CID) if successful, None otherwise
+    """
+    try:
+        if encrypt and key is None:
+            raise ValueError("encrypt=True needs the patient's data key")
+        content = seal_record(data, key if encrypt else None)
+        cid = compute_cid(content)
+        if await IPFSPin.objects.filter(cid=cid, status=IPFSPin.STATUS_PINNED).aexists():
+            return cid
+
+        try:
+            node_cid = await get_ipfs_client().aadd(content, name=cid)
+        except (httpx.RequestError, IPFSError, ValueError) as e:
+            print(f"IPFS node unavailable, queued {cid} for pinning: {e}")
+            await sync_to_async(_queue_pins)([(cid, content)], str(e) or e.__class__.__name__)
+            return cid
+
+        await sync_to_async(_mark_pinned)([(cid, content)], {cid: node_cid})
+        await asyncio.to_thread(get_cid_cache().put, cid, content)
+        return cid
+    except Exception as e:
+        print(f"Error uploading to IPFS: {e}")
+        return None
+
+async def fetch_from_ipfs(ipfs_hash: str, key: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+    """
+    Async counterpart of ipfs_service.fetch_from_ipfs (same CID cache)
+
+    Returns:
+        Patient record data dictionary if successful, None otherwise
+    """
+    try:
+        cache = get_cid_cache()
+        content = await asyncio.to_thread(cache.get, ipfs_hash)
+        if content is None:
+            fetched = await get_ipfs_client().acat(ipfs_hash)
+            content = await asyncio.to_thread(_accept_fetched, ipfs_hash, fetched)
+        if content is not None:
+            return open_record(content, key)
+        return None
+    except Exception as e:
+        print(f"Error fetching from IPFS: {e}")
+        return None
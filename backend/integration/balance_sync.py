@@ -0,0 +1,68 @@
+"""
+CarePoints Balance Sync
+Refreshes DoctorProfile.care_points_balance from Cardano in the background so
+GET /doctor/care-points/ only reads local state.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from django.db.models import F
+from django.utils import timezone
+
+from .cardano_service import get_care_points_balance
+from .cardano_config import CAREPOINTS_SYNC_BATCH_SIZE, CAREPOINTS_SYNC_CONCURRENCY
+
+
+def doctors_to_sync():
+    """
+    Doctors with a cardano_address, least recently synced first
+    """
+    from doctors.models import DoctorProfile
+    return DoctorProfile.objects.filter(
+        cardano_address__isnull=False,
+    ).exclude(cardano_address="").order_by(
+        F("care_points_synced_at").asc(nulls_first=True), "id"
+    )
+
+
+def sync_care_points_balances(
+    batch_size: int = CAREPOINTS_SYNC_BATCH_SIZE,
+    concurrency: int = CAREPOINTS_SYNC_CONCURRENCY,
+) -> Dict[str, int]:
+    """
+    Query every doctor's balance, at most `concurrency` Blockfrost lookups at a
+    time, and write results back one batch at a time. Only changed balances
+    are written, each guarded on the value read, so concurrent awards are kept.
+
+    As before, a zero balance from the chain never overwrites the local one:
+    points earned locally may not have been minted yet.
+
+    Returns:
+        {"synced": doctors checked, "updated": balances changed}
+    """
+    from doctors.models import DoctorProfile
+
+    doctors = list(doctors_to_sync().only("id", "cardano_address", "care_points_balance"))
+    totals = {"synced": 0, "updated": 0}
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="carepoints-sync") as executor:
+        for start in range(0, len(doctors), batch_size):
+            batch = doctors[start:start + batch_size]
+            # Worker threads only talk to Blockfrost; all DB writes stay on this thread
+            balances = list(executor.map(get_care_points_balance, [doctor.cardano_address for doctor in batch]))
+
+            synced_at = timezone.now()
+            DoctorProfile.objects.filter(id__in=[doctor.id for doctor in batch]).update(
+                care_points_synced_at=synced_at
+            )
+            for doctor, balance in zip(batch, balances):
+                if balance > 0 and balance != doctor.care_points_balance:
+                    # Guarded on the balance read above, so points awarded
+                    # meanwhile are not overwritten; the next sync catches up
+                    totals["updated"] += DoctorProfile.objects.filter(
+                        id=doctor.id,
+                        care_points_balance=doctor.care_points_balance,
+                    ).update(care_points_balance=balance)
+            totals["synced"] += len(batch)
+
+    return totals
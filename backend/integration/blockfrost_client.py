@@ -0,0 +1,255 @@
+"""
+Blockfrost Client
+Shared keep-alive session, token-bucket rate limiting, retries and latency
+counters for every Blockfrost call made by integration.cardano_service and
+integration.async_cardano_service
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Optional, Dict, Any
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from .async_http import get_async_client
+
+from .cardano_config import (
+    get_blockfrost_url,
+    BLOCKFROST_API_KEY,
+    BLOCKFROST_RATE_LIMIT,
+    BLOCKFROST_BURST,
+    BLOCKFROST_POOL_SIZE,
+    BLOCKFROST_MAX_RETRIES,
+    BLOCKFROST_TIMEOUT,
+    BLOCKFROST_MAX_RETRY_AFTER,
+)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: refills at `rate` tokens per second up to `capacity`
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Take a token if one is available; otherwise return seconds to wait"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) for a token, then take it"""
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class BlockfrostClient:
+    """
+    Pooled Blockfrost API client
+
+    Args:
+        base_url: Blockfrost-compatible API root (defaults to get_blockfrost_url())
+        api_key: Blockfrost project id
+        rate: Sustained requests per second allowed by the plan
+        burst: Bucket size (requests allowed back to back)
+        pool_size: Keep-alive connections kept open
+        max_retries: Retries for 429/5xx responses and connection errors
+        timeout: Per-request timeout in seconds
+        max_retry_after: Longest Retry-After (seconds) honoured before a retry
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        rate: float = BLOCKFROST_RATE_LIMIT,
+        burst: int = BLOCKFROST_BURST,
+        pool_size: int = BLOCKFROST_POOL_SIZE,
+        max_retries: int = BLOCKFROST_MAX_RETRIES,
+        timeout: float = BLOCKFROST_TIMEOUT,
+        max_retry_after: float = BLOCKFROST_MAX_RETRY_AFTER,
+    ):
+        self.base_url = (base_url or get_blockfrost_url()).rstrip("/")
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.max_retry_after = max_retry_after
+        self.limiter = TokenBucket(rate, burst)
+
+        self.headers = {"project_id": api_key or BLOCKFROST_API_KEY}
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+
+    def _record(self, endpoint: str, elapsed: float, error: bool, retried: bool):
+        with self._stats_lock:
+            stats = self._stats.setdefault(
+                endpoint,
+                {"count": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0},
+            )
+            stats["count"] += 1
+            stats["errors"] += int(error)
+            stats["retries"] += int(retried)
+            elapsed_ms = elapsed * 1000
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def _backoff(self, attempt: int, response=None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.max_retry_after)
+        return random.uniform(0, min(8.0, 0.25 * (2 ** attempt)))
+
+    def get(self, path: str, endpoint: Optional[str] = None, **kwargs) -> requests.Response:
+        """
+        GET a Blockfrost path, e.g. client.get(f"/txs/{tx_hash}", endpoint="/txs/{hash}")
+
+        Retries 429/5xx and connection errors with jittered exponential backoff
+        (honouring Retry-After up to max_retry_after). After the last retry the final response is
+        returned, or the connection error re-raised.
+
+        Args:
+            path: Path below the API root
+            endpoint: Label for latency counters (defaults to path)
+        """
+        endpoint = endpoint or path
+        kwargs.setdefault("timeout", self.timeout)
+        url = f"{self.base_url}{path}"
+
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            started = time.monotonic()
+            try:
+                response = self.session.get(url, **kwargs)
+            except requests.exceptions.RequestException:
+                retry = attempt < self.max_retries
+                self._record(endpoint, time.monotonic() - started, error=True, retried=retry)
+                if not retry:
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            retry = response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries
+            self._record(
+                endpoint,
+                time.monotonic() - started,
+                error=response.status_code >= 400 and response.status_code != 404,
+                retried=retry,
+            )
+            if not retry:
+                return response
+            time.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    async def aget(self, path: str, endpoint: Optional[str] = None, **kwargs) -> httpx.Response:
+        """
+        Async counterpart of get() on the shared async HTTP client.
+        Shares the rate limiter and latency counters with get().
+        """
+        endpoint = endpoint or path
+        kwargs.setdefault("timeout", self.timeout)
+        headers = {**self.headers, **kwargs.pop("headers", {})}
+        url = f"{self.base_url}{path}"
+        client = get_async_client()
+
+        attempt = 0
+        while True:
+            await self.limiter.acquire_async()
+            started = time.monotonic()
+            try:
+                response = await client.get(url, headers=headers, **kwargs)
+            except httpx.TransportError:
+                retry = attempt < self.max_retries
+                self._record(endpoint, time.monotonic() - started, error=True, retried=retry)
+                if not retry:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            retry = response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries
+            self._record(
+                endpoint,
+                time.monotonic() - started,
+                error=response.status_code >= 400 and response.status_code != 404,
+                retried=retry,
+            )
+            if not retry:
+                return response
+            await asyncio.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-endpoint counters: count, errors, retries, avg_ms and max_ms
+        """
+        with self._stats_lock:
+            return {
+                endpoint: {
+                    "count": int(stats["count"]),
+                    "errors": int(stats["errors"]),
+                    "retries": int(stats["retries"]),
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 2) if stats["count"] else 0.0,
+                    "max_ms": round(stats["max_ms"], 2),
+                }
+                for endpoint, stats in self._stats.items()
+            }
+
+
+_client: Optional[BlockfrostClient] = None
+_client_lock = threading.Lock()
+
+
+def get_blockfrost_client() -> BlockfrostClient:
+    """
+    Process-wide client shared by all Blockfrost calls
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = BlockfrostClient()
+    return _client
+
+
+def set_blockfrost_client(client: Optional[BlockfrostClient]):
+    """
+    Replace the shared client (e.g. to point at a local stub server)
+    """
+    global _client
+    with _client_lock:
+        _client = client
@@ -0,0 +1,78 @@
+"""
+Bulk Record Verification
+Verifies many (record_hash, patient_id, tx_hash) tuples at once: each distinct
+transaction is looked up once, with bounded concurrency, and results are
+yielded as soon as they are known.
+"""
+import asyncio
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Any, List, Tuple
+
+from asgiref.sync import sync_to_async
+
+from .cardano_config import CARDANO_ALLOW_MOCK, CARDANO_BULK_VERIFY_CONCURRENCY
+from .cardano_service import check_anchor_metadata, _indexed_result, _unanchored_result
+from .indexer import find_anchored_records
+from .tx_cache import alookup_transaction, warm_transactions
+
+
+async def verify_records_bulk(
+    items: List[Dict[str, Any]],
+    concurrency: int = CARDANO_BULK_VERIFY_CONCURRENCY,
+    allow_mock: bool = CARDANO_ALLOW_MOCK,
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Verify records in bulk
+
+    Records without a tx_hash are resolved from the label-674 index first;
+    the rest follow transaction by transaction as lookups complete.
+
+    Args:
+        items: Dicts with record_hash, patient_id and optional tx_hash / merkle_proof
+        concurrency: Transaction lookups in flight at once
+        allow_mock: Flag records anchored with a mock transaction as mock
+
+    Yields:
+        (index into items, verification result), in completion order
+    """
+    by_tx: Dict[str, List[int]] = defaultdict(list)
+    hash_only: List[int] = []
+    for index, item in enumerate(items):
+        if item.get("tx_hash"):
+            by_tx[item["tx_hash"]].append(index)
+        else:
+            hash_only.append(index)
+
+    if hash_only:
+        anchored = await sync_to_async(find_anchored_records)([
+            (items[index]["record_hash"], items[index]["patient_id"], items[index].get("merkle_proof"))
+            for index in hash_only
+        ])
+        for position, index in enumerate(hash_only):
+            item = items[index]
+            if position in anchored:
+                yield index, _indexed_result(anchored[position], item["record_hash"], item["patient_id"])
+            else:
+                yield index, _unanchored_result(item["record_hash"], item["patient_id"], None, allow_mock)
+
+    if not by_tx:
+        return
+
+    await sync_to_async(warm_transactions)(list(by_tx))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def lookup(tx_hash: str):
+        async with semaphore:
+            return tx_hash, await alookup_transaction(tx_hash)
+
+    for completed in asyncio.as_completed([lookup(tx_hash) for tx_hash in by_tx]):
+        tx_hash, cached = await completed
+        record_metadata = cached["metadata"] if cached else None
+        for index in by_tx[tx_hash]:
+            item = items[index]
+            if record_metadata:
+                yield index, check_anchor_metadata(
+                    record_metadata, item["record_hash"], item["patient_id"], tx_hash, item.get("merkle_proof")
+                )
+            else:
+                yield index, _unanchored_result(item["record_hash"], item["patient_id"], tx_hash, allow_mock)
@@ -18,8 +18,21 @@ BLOCKFROST_API_KEY = os.getenv(
     "preprodBLXYKdWSTsopaLm2VNtPFCxzQCEGntEk"  # Default testnet key
 )
 
+# Explicit Blockfrost-compatible endpoint (e.g. a local stub); overrides the network default
+BLOCKFROST_URL = os.getenv("BLOCKFROST_URL", "")
+
+# Blockfrost client pool and rate limit (free plan: 10 req/s, burst of 500)
+BLOCKFROST_RATE_LIMIT = float(os.getenv("BLOCKFROST_RATE_LIMIT", "10"))  # requests per second
+BLOCKFROST_BURST = int(os.getenv("BLOCKFROST_BURST", "500"))
+BLOCKFROST_POOL_SIZE = int(os.getenv("BLOCKFROST_POOL_SIZE", "10"))
+BLOCKFROST_MAX_RETRIES = int(os.getenv("BLOCKFROST_MAX_RETRIES", "3"))
+BLOCKFROST_TIMEOUT = float(os.getenv("BLOCKFROST_TIMEOUT", "30"))  # seconds
+BLOCKFROST_MAX_RETRY_AFTER = float(os.getenv("BLOCKFROST_MAX_RETRY_AFTER", "10"))  # seconds; longer Retry-After values are clamped
+
 def get_blockfrost_url():
     """Get Blockfrost URL based on network"""
+    if BLOCKFROST_URL:
+        return BLOCKFROST_URL.rstrip("/")
     if CARDANO_NETWORK == "mainnet":
         return BLOCKFROST_MAINNET_URL
     elif CARDANO_NETWORK == "preview":
@@ -37,12 +50,95 @@ MIN_ADA_UTXO = 2_000_000  # 2 ADA in lovelace
 # Cardano Service URL (for transaction submission)
 # This can be a separate service or use pycardano directly
 CARDANO_SERVICE_URL = os.getenv("CARDANO_SERVICE_URL", "http://127.0.0.1:3000")
+CARDANO_SERVICE_CONNECT_TIMEOUT = float(os.getenv("CARDANO_SERVICE_CONNECT_TIMEOUT", "3"))  # seconds
+CARDANO_SERVICE_TIMEOUT = float(os.getenv("CARDANO_SERVICE_TIMEOUT", "60"))  # seconds
+
+# Circuit breaker for CARDANO_SERVICE_URL (see integration/circuit_breaker.py):
+# opens after this many consecutive failures, probes again after the reset timeout
+CARDANO_SERVICE_FAILURE_THRESHOLD = int(os.getenv("CARDANO_SERVICE_FAILURE_THRESHOLD", "5"))
+CARDANO_SERVICE_RESET_TIMEOUT = float(os.getenv("CARDANO_SERVICE_RESET_TIMEOUT", "30"))  # seconds
 
 # Payment key and address (for signing transactions)
 # In production, these should be stored securely
 PAYMENT_KEY_PATH = os.getenv("CARDANO_PAYMENT_KEY_PATH", "smart-contracts/payment.vkey")
 PAYMENT_ADDRESS = os.getenv("CARDANO_PAYMENT_ADDRESS", "")
 
+# Allow the hash-derived mock fallback when the Cardano service is unreachable.
+# Disable in production so the outbox worker retries instead of recording fakes.
+CARDANO_ALLOW_MOCK = os.getenv("CARDANO_ALLOW_MOCK", "true").lower() in ("1", "true", "yes")
+
+# Outbox worker configuration (see integration/outbox.py)
+CARDANO_OUTBOX_MAX_ATTEMPTS = int(os.getenv("CARDANO_OUTBOX_MAX_ATTEMPTS", "8"))
+CARDANO_OUTBOX_BACKOFF_BASE = float(os.getenv("CARDANO_OUTBOX_BACKOFF_BASE", "5"))  # seconds
+CARDANO_OUTBOX_BACKOFF_MAX = float(os.getenv("CARDANO_OUTBOX_BACKOFF_MAX", "3600"))  # seconds
+CARDANO_OUTBOX_LEASE_SECONDS = int(os.getenv("CARDANO_OUTBOX_LEASE_SECONDS", "300"))
+# /api/integration/health/ reports "degraded" once a due entry has waited this long
+CARDANO_OUTBOX_MAX_LAG = int(os.getenv("CARDANO_OUTBOX_MAX_LAG", "600"))  # seconds
+# ... or while an entry has failed for good within this window
+CARDANO_OUTBOX_FAILED_WINDOW = int(os.getenv("CARDANO_OUTBOX_FAILED_WINDOW", "3600"))  # seconds
+
+# Record anchoring mode: "single" submits one transaction per record,
+# "batch" anchors the Merkle root of up to CARDANO_ANCHOR_BATCH_SIZE records
+CARDANO_ANCHOR_MODE = os.getenv("CARDANO_ANCHOR_MODE", "single")
+CARDANO_ANCHOR_BATCH_SIZE = int(os.getenv("CARDANO_ANCHOR_BATCH_SIZE", "256"))
+CARDANO_ANCHOR_BATCH_MAX_WAIT = int(os.getenv("CARDANO_ANCHOR_BATCH_MAX_WAIT", "300"))  # seconds
+CARDANO_ANCHOR_ISSUER_ID = os.getenv(
+    "CARDANO_ANCHOR_ISSUER_ID",
+    "08ee30a2e0e28b3eaf109642374971c5aa4675f5a0ff71dc8d5988ae"  # Default from policy
+)
+
+# CarePoints minting mode: "single" mints per CarePointsTransaction,
+# "batch" aggregates pending rows into one multi-output mint per window
+CARDANO_MINT_MODE = os.getenv("CARDANO_MINT_MODE", "single")
+CARDANO_MINT_WINDOW = int(os.getenv("CARDANO_MINT_WINDOW", "900"))  # seconds
+# When batch mode was enabled (ISO 8601). Only rows created since then are
+# batched, so enabling it does not mint every historical unminted row.
+CARDANO_MINT_BATCH_SINCE = os.getenv("CARDANO_MINT_BATCH_SINCE", "")
+
+# Per-transaction mint cap enforced by carepoints_policy.ak
+CAREPOINTS_MAX_MINT = 100_000
+
+# First page (at the indexer's 100 items per page, ascending) of Blockfrost's
+# label-674 feed read by a fresh indexer cursor (see integration/indexer.py);
+# set it to a page just before the first anchor made with ANCHOR_VALIDATOR_HASH
+CARDANO_INDEXER_START_PAGE = int(os.getenv("CARDANO_INDEXER_START_PAGE", "1"))
+
+# Transaction lookup cache (see integration/tx_cache.py)
+CARDANO_CONFIRMATION_DEPTH = int(os.getenv("CARDANO_CONFIRMATION_DEPTH", "15"))  # blocks
+CARDANO_TX_CACHE_SIZE = int(os.getenv("CARDANO_TX_CACHE_SIZE", "10000"))  # in-memory entries
+CARDANO_TX_NEGATIVE_TTL = int(os.getenv("CARDANO_TX_NEGATIVE_TTL", "30"))  # seconds
+CARDANO_TX_UNCONFIRMED_TTL = int(os.getenv("CARDANO_TX_UNCONFIRMED_TTL", "20"))  # seconds
+
+# CarePoints balance sync (see integration/balance_sync.py)
+CAREPOINTS_SYNC_INTERVAL = int(os.getenv("CAREPOINTS_SYNC_INTERVAL", "300"))  # seconds
+CAREPOINTS_SYNC_BATCH_SIZE = int(os.getenv("CAREPOINTS_SYNC_BATCH_SIZE", "100"))
+CAREPOINTS_SYNC_CONCURRENCY = int(os.getenv("CAREPOINTS_SYNC_CONCURRENCY", "4"))
+
+# Shared async HTTP client (see integration/async_http.py)
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv("ASYNC_HTTP_MAX_CONNECTIONS", "200"))
+ASYNC_HTTP_MAX_KEEPALIVE = int(os.getenv("ASYNC_HTTP_MAX_KEEPALIVE", "50"))
+
+# Bulk record verification (see integration/bulk_verify.py)
+CARDANO_BULK_VERIFY_MAX_ITEMS = int(os.getenv("CARDANO_BULK_VERIFY_MAX_ITEMS", "5000"))
+CARDANO_BULK_VERIFY_CONCURRENCY = int(os.getenv("CARDANO_BULK_VERIFY_CONCURRENCY", "16"))
 
+# IPFS node and gateway (see integration/ipfs_client.py)
+IPFS_API_URL = os.getenv("IPFS_API_URL", "http://127.0.0.1:5001/api/v0")  # Local IPFS node API
+IPFS_GATEWAY = os.getenv("IPFS_GATEWAY", "https://ipfs.io/ipfs/")
+IPFS_POOL_SIZE = int(os.getenv("IPFS_POOL_SIZE", "10"))
+IPFS_MAX_RETRIES = int(os.getenv("IPFS_MAX_RETRIES", "2"))
+IPFS_TIMEOUT = float(os.getenv("IPFS_TIMEOUT", "10"))  # seconds
+IPFS_ADD_BATCH_SIZE = int(os.getenv("IPFS_ADD_BATCH_SIZE", "32"))  # small objects per /add call
+IPFS_PIN_MAX_ATTEMPTS = int(os.getenv("IPFS_PIN_MAX_ATTEMPTS", "8"))
+# Queue uploaded lab files for pinning (streamed to the node by process_ipfs_pin_queue)
+IPFS_PIN_LAB_FILES = os.getenv("IPFS_PIN_LAB_FILES", "false").lower() in ("1", "true", "yes")
 
+# Encryption of IPFS payloads (see integration/encryption.py)
+IPFS_ENCRYPTION_KEY = os.getenv("IPFS_ENCRYPTION_KEY", "")  # base64 32-byte master key; required, nothing is encrypted without it
+IPFS_ENCRYPTION_CHUNK_SIZE = int(os.getenv("IPFS_ENCRYPTION_CHUNK_SIZE", str(64 * 1024)))  # plaintext bytes per sealed chunk
 
+# Local cache of fetched IPFS content (see integration/ipfs_cache.py)
+IPFS_CACHE_DIR = os.getenv("IPFS_CACHE_DIR", str(settings.BASE_DIR / "ipfs_cache"))
+IPFS_CACHE_MAX_BYTES = int(os.getenv("IPFS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+IPFS_CACHE_MEMORY_ENTRIES = int(os.getenv("IPFS_CACHE_MEMORY_ENTRIES", "1024"))
+IPFS_CACHE_MEMORY_MAX_OBJECT = int(os.getenv("IPFS_CACHE_MEMORY_MAX_OBJECT", str(256 * 1024)))  # bytes
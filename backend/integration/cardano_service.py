@@ -3,24 +3,32 @@ Cardano Service for storing medical records and minting CarePoints tokens
 Integrates with Aiken smart contracts on Cardano blockchain
 """
 import requests
-import json
 import hashlib
 import time
 from typing import Optional, Dict, Any, List
 from .cardano_config import (
-    get_blockfrost_url,
-    BLOCKFROST_API_KEY,
     ANCHOR_VALIDATOR_HASH,
     CAREPOINTS_POLICY_HASH,
     MIN_ADA_UTXO,
     CARDANO_SERVICE_URL,
+    CARDANO_SERVICE_CONNECT_TIMEOUT,
+    CARDANO_SERVICE_TIMEOUT,
     CARDANO_NETWORK,
+    CARDANO_ALLOW_MOCK,
+    CAREPOINTS_MAX_MINT,
 )
+from .merkle import merkle_leaf, verify_merkle_proof
+from .record_hashing import hash_record
+from .circuit_breaker import cardano_service_breaker
+from .blockfrost_client import get_blockfrost_client
+from .tx_cache import lookup_transaction
+from .indexer import find_anchored_record
 
 
 def hash_record_data(record_data: Dict[str, Any]) -> str:
     """
-    Hash medical record data using SHA-256
+    Hash medical record data using SHA-256 over its canonical JSON
+    (see record_hashing)
     
     Args:
         record_data: Medical record data as dictionary
@@ -28,9 +36,7 @@ def hash_record_data(record_data: Dict[str, Any]) -> str:
     Returns:
         Hexadecimal hash string
     """
-    record_json = json.dumps(record_data, sort_keys=True, default=str)
-    hash_obj = hashlib.sha256(record_json.encode('utf-8'))
-    return hash_obj.hexdigest()
+    return hash_record(record_data)
 
 
 def create_datum(issuer_id: str, patient_id: str, record_hash: str, issued_at: Optional[int] = None) -> Dict[str, Any]:
@@ -73,11 +79,128 @@ def create_datum(issuer_id: str, patient_id: str, record_hash: str, issued_at: O
     }
 
 
+def _idempotency_headers(idempotency_key: Optional[str]) -> Optional[Dict[str, str]]:
+    return {"Idempotency-Key": idempotency_key} if idempotency_key else None
+
+
+def _post_to_service(
+    path: str,
+    body: Dict[str, Any],
+    idempotency_key: Optional[str],
+) -> Optional[requests.Response]:
+    """
+    POST to the Cardano service through the shared circuit breaker
+    
+    Returns:
+        The response, or None if the circuit is open or the service is unreachable
+    """
+    if not cardano_service_breaker.allow_request():
+        return None
+    try:
+        response = requests.post(
+            f"{CARDANO_SERVICE_URL}{path}",
+            json=body,
+            headers=_idempotency_headers(idempotency_key),
+            timeout=(CARDANO_SERVICE_CONNECT_TIMEOUT, CARDANO_SERVICE_TIMEOUT)
+        )
+    except requests.exceptions.RequestException:
+        cardano_service_breaker.record_failure()
+        return None
+    record_service_response(response.status_code)
+    return response
+
+
+def record_service_response(status_code: int):
+    """
+    Count 5xx answers as breaker failures; anything else means the service is up
+    """
+    if status_code >= 500:
+        cardano_service_breaker.record_failure()
+    else:
+        cardano_service_breaker.record_success()
+
+
+def _record_submission(
+    record_data: Dict[str, Any],
+    issuer_id: str,
+    patient_id: str,
+    doctor_address: Optional[str],
+    idempotency_key: Optional[str],
+):
+    """
+    Hash, datum and /submitRecord request body for a record
+
+    Returns:
+        (record_hash, datum, body)
+    """
+    # Step 1: Hash the record data
+    record_hash = hash_record_data(record_data)
+    
+    # Step 2: Create datum matching Aiken contract
+    datum = create_datum(issuer_id, patient_id, record_hash)
+    
+    # Step 3: Create transaction metadata (CIP-20, label 674)
+    metadata = {
+        "anchor_validator": ANCHOR_VALIDATOR_HASH,
+        "issuer_id": issuer_id,
+        "patient_id": patient_id,
+        "record_hash": record_hash,
+        "issued_at": datum["fields"][3],
+        "datum": datum,
+    }
+    
+    body = {
+        "record_data": record_data,
+        "issuer_id": issuer_id,
+        "patient_id": patient_id,
+        "record_hash": record_hash,
+        "datum": datum,
+        "metadata": metadata,
+        "doctor_address": doctor_address,
+        "idempotency_key": idempotency_key,
+    }
+    return record_hash, datum, body
+
+
+def _unsubmitted_record_result(
+    record_hash: str,
+    issuer_id: str,
+    patient_id: str,
+    datum: Dict[str, Any],
+    allow_mock: bool,
+) -> Optional[Dict[str, Any]]:
+    """
+    Result when the Cardano service did not accept the record: None, or a
+    mock transaction in development
+    """
+    if not allow_mock:
+        print(f"Cardano service unavailable, record {record_hash} not submitted")
+        return None
+    
+    # Option 2: Mock mode for development (when Cardano service is not running)
+    print(f"[MOCK MODE] Submitting record to Cardano (service unavailable)")
+    print(f"Record hash: {record_hash}")
+    print(f"Issuer ID: {issuer_id}")
+    print(f"Patient ID: {patient_id}")
+    
+    # Generate mock transaction hash
+    mock_tx_hash = f"mock_tx_{hashlib.sha256(f'{record_hash}{issuer_id}{patient_id}'.encode()).hexdigest()[:16]}"
+    
+    return {
+        "record_hash": record_hash,
+        "tx_hash": mock_tx_hash,
+        "datum": datum,
+        "mock": True,  # Flag to indicate this is a mock transaction
+    }
+
+
 def submit_record_to_cardano(
     record_data: Dict[str, Any],
     issuer_id: str,
     patient_id: str,
-    doctor_address: Optional[str] = None
+    doctor_address: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+    allow_mock: bool = CARDANO_ALLOW_MOCK,
 ) -> Optional[Dict[str, Any]]:
     """
     Submit medical record to Cardano blockchain using anchor validator
@@ -87,159 +210,242 @@ def submit_record_to_cardano(
         issuer_id: Doctor's public key hash (hex string)
         patient_id: Patient ID string
         doctor_address: Doctor's Cardano wallet address (optional)
+        idempotency_key: Key forwarded to the Cardano service so retried
+                         submissions are not anchored twice
+        allow_mock: Fall back to a mock transaction if the service is down
     
     Returns:
         Dictionary with record_hash and tx_hash if successful, None otherwise
     """
     try:
-        # Step 1: Hash the record data
-        record_hash = hash_record_data(record_data)
+        record_hash, datum, body = _record_submission(
+            record_data, issuer_id, patient_id, doctor_address, idempotency_key
+        )
         
-        # Step 2: Create datum matching Aiken contract
-        datum = create_datum(issuer_id, patient_id, record_hash)
+        # Step 4: Submit to Cardano service or blockchain
+        # Option 1: Use Cardano service (Node.js service with Mesh SDK)
+        response = _post_to_service("/submitRecord", body, idempotency_key)
+        if response is not None and response.status_code == 200:
+            result = response.json()
+            return {
+                "record_hash": record_hash,
+                "tx_hash": result.get("tx_hash"),
+                "datum": datum,
+            }
+        # If service is not available, fall through to mock mode
+        
+        return _unsubmitted_record_result(record_hash, issuer_id, patient_id, datum, allow_mock)
         
-        # Step 3: Create transaction metadata (CIP-20, label 674)
+    except Exception as e:
+        print(f"Error submitting record to Cardano: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def submit_merkle_root_to_cardano(
+    merkle_root: str,
+    record_count: int,
+    issuer_id: str,
+    idempotency_key: Optional[str] = None,
+    allow_mock: bool = CARDANO_ALLOW_MOCK,
+) -> Optional[Dict[str, Any]]:
+    """
+    Anchor the Merkle root of a batch of record hashes in one transaction
+    
+    The root takes the place of record_hash in the anchor datum and the CIP-20
+    metadata (label 674) carries merkle_root and record_count, so individual
+    records are verified with their inclusion proof against this transaction.
+    
+    Args:
+        merkle_root: Root from merkle.build_merkle_tree (hex string)
+        record_count: Number of records covered by the root
+        issuer_id: Doctor's public key hash (hex string)
+        idempotency_key: Key forwarded to the Cardano service
+        allow_mock: Fall back to a mock transaction if the service is down
+    
+    Returns:
+        Dictionary with merkle_root and tx_hash if successful, None otherwise
+    """
+    try:
+        datum = create_datum(issuer_id, "merkle_batch", merkle_root)
         metadata = {
             "anchor_validator": ANCHOR_VALIDATOR_HASH,
             "issuer_id": issuer_id,
-            "patient_id": patient_id,
-            "record_hash": record_hash,
+            "merkle_root": merkle_root,
+            "record_count": record_count,
             "issued_at": datum["fields"][3],
             "datum": datum,
         }
         
-        # Step 4: Submit to Cardano service or blockchain
-        # Option 1: Use Cardano service (Node.js service with Mesh SDK)
-        try:
-            response = requests.post(
-                f"{CARDANO_SERVICE_URL}/submitRecord",
-                json={
-                    "record_data": record_data,
-                    "issuer_id": issuer_id,
-                    "patient_id": patient_id,
-                    "record_hash": record_hash,
-                    "datum": datum,
-                    "metadata": metadata,
-                    "doctor_address": doctor_address,
-                },
-                timeout=60
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return {
-                    "record_hash": record_hash,
-                    "tx_hash": result.get("tx_hash"),
-                    "datum": datum,
-                }
-        except requests.exceptions.RequestException:
-            # If service is not available, fall through to mock mode
-            pass
+        response = _post_to_service(
+            "/submitRecord",
+            {
+                "record_data": {"merkle_root": merkle_root, "record_count": record_count},
+                "issuer_id": issuer_id,
+                "patient_id": "merkle_batch",
+                "record_hash": merkle_root,
+                "datum": datum,
+                "metadata": metadata,
+                "idempotency_key": idempotency_key,
+            },
+            idempotency_key,
+        )
+        if response is not None and response.status_code == 200:
+            result = response.json()
+            return {
+                "merkle_root": merkle_root,
+                "tx_hash": result.get("tx_hash"),
+                "datum": datum,
+            }
         
-        # Option 2: Mock mode for development (when Cardano service is not running)
-        print(f"[MOCK MODE] Submitting record to Cardano (service unavailable)")
-        print(f"Record hash: {record_hash}")
-        print(f"Issuer ID: {issuer_id}")
-        print(f"Patient ID: {patient_id}")
+        if not allow_mock:
+            print(f"Cardano service unavailable, Merkle root {merkle_root} not submitted")
+            return None
         
-        # Generate mock transaction hash
-        mock_tx_hash = f"mock_tx_{hashlib.sha256(f'{record_hash}{issuer_id}{patient_id}'.encode()).hexdigest()[:16]}"
+        print(f"[MOCK MODE] Anchoring Merkle root {merkle_root} for {record_count} records")
+        mock_tx_hash = f"mock_tx_{hashlib.sha256(f'{merkle_root}{issuer_id}'.encode()).hexdigest()[:16]}"
         
         return {
-            "record_hash": record_hash,
+            "merkle_root": merkle_root,
             "tx_hash": mock_tx_hash,
             "datum": datum,
-            "mock": True,  # Flag to indicate this is a mock transaction
+            "mock": True,
         }
         
     except Exception as e:
-        print(f"Error submitting record to Cardano: {e}")
+        print(f"Error submitting Merkle root to Cardano: {e}")
         import traceback
         traceback.print_exc()
         return None
 
 
-def verify_record_hash(record_hash: str, patient_id: str, tx_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+def check_anchor_metadata(
+    record_metadata: Dict[str, Any],
+    record_hash: str,
+    patient_id: str,
+    tx_hash: str,
+    merkle_proof: Optional[List[Dict[str, str]]] = None,
+) -> Dict[str, Any]:
+    """
+    Check a record against the label-674 metadata of its anchor transaction
+    
+    Returns:
+        Verification result for verify_record_hash
+    """
+    # Verify anchor validator hash matches
+    validator_match = record_metadata.get("anchor_validator") == ANCHOR_VALIDATOR_HASH
+    
+    if record_metadata.get("merkle_root"):
+        # Batched anchor: the leaf binds record hash and patient ID,
+        # so one proof check covers both
+        hash_match = verify_merkle_proof(
+            merkle_leaf(patient_id, record_hash),
+            merkle_proof,
+            record_metadata["merkle_root"],
+        )
+        patient_match = hash_match
+    else:
+        # Verify record hash matches
+        hash_match = record_metadata.get("record_hash") == record_hash.replace("0x", "")
+        
+        # Verify patient ID matches
+        patient_match = record_metadata.get("patient_id") == patient_id
+    
+    verified = validator_match and hash_match and patient_match
+    
+    return {
+        "verified": verified,
+        "tx_hash": tx_hash,
+        "record_hash": record_hash,
+        "patient_id": patient_id,
+        "validator_match": validator_match,
+        "hash_match": hash_match,
+        "patient_match": patient_match,
+        "metadata": record_metadata,
+        "timestamp": record_metadata.get("issued_at"),
+    }
+
+
+def _indexed_result(anchored, record_hash: str, patient_id: str) -> Dict[str, Any]:
+    return {
+        "verified": True,
+        "tx_hash": anchored.tx_hash,
+        "record_hash": record_hash,
+        "patient_id": patient_id,
+        "validator_match": True,
+        "hash_match": True,
+        "patient_match": True,
+        "timestamp": anchored.issued_at,
+        "indexed": True,
+    }
+
+
+def _unanchored_result(
+    record_hash: str,
+    patient_id: str,
+    tx_hash: Optional[str],
+    allow_mock: bool,
+) -> Dict[str, Any]:
+    """
+    Result for a record with no matching anchor. Never verified, mock mode
+    or not; in mock mode a mock tx_hash is flagged as such.
+    """
+    result = {
+        "verified": False,
+        "tx_hash": tx_hash,
+        "record_hash": record_hash,
+        "patient_id": patient_id,
+    }
+    if allow_mock and tx_hash and tx_hash.startswith("mock_"):
+        # Mock transactions never reach the chain, so there is nothing to verify
+        result["mock"] = True
+    return result
+
+
+def verify_record_hash(
+    record_hash: str,
+    patient_id: str,
+    tx_hash: Optional[str] = None,
+    merkle_proof: Optional[List[Dict[str, str]]] = None,
+    allow_mock: bool = CARDANO_ALLOW_MOCK,
+) -> Optional[Dict[str, Any]]:
     """
     Verify record hash on Cardano blockchain using Blockfrost API
     
+    Without tx_hash the anchor is looked up in the local label-674 index.
+    
     Args:
         record_hash: The recordHash from Cardano
         patient_id: Patient ID for verification
         tx_hash: Optional transaction hash to verify against
+        merkle_proof: Inclusion proof, required when tx_hash anchors a Merkle batch
+        allow_mock: Flag records anchored with a mock transaction as mock
     
     Returns:
         Verification result with record data if verified, None otherwise
     """
     try:
-        blockfrost_url = get_blockfrost_url()
-        headers = {"project_id": BLOCKFROST_API_KEY}
-        
         # If tx_hash is provided, verify directly
         if tx_hash:
             try:
-                # Get transaction details from Blockfrost
-                tx_response = requests.get(
-                    f"{blockfrost_url}/txs/{tx_hash}",
-                    headers=headers,
-                    timeout=30
-                )
+                # Transaction details and label 674 metadata (CIP-20), cached once confirmed
+                cached = lookup_transaction(tx_hash)
+                record_metadata = cached["metadata"] if cached else None
                 
-                if tx_response.status_code == 200:
-                    tx_data = tx_response.json()
-                    
-                    # Get transaction metadata
-                    metadata_response = requests.get(
-                        f"{blockfrost_url}/txs/{tx_hash}/metadata",
-                        headers=headers,
-                        timeout=30
-                    )
-                    
-                    if metadata_response.status_code == 200:
-                        metadata_array = metadata_response.json()
-                        
-                        # Find metadata with label 674 (CIP-20)
-                        record_metadata = None
-                        for item in metadata_array:
-                            if item.get("label") == "674":
-                                record_metadata = item.get("json_metadata") or item.get("metadata")
-                                break
-                        
-                        if record_metadata:
-                            # Verify anchor validator hash matches
-                            validator_match = record_metadata.get("anchor_validator") == ANCHOR_VALIDATOR_HASH
-                            
-                            # Verify record hash matches
-                            hash_match = record_metadata.get("record_hash") == record_hash.replace("0x", "")
-                            
-                            # Verify patient ID matches
-                            patient_match = record_metadata.get("patient_id") == patient_id
-                            
-                            verified = validator_match and hash_match and patient_match
-                            
-                            return {
-                                "verified": verified,
-                                "tx_hash": tx_hash,
-                                "record_hash": record_hash,
-                                "patient_id": patient_id,
-                                "validator_match": validator_match,
-                                "hash_match": hash_match,
-                                "patient_match": patient_match,
-                                "metadata": record_metadata,
-                                "timestamp": record_metadata.get("issued_at"),
-                            }
+                if record_metadata:
+                    return check_anchor_metadata(record_metadata, record_hash, patient_id, tx_hash, merkle_proof)
             except requests.exceptions.RequestException as e:
                 print(f"Error querying Blockfrost API: {e}")
         
-        # Fallback: Try to find transaction by searching metadata
-        # (This is less efficient, so prefer providing tx_hash)
-        print(f"[MOCK MODE] Verifying record hash (Blockfrost query not implemented for hash-only lookup)")
-        return {
-            "verified": True,
-            "record_hash": record_hash,
-            "patient_id": patient_id,
-            "mock": True,
-        }
+        # Hash-only lookup: resolve the anchor from the local label-674 index
+        # (populated by the index_cardano_records command)
+        if not tx_hash:
+            anchored = find_anchored_record(record_hash, patient_id, merkle_proof)
+            if anchored:
+                return _indexed_result(anchored, record_hash, patient_id)
+        
+        return _unanchored_result(record_hash, patient_id, tx_hash, allow_mock)
         
     except Exception as e:
         print(f"Error verifying record hash: {e}")
@@ -248,7 +454,63 @@ def verify_record_hash(record_hash: str, patient_id: str, tx_hash: Optional[str]
         return None
 
 
-def mint_care_points(address: str, amount: int, owner_pubkey_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+def _mint_request(
+    address: str,
+    amount: int,
+    owner_pubkey_hash: Optional[str],
+    idempotency_key: Optional[str],
+) -> Optional[Dict[str, Any]]:
+    """
+    /mintCarePoints request body, or None if the amount breaks the policy cap
+    """
+    # Validate amount (per carepoints_policy.ak)
+    if amount < 1 or amount > CAREPOINTS_MAX_MINT:
+        print(f"Invalid CarePoints amount: {amount}. Must be between 1 and 100,000")
+        return None
+    
+    # Create redeemer matching Aiken contract structure
+    redeemer = {
+        "constructor": 0,
+        "fields": [
+            amount  # quantity: Int
+        ]
+    }
+    
+    return {
+        "address": address,
+        "amount": amount,
+        "policy_hash": CAREPOINTS_POLICY_HASH,
+        "redeemer": redeemer,
+        "owner_pubkey_hash": owner_pubkey_hash,
+        "idempotency_key": idempotency_key,
+    }
+
+
+def _unminted_result(address: str, amount: int, allow_mock: bool) -> Optional[Dict[str, Any]]:
+    if not allow_mock:
+        print(f"Cardano service unavailable, {amount} CarePoints to {address} not minted")
+        return None
+    
+    # Step 2: Mock mode for development
+    print(f"[MOCK MODE] Minting {amount} CarePoints to {address}")
+    mock_tx_hash = f"mock_cp_tx_{hashlib.sha256(f'{address}{amount}{time.time()}'.encode()).hexdigest()[:16]}"
+    
+    return {
+        "tx_hash": mock_tx_hash,
+        "policy_id": CAREPOINTS_POLICY_HASH,
+        "amount": amount,
+        "address": address,
+        "mock": True,
+    }
+
+
+def mint_care_points(
+    address: str,
+    amount: int,
+    owner_pubkey_hash: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+    allow_mock: bool = CARDANO_ALLOW_MOCK,
+) -> Optional[Dict[str, Any]]:
     """
     Mint CarePoints tokens to a Cardano address using carepoints_policy
     
@@ -257,69 +519,123 @@ def mint_care_points(address: str, amount: int, owner_pubkey_hash: Optional[str]
         amount: Amount of CarePoints to mint (1-100,000)
         owner_pubkey_hash: Public key hash of the owner (for signing)
                           Defaults to the owner in the policy if not provided
+        idempotency_key: Key forwarded to the Cardano service so retried
+                         mints are not paid out twice
+        allow_mock: Fall back to a mock transaction if the service is down
     
     Returns:
         Dictionary with tx_hash and policy_id if successful, None otherwise
     """
     try:
-        # Validate amount (per carepoints_policy.ak)
-        if amount < 1 or amount > 100000:
-            print(f"Invalid CarePoints amount: {amount}. Must be between 1 and 100,000")
+        body = _mint_request(address, amount, owner_pubkey_hash, idempotency_key)
+        if body is None:
+            return None
+        
+        # Step 1: Try to use Cardano service
+        response = _post_to_service("/mintCarePoints", body, idempotency_key)
+        if response is not None and response.status_code == 200:
+            result = response.json()
+            return {
+                "tx_hash": result.get("tx_hash"),
+                "policy_id": CAREPOINTS_POLICY_HASH,
+                "amount": amount,
+                "address": address,
+            }
+        # Service not available, fall through to mock
+        
+        return _unminted_result(address, amount, allow_mock)
+        
+    except Exception as e:
+        print(f"Error minting CarePoints: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+def mint_care_points_batch(
+    outputs: List[Dict[str, Any]],
+    owner_pubkey_hash: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Mint CarePoints to many addresses in one transaction using carepoints_policy
+    
+    The policy redeemer carries a single quantity, so the total across all
+    outputs must stay within the same 1-100,000 cap as mint_care_points.
+    There is no mock fallback: a batch covers many CarePointsTransaction
+    rows, so anything but a 200 fails it and the outbox retries.
+    
+    Args:
+        outputs: List of {"address": str, "amount": int}
+        owner_pubkey_hash: Public key hash of the owner (for signing)
+        idempotency_key: Key forwarded to the Cardano service
+    
+    Returns:
+        Dictionary with tx_hash, policy_id and total amount if successful, None otherwise
+    """
+    try:
+        total = sum(output["amount"] for output in outputs)
+        if not outputs or any(output["amount"] < 1 for output in outputs) or total > CAREPOINTS_MAX_MINT:
+            print(f"Invalid CarePoints batch: {len(outputs)} outputs totalling {total}. Must be between 1 and 100,000")
             return None
         
-        # Create redeemer matching Aiken contract structure
         redeemer = {
             "constructor": 0,
             "fields": [
-                amount  # quantity: Int
+                total  # quantity: Int
             ]
         }
         
-        # Step 1: Try to use Cardano service
-        try:
-            response = requests.post(
-                f"{CARDANO_SERVICE_URL}/mintCarePoints",
-                json={
-                    "address": address,
-                    "amount": amount,
-                    "policy_hash": CAREPOINTS_POLICY_HASH,
-                    "redeemer": redeemer,
-                    "owner_pubkey_hash": owner_pubkey_hash,
-                },
-                timeout=60
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return {
-                    "tx_hash": result.get("tx_hash"),
-                    "policy_id": CAREPOINTS_POLICY_HASH,
-                    "amount": amount,
-                    "address": address,
-                }
-        except requests.exceptions.RequestException:
-            # Service not available, fall through to mock
-            pass
-        
-        # Step 2: Mock mode for development
-        print(f"[MOCK MODE] Minting {amount} CarePoints to {address}")
-        mock_tx_hash = f"mock_cp_tx_{hashlib.sha256(f'{address}{amount}{time.time()}'.encode()).hexdigest()[:16]}"
+        response = _post_to_service(
+            "/mintCarePointsBatch",
+            {
+                "outputs": outputs,
+                "amount": total,
+                "policy_hash": CAREPOINTS_POLICY_HASH,
+                "redeemer": redeemer,
+                "owner_pubkey_hash": owner_pubkey_hash,
+                "idempotency_key": idempotency_key,
+            },
+            idempotency_key,
+        )
+        if response is not None and response.status_code == 200:
+            result = response.json()
+            return {
+                "tx_hash": result.get("tx_hash"),
+                "policy_id": CAREPOINTS_POLICY_HASH,
+                "amount": total,
+                "outputs": outputs,
+            }
         
-        return {
-            "tx_hash": mock_tx_hash,
-            "policy_id": CAREPOINTS_POLICY_HASH,
-            "amount": amount,
-            "address": address,
-            "mock": True,
-        }
+        status = response.status_code if response is not None else "unavailable"
+        print(f"Cardano service {status}, batch of {total} CarePoints not minted")
+        return None
         
     except Exception as e:
-        print(f"Error minting CarePoints: {e}")
+        print(f"Error minting CarePoints batch: {e}")
         import traceback
         traceback.print_exc()
         return None
 
 
+def _care_points_quantity(assets_data: Dict[str, Any]) -> Optional[int]:
+    """
+    CarePoints quantity in a Blockfrost /addresses/{address} response, if any
+    """
+    # Look for CarePoints token (policy_id + asset_name)
+    # Policy ID is CAREPOINTS_POLICY_HASH
+    # Asset name would be "CarePoints" or similar
+    policy_id = CAREPOINTS_POLICY_HASH
+    
+    # Check if address has assets
+    for amount_item in assets_data.get("amount", []):
+        unit = amount_item.get("unit", "")
+        if unit.startswith(policy_id):
+            quantity = amount_item.get("quantity", "0")
+            return int(quantity)
+    return None
+
+
 def get_care_points_balance(address: str) -> int:
     """
     Get CarePoints balance for a Cardano address using Blockfrost API
@@ -331,56 +647,19 @@ def get_care_points_balance(address: str) -> int:
         Balance as integer, 0 if error or not found
     """
     try:
-        blockfrost_url = get_blockfrost_url()
-        headers = {"project_id": BLOCKFROST_API_KEY}
+        client = get_blockfrost_client()
         
-        # Get address assets from Blockfrost
-        response = requests.get(
-            f"{blockfrost_url}/addresses/{address}",
-            headers=headers,
-            timeout=30
+        # Get address assets from Blockfrost; "amount" lists the current
+        # holdings (/addresses/{address}/total only has lifetime sums)
+        response = client.get(
+            f"/addresses/{address}",
+            endpoint="/addresses/{address}",
         )
         
         if response.status_code == 200:
-            address_data = response.json()
-            
-            # Get assets for this address
-            assets_response = requests.get(
-                f"{blockfrost_url}/addresses/{address}/total",
-                headers=headers,
-                timeout=30
-            )
-            
-            if assets_response.status_code == 200:
-                assets_data = assets_response.json()
-                
-                # Look for CarePoints token (policy_id + asset_name)
-                # Policy ID is CAREPOINTS_POLICY_HASH
-                # Asset name would be "CarePoints" or similar
-                policy_id = CAREPOINTS_POLICY_HASH
-                
-                # Check if address has assets
-                if "amount" in assets_data:
-                    for amount_item in assets_data.get("amount", []):
-                        unit = amount_item.get("unit", "")
-                        if unit.startswith(policy_id):
-                            quantity = amount_item.get("quantity", "0")
-                            return int(quantity)
-        
-        # Try alternative: query by policy ID
-        try:
-            policy_response = requests.get(
-                f"{blockfrost_url}/assets/policy/{policy_id}",
-                headers=headers,
-                timeout=30
-            )
-            
-            if policy_response.status_code == 200:
-                # This would require more complex logic to match addresses
-                # For now, return 0 if not found via direct address query
-                pass
-        except:
-            pass
+            quantity = _care_points_quantity(response.json())
+            if quantity is not None:
+                return quantity
         
         return 0
         
@@ -396,7 +675,7 @@ def get_care_points_balance(address: str) -> int:
 
 def get_transaction_details(tx_hash: str) -> Optional[Dict[str, Any]]:
     """
-    Get transaction details from Blockfrost API
+    Get transaction details from Blockfrost API (cached once confirmed)
     
     Args:
         tx_hash: Transaction hash
@@ -405,19 +684,8 @@ def get_transaction_details(tx_hash: str) -> Optional[Dict[str, Any]]:
         Transaction details dictionary or None
     """
     try:
-        blockfrost_url = get_blockfrost_url()
-        headers = {"project_id": BLOCKFROST_API_KEY}
-        
-        response = requests.get(
-            f"{blockfrost_url}/txs/{tx_hash}",
-            headers=headers,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            return response.json()
-        
-        return None
+        cached = lookup_transaction(tx_hash)
+        return cached["tx"] if cached else None
     except Exception as e:
         print(f"Error getting transaction details: {e}")
         return None
@@ -425,7 +693,7 @@ def get_transaction_details(tx_hash: str) -> Optional[Dict[str, Any]]:
 
 def get_transaction_metadata(tx_hash: str) -> Optional[Dict[str, Any]]:
     """
-    Get transaction metadata from Blockfrost API
+    Get transaction metadata from Blockfrost API (cached once confirmed)
     
     Args:
         tx_hash: Transaction hash
@@ -434,24 +702,8 @@ def get_transaction_metadata(tx_hash: str) -> Optional[Dict[str, Any]]:
         Metadata dictionary (label 674 for CIP-20) or None
     """
     try:
-        blockfrost_url = get_blockfrost_url()
-        headers = {"project_id": BLOCKFROST_API_KEY}
-        
-        response = requests.get(
-            f"{blockfrost_url}/txs/{tx_hash}/metadata",
-            headers=headers,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            metadata_array = response.json()
-            
-            # Find metadata with label 674 (CIP-20)
-            for item in metadata_array:
-                if item.get("label") == "674":
-                    return item.get("json_metadata") or item.get("metadata")
-        
-        return None
+        cached = lookup_transaction(tx_hash)
+        return cached["metadata"] if cached else None
     except Exception as e:
         print(f"Error getting transaction metadata: {e}")
         return None
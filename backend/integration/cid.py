@@ -0,0 +1,240 @@
+"""
+Local IPFS CID Computation
+CIDv0 ("Qm...") of bytes exactly as `ipfs add` with default settings builds
+it: 256 KiB chunks wrapped as UnixFS file nodes in dag-pb, arranged in a
+balanced DAG of at most 174 links per node, sha2-256 multihash, base58btc.
+
+Lets uploads be deduplicated, queued and verified without asking the node.
+cid_matches also checks CIDv1 ("b..." base32) as `ipfs add --cid-version=1`
+builds it: a raw block for content of one chunk, otherwise the same DAG with
+raw leaves and CIDv1 links. A CIDv1 wrapping a CIDv0 DAG is checked too.
+"""
+import base64
+import hashlib
+from typing import List, Optional, Tuple
+
+CHUNK_SIZE = 262144  # go-ipfs-chunker default (size-262144)
+MAX_LINKS = 174  # go-unixfs balanced layout DefaultLinksPerBlock
+UNIXFS_FILE = 2
+CODEC_RAW = 0x55
+CODEC_DAG_PB = 0x70
+SHA2_256 = 0x12
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+# (hash as linked from the parent, cumulative block size, file bytes below the node);
+# the link hash is the bare multihash in CIDv0 DAGs and the binary CID in CIDv1 DAGs
+_Node = Tuple[bytes, int, int]
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _field_bytes(field: int, value: bytes) -> bytes:
+    return _varint(field << 3 | 2) + _varint(len(value)) + value
+
+
+def _field_varint(field: int, value: int) -> bytes:
+    return _varint(field << 3) + _varint(value)
+
+
+def _b58encode(data: bytes) -> str:
+    number = int.from_bytes(data, "big")
+    out = []
+    while number:
+        number, remainder = divmod(number, 58)
+        out.append(_B58_ALPHABET[remainder])
+    zeros = len(data) - len(data.lstrip(b"\0"))
+    return "1" * zeros + "".join(reversed(out))
+
+
+def _b32encode(data: bytes) -> str:
+    """Multibase base32: "b" + lowercase RFC 4648 without padding"""
+    return "b" + base64.b32encode(data).decode("ascii").lower().rstrip("=")
+
+
+def _b58decode(text: str) -> bytes:
+    number = 0
+    for char in text:
+        number = number * 58 + _B58_ALPHABET.index(char)
+    zeros = len(text) - len(text.lstrip("1"))
+    return b"\0" * zeros + number.to_bytes((number.bit_length() + 7) // 8, "big")
+
+
+def _multihash(block: bytes) -> bytes:
+    return b"\x12\x20" + hashlib.sha256(block).digest()
+
+
+def _raw_leaf(chunk: bytes) -> _Node:
+    return bytes([1, CODEC_RAW]) + _multihash(chunk), len(chunk), len(chunk)
+
+
+def _leaf(chunk: bytes) -> _Node:
+    unixfs = _field_varint(1, UNIXFS_FILE)
+    if chunk:
+        unixfs += _field_bytes(2, chunk)
+    unixfs += _field_varint(3, len(chunk))
+    block = _field_bytes(1, unixfs)
+    return _multihash(block), len(block), len(chunk)
+
+
+def _parent(children: List[_Node], cid_v1: bool = False) -> _Node:
+    filesize = sum(size for _, _, size in children)
+    unixfs = _field_varint(1, UNIXFS_FILE) + _field_varint(3, filesize)
+    unixfs += b"".join(_field_varint(4, size) for _, _, size in children)
+    links = b"".join(
+        _field_bytes(2, _field_bytes(1, mh) + _field_bytes(2, b"") + _field_varint(3, tsize))
+        for mh, tsize, _ in children
+    )
+    block = links + _field_bytes(1, unixfs)
+    link_hash = bytes([1, CODEC_DAG_PB]) + _multihash(block) if cid_v1 else _multihash(block)
+    return link_hash, len(block) + sum(tsize for _, tsize, _ in children), filesize
+
+
+class CIDBuilder:
+    """
+    Incremental CIDv0 computation, for content that arrives in pieces
+
+        builder = CIDBuilder()
+        for piece in stream:
+            builder.update(piece)
+        cid = builder.cid()
+
+    Memory use is one chunk plus at most 175 pending links per tree level.
+
+    Args:
+        raw_leaves: Build the `ipfs add --cid-version=1` layout (raw leaves,
+            CIDv1 links) and return a base32 CIDv1 ("bafy...", or "bafk..."
+            for content of one chunk)
+    """
+
+    def __init__(self, raw_leaves: bool = False):
+        self.raw_leaves = raw_leaves
+        self._buffer = bytearray()
+        self._levels: List[List[_Node]] = [[]]
+        self.size = 0
+        self._cid: Optional[str] = None
+
+    def update(self, data: bytes):
+        if self._cid is not None:
+            raise ValueError("CIDBuilder already finalized")
+        self.size += len(data)
+        self._buffer += data
+        while len(self._buffer) >= CHUNK_SIZE:
+            self._push(0, self._leaf(bytes(self._buffer[:CHUNK_SIZE])))
+            del self._buffer[:CHUNK_SIZE]
+
+    def _leaf(self, chunk: bytes) -> _Node:
+        return _raw_leaf(chunk) if self.raw_leaves else _leaf(chunk)
+
+    def _parent(self, children: List[_Node]) -> _Node:
+        return _parent(children, cid_v1=self.raw_leaves)
+
+    def _push(self, level: int, node: _Node):
+        if level == len(self._levels):
+            self._levels.append([])
+        nodes = self._levels[level]
+        nodes.append(node)
+        if len(nodes) > MAX_LINKS:
+            # A full group is only folded once a later node shows it is not the root
+            self._push(level + 1, self._parent(nodes[:MAX_LINKS]))
+            del nodes[:MAX_LINKS]
+
+    def cid(self) -> str:
+        if self._cid is None:
+            if self._buffer or not any(self._levels):
+                self._levels[0].append(self._leaf(bytes(self._buffer)))
+                self._buffer.clear()
+            root = self._root()[0]
+            self._cid = _b32encode(root) if self.raw_leaves else _b58encode(root)
+        return self._cid
+
+    def _root(self) -> _Node:
+        levels = self._levels
+        level = 0
+        while True:
+            nodes = levels[level]
+            if len(nodes) == 1 and not any(levels[level + 1:]):
+                return nodes[0]
+            if level + 1 == len(levels):
+                levels.append([])
+            for start in range(0, len(nodes), MAX_LINKS):
+                levels[level + 1].append(self._parent(nodes[start:start + MAX_LINKS]))
+            levels[level] = []
+            level += 1
+
+
+def compute_cid(data: bytes) -> str:
+    """
+    CIDv0 that `ipfs add` would return for data
+
+    Returns:
+        Base58btc CID string ("Qm...")
+    """
+    if len(data) <= CHUNK_SIZE:
+        return _b58encode(_leaf(data)[0])
+    builder = CIDBuilder()
+    builder.update(data)
+    return builder.cid()
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError("Truncated varint")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _parse_cid_v1(cid: str) -> Optional[Tuple[int, bytes]]:
+    """
+    (codec, multihash) of a base32 CIDv1, None if it is anything else
+    """
+    if not cid.startswith("b"):
+        return None
+    try:
+        body = cid[1:].upper()
+        data = base64.b32decode(body + "=" * (-len(body) % 8))
+        version, offset = _read_varint(data, 0)
+        codec, offset = _read_varint(data, offset)
+    except ValueError:  # binascii.Error is a ValueError
+        return None
+    if version != 1:
+        return None
+    return codec, data[offset:]
+
+
+def cid_matches(cid: str, content: bytes) -> bool:
+    """
+    True if content is what cid addresses. CIDs this module cannot rebuild
+    (other hash functions, chunkers or multibases) never match.
+    """
+    if cid.startswith("Qm"):
+        return compute_cid(content) == cid
+    parsed = _parse_cid_v1(cid)
+    if parsed is None:
+        return False
+    codec, multihash = parsed
+    if multihash[:2] != bytes([SHA2_256, 32]):
+        return False
+    if codec == CODEC_RAW:
+        return _multihash(content) == multihash
+    if codec != CODEC_DAG_PB:
+        return False
+    # A CIDv0 DAG written as CIDv1 (`ipfs cid format -v 1`), or a --cid-version=1 add
+    if _b58decode(compute_cid(content)) == multihash:
+        return True
+    builder = CIDBuilder(raw_leaves=True)
+    builder.update(content)
+    return _parse_cid_v1(builder.cid()) == (codec, multihash)
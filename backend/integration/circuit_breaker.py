@@ -0,0 +1,150 @@
+"""
+Circuit Breaker
+Process-wide breaker for the Cardano service at CARDANO_SERVICE_URL, so a dead
+or hanging dependency fails fast instead of costing a timeout per request
+"""
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Any, Optional
+
+from django.utils import timezone
+
+from .cardano_config import (
+    CARDANO_SERVICE_FAILURE_THRESHOLD,
+    CARDANO_SERVICE_RESET_TIMEOUT,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    closed: calls go through; failure_threshold consecutive failures open it.
+    open: calls are rejected until reset_timeout has passed.
+    half_open: a single probe call goes through; success closes the circuit,
+    failure opens it for another reset_timeout.
+
+    Args:
+        name: Label used in logs and health output
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds to stay open before probing
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started_at: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """
+        Whether a call may go out now. In half-open state only one caller
+        (the probe) gets True until it reports back.
+        """
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = HALF_OPEN
+                self.probe_started_at = now
+                print(f"Circuit {self.name} half-open, probing")
+                return True
+            # Half-open: let another probe through if the last one never reported back
+            if now - self.probe_started_at >= self.reset_timeout:
+                self.probe_started_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != CLOSED:
+                print(f"Circuit {self.name} closed")
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self.probe_started_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"Circuit {self.name} open after {self.failures} consecutive failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.probe_started_at = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        State for health checks
+        """
+        with self.lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 2)
+            return {
+                "name": self.name,
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "retry_in": retry_in,
+            }
+
+
+def save_breaker_state(breaker: CircuitBreaker):
+    """
+    Persist a breaker's snapshot, for the health endpoint of other processes
+    """
+    from .models import CircuitBreakerState
+
+    state = breaker.snapshot()
+    retry_in = state["retry_in"]
+    CircuitBreakerState.objects.update_or_create(
+        name=state["name"],
+        defaults={
+            "state": state["state"],
+            "consecutive_failures": state["consecutive_failures"],
+            "retry_at": timezone.now() + timedelta(seconds=retry_in) if retry_in is not None else None,
+        },
+    )
+
+
+def load_breaker_state(name: str) -> Optional[Dict[str, Any]]:
+    """
+    Last saved state of a breaker, None if its owner never reported one
+
+    Returns:
+        {"state", "consecutive_failures", "retry_in", "reported_seconds_ago"}
+    """
+    from .models import CircuitBreakerState
+
+    row = CircuitBreakerState.objects.filter(name=name).first()
+    if row is None:
+        return None
+    now = timezone.now()
+    return {
+        "state": row.state,
+        "consecutive_failures": row.consecutive_failures,
+        "retry_in": round(max(0.0, (row.retry_at - now).total_seconds()), 1) if row.retry_at else None,
+        "reported_seconds_ago": round((now - row.updated_at).total_seconds(), 1),
+    }
+
+
+cardano_service_breaker = CircuitBreaker(
+    "cardano_service",
+    failure_threshold=CARDANO_SERVICE_FAILURE_THRESHOLD,
+    reset_timeout=CARDANO_SERVICE_RESET_TIMEOUT,
+)
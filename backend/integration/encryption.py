@@ -0,0 +1,304 @@
+"""
+Record Encryption
+AES-GCM encryption of IPFS payloads with one data key per patient.
+
+Payloads are encrypted as a stream of fixed-size chunks, each sealed on its
+own, so lab files and large records are encrypted and decrypted with memory
+bounded by the chunk size. Layout:
+
+    header   MAGIC (4) | chunk size, big-endian u32 (4) | nonce prefix (7)
+    chunks   AES-GCM(plaintext chunk) + 16-byte tag, one per chunk
+
+The nonce of chunk i is prefix | i (u32) | 1 if last else 0, and the header
+is the associated data of every chunk, so chunks cannot be reordered,
+dropped or truncated without failing authentication.
+
+Data keys are random, wrapped with the master key (IPFS_ENCRYPTION_KEY) and
+stored in DataKey, keyed by the patient's health ID. There is no fallback
+master key: without IPFS_ENCRYPTION_KEY nothing is encrypted or decrypted.
+"""
+import base64
+import os
+import struct
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from django.core.exceptions import ImproperlyConfigured
+
+from .lru_cache import LRUCache
+from .cardano_config import IPFS_ENCRYPTION_KEY, IPFS_ENCRYPTION_CHUNK_SIZE
+
+MAGIC = b"HNE1"
+NONCE_PREFIX_SIZE = 7
+HEADER_SIZE = len(MAGIC) + 4 + NONCE_PREFIX_SIZE
+TAG_SIZE = 16
+KEY_SIZE = 32
+
+
+class DecryptionError(Exception):
+    """Ciphertext is malformed, truncated, tampered with or under another key"""
+
+
+def is_encrypted(content: bytes) -> bool:
+    return content[:len(MAGIC)] == MAGIC
+
+
+def _header(chunk_size: int, nonce_prefix: bytes) -> bytes:
+    return MAGIC + struct.pack(">I", chunk_size) + nonce_prefix
+
+
+def _nonce(nonce_prefix: bytes, index: int, last: bool) -> bytes:
+    if index > 0xFFFFFFFF:
+        raise ValueError("Too many chunks for one stream")
+    return nonce_prefix + struct.pack(">IB", index, 1 if last else 0)
+
+
+def encrypt_stream(
+    key: bytes,
+    src: BinaryIO,
+    chunk_size: int = IPFS_ENCRYPTION_CHUNK_SIZE,
+    nonce_prefix: Optional[bytes] = None,
+) -> Iterator[bytes]:
+    """
+    Encrypt a readable binary file chunk by chunk
+
+    Args:
+        key: 32-byte data key
+        src: File-like object to read plaintext from
+        chunk_size: Plaintext bytes per sealed chunk
+        nonce_prefix: Random if omitted. Passing the same prefix again
+            reproduces the same ciphertext (and CID) for the same plaintext;
+            never reuse one for different plaintext under the same key.
+
+    Yields:
+        The header, then one sealed chunk at a time
+    """
+    aead = AESGCM(key)
+    nonce_prefix = nonce_prefix or os.urandom(NONCE_PREFIX_SIZE)
+    header = _header(chunk_size, nonce_prefix)
+    yield header
+
+    index = 0
+    chunk = src.read(chunk_size)
+    while True:
+        # Read one chunk ahead to know which chunk is the last
+        following = src.read(chunk_size) if len(chunk) == chunk_size else b""
+        last = not following
+        yield aead.encrypt(_nonce(nonce_prefix, index, last), chunk, header)
+        if last:
+            return
+        chunk = following
+        index += 1
+
+
+def decrypt_stream(key: bytes, src: BinaryIO) -> Iterator[bytes]:
+    """
+    Decrypt what encrypt_stream produced, chunk by chunk. A chunk is only
+    yielded once its tag has been checked; a stream cut short raises
+    DecryptionError instead of ending quietly.
+
+    Yields:
+        Plaintext chunks
+    """
+    header = src.read(HEADER_SIZE)
+    if len(header) != HEADER_SIZE or not is_encrypted(header):
+        raise DecryptionError("Not an encrypted payload")
+    (chunk_size,) = struct.unpack(">I", header[len(MAGIC):len(MAGIC) + 4])
+    nonce_prefix = header[len(MAGIC) + 4:]
+    aead = AESGCM(key)
+    sealed_size = chunk_size + TAG_SIZE
+
+    index = 0
+    sealed = src.read(sealed_size)
+    while True:
+        following = src.read(sealed_size) if len(sealed) == sealed_size else b""
+        last = not following
+        try:
+            yield aead.decrypt(_nonce(nonce_prefix, index, last), sealed, header)
+        except InvalidTag:
+            raise DecryptionError(f"Chunk {index} failed authentication") from None
+        if last:
+            return
+        sealed = following
+        index += 1
+
+
+def encrypt_bytes(key: bytes, data: bytes, chunk_size: int = IPFS_ENCRYPTION_CHUNK_SIZE) -> bytes:
+    """
+    encrypt_stream for a payload already in memory
+    """
+    return b"".join(encrypt_stream(key, _BytesReader(data), chunk_size))
+
+
+def decrypt_bytes(key: bytes, data: bytes) -> bytes:
+    """
+    decrypt_stream for a payload already in memory
+    """
+    return b"".join(decrypt_stream(key, _BytesReader(data)))
+
+
+def encrypted_size(size: int, chunk_size: int = IPFS_ENCRYPTION_CHUNK_SIZE) -> int:
+    chunks = max(1, -(-size // chunk_size))
+    return HEADER_SIZE + size + chunks * TAG_SIZE
+
+
+class _BytesReader:
+    """read() over bytes through a memoryview, without copying the buffer up front"""
+
+    def __init__(self, data: bytes):
+        self._view = memoryview(data)
+        self._position = 0
+
+    def read(self, size: int = -1) -> bytes:
+        start = self._position
+        end = len(self._view) if size < 0 else min(start + size, len(self._view))
+        self._position = end
+        return self._view[start:end].tobytes()
+
+
+class EncryptingReader:
+    """
+    File-like view of the ciphertext of src, for APIs that pull with read()
+    (e.g. IPFSClient.add_file)
+    """
+
+    def __init__(self, key: bytes, src: BinaryIO, nonce_prefix: Optional[bytes] = None,
+                 chunk_size: int = IPFS_ENCRYPTION_CHUNK_SIZE):
+        self._chunks = encrypt_stream(key, src, chunk_size, nonce_prefix)
+        self._buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data = self._buffer + b"".join(self._chunks)
+            self._buffer = b""
+            return data
+        while len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def parse_master_key(value: str) -> bytes:
+    """
+    Decode IPFS_ENCRYPTION_KEY (32 bytes, base64)
+
+    Raises:
+        ImproperlyConfigured if it is unset or not a 32-byte key
+    """
+    if not value:
+        raise ImproperlyConfigured(
+            "IPFS_ENCRYPTION_KEY is not set; generate one with "
+            "python -c \"import base64, os; print(base64.urlsafe_b64encode(os.urandom(32)).decode())\""
+        )
+    try:
+        key = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+    except ValueError:
+        key = b""
+    if len(key) != KEY_SIZE:
+        raise ImproperlyConfigured("IPFS_ENCRYPTION_KEY must be 32 bytes, base64 encoded")
+    return key
+
+
+def _master_key() -> bytes:
+    return parse_master_key(IPFS_ENCRYPTION_KEY)
+
+
+def check_master_key():
+    """
+    Fail early, before work that will need the master key
+
+    Raises:
+        ImproperlyConfigured if IPFS_ENCRYPTION_KEY is unset or invalid
+    """
+    _master_key()
+
+
+def wrap_key(data_key: bytes, subject: str) -> bytes:
+    """
+    Seal a data key under the master key, bound to its subject
+    """
+    nonce = os.urandom(12)
+    return nonce + AESGCM(_master_key()).encrypt(nonce, data_key, subject.encode())
+
+
+def unwrap_key(wrapped: bytes, subject: str) -> bytes:
+    wrapped = bytes(wrapped)
+    try:
+        return AESGCM(_master_key()).decrypt(wrapped[:12], wrapped[12:], subject.encode())
+    except InvalidTag:
+        raise DecryptionError(f"Data key for {subject} does not open with the master key") from None
+
+
+_keys = LRUCache(1024)
+
+
+def get_data_key_entry(subject: str, create: bool = True):
+    """
+    The DataKey row of a patient, created on first use (None if missing and not create)
+    """
+    from .models import DataKey
+
+    if create:
+        entry, _ = DataKey.objects.get_or_create(
+            subject=subject,
+            defaults={"wrapped_key": wrap_key(AESGCM.generate_key(bit_length=256), subject)},
+        )
+        return entry
+    return DataKey.objects.filter(subject=subject).first()
+
+
+def get_data_key(subject: str, create: bool = True) -> Optional[bytes]:
+    """
+    The data key of a patient, created on first use
+
+    Args:
+        subject: Patient health ID
+        create: If False, return None instead of creating a missing key
+
+    Returns:
+        32-byte data key, or None
+    """
+    found, key = _keys.get(subject)
+    if found:
+        return key
+
+    entry = get_data_key_entry(subject, create)
+    if entry is None:
+        return None
+    key = unwrap_key(entry.wrapped_key, subject)
+    _keys.set(subject, key)
+    return key
+
+
+def get_data_keys(subjects: Iterable[str]) -> Dict[str, bytes]:
+    """
+    get_data_key for many patients with one insert and one select
+    """
+    from .models import DataKey
+
+    subjects = list(subjects)
+    keys = {}
+    missing = []
+    for subject in subjects:
+        found, key = _keys.get(subject)
+        if found:
+            keys[subject] = key
+        else:
+            missing.append(subject)
+    if not missing:
+        return keys
+
+    DataKey.objects.bulk_create(
+        [DataKey(subject=subject, wrapped_key=wrap_key(AESGCM.generate_key(bit_length=256), subject))
+         for subject in missing],
+        ignore_conflicts=True,
+    )
+    for entry in DataKey.objects.filter(subject__in=missing):
+        key = unwrap_key(entry.wrapped_key, entry.subject)
+        _keys.set(entry.subject, key)
+        keys[entry.subject] = key
+    return keys
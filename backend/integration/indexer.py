@@ -0,0 +1,165 @@
+"""
+Label-674 Chain Indexer
+Follows Blockfrost's /metadata/txs/labels/674 feed from a stored cursor and
+records every anchor made with ANCHOR_VALIDATOR_HASH in AnchoredRecord, so a
+record can be verified by hash alone with one indexed query.
+"""
+from typing import Optional, Dict, Any, List, Tuple
+
+from django.db import transaction
+
+from .models import AnchoredRecord, IndexerCursor
+from .merkle import merkle_leaf, compute_merkle_root
+from .blockfrost_client import get_blockfrost_client
+from .cardano_config import ANCHOR_VALIDATOR_HASH, CARDANO_INDEXER_START_PAGE
+
+CURSOR_NAME = "label_674"
+PAGE_SIZE = 100  # Blockfrost maximum
+QUERY_CHUNK = 500  # values per IN (...) clause
+
+
+def parse_anchor(tx_hash: str, metadata: Any) -> Optional[AnchoredRecord]:
+    """
+    Build an AnchoredRecord from label-674 metadata, or None if the transaction
+    is not an anchor made with our validator
+    """
+    if not isinstance(metadata, dict) or metadata.get("anchor_validator") != ANCHOR_VALIDATOR_HASH:
+        return None
+    issued_at = metadata.get("issued_at")
+    return AnchoredRecord(
+        tx_hash=tx_hash,
+        record_hash=str(metadata.get("record_hash") or ""),
+        patient_id=str(metadata.get("patient_id") or ""),
+        merkle_root=str(metadata.get("merkle_root") or ""),
+        issuer_id=str(metadata.get("issuer_id") or ""),
+        issued_at=issued_at if isinstance(issued_at, int) else None,
+    )
+
+
+def index_next_page(page_size: int = PAGE_SIZE) -> Dict[str, int]:
+    """
+    Fetch the page at the cursor, store new anchors and advance the cursor
+
+    Returns:
+        {"fetched": items consumed, "indexed": anchors stored, "full": 1 if the page was full}
+    """
+    # A new cursor starts at CARDANO_INDEXER_START_PAGE rather than at the
+    # start of the global label-674 feed, which predates our first anchor
+    cursor, _ = IndexerCursor.objects.get_or_create(
+        name=CURSOR_NAME,
+        defaults={"page": CARDANO_INDEXER_START_PAGE},
+    )
+    response = get_blockfrost_client().get(
+        f"/metadata/txs/labels/674?page={cursor.page}&count={page_size}&order=asc",
+        endpoint="/metadata/txs/labels/{label}",
+    )
+    if response.status_code == 404:
+        return {"fetched": 0, "indexed": 0, "full": 0}
+    if response.status_code != 200:
+        raise LookupError(f"Blockfrost returned {response.status_code} for label 674 page {cursor.page}")
+
+    items: List[Dict[str, Any]] = response.json()
+    new_items = items[cursor.position:]
+    anchors = [
+        anchor
+        for anchor in (parse_anchor(item.get("tx_hash"), item.get("json_metadata")) for item in new_items)
+        if anchor is not None
+    ]
+
+    full = len(items) >= page_size
+    with transaction.atomic():
+        AnchoredRecord.objects.bulk_create(anchors, ignore_conflicts=True)
+        if full:
+            cursor.page += 1
+            cursor.position = 0
+        else:
+            cursor.position = len(items)
+        cursor.save()
+
+    return {"fetched": len(new_items), "indexed": len(anchors), "full": int(full)}
+
+
+def run_indexer(page_size: int = PAGE_SIZE, max_pages: Optional[int] = None) -> Dict[str, int]:
+    """
+    Index pages until the feed is caught up (or max_pages were read)
+    """
+    totals = {"fetched": 0, "indexed": 0, "pages": 0}
+    while max_pages is None or totals["pages"] < max_pages:
+        stats = index_next_page(page_size)
+        totals["fetched"] += stats["fetched"]
+        totals["indexed"] += stats["indexed"]
+        totals["pages"] += 1
+        if not stats["full"]:
+            break
+    return totals
+
+
+def find_anchored_record(
+    record_hash: str,
+    patient_id: str,
+    merkle_proof: Optional[List[Dict[str, str]]] = None,
+) -> Optional[AnchoredRecord]:
+    """
+    Look up the anchor for a record by hash alone
+
+    Records anchored one per transaction are matched on (record_hash, patient_id);
+    records in a Merkle batch are matched on the root their proof folds up to.
+    """
+    record_hash = _strip_0x(record_hash)
+    anchored = AnchoredRecord.objects.filter(record_hash=record_hash, patient_id=patient_id).first()
+    if anchored or not merkle_proof:
+        return anchored
+    try:
+        root = compute_merkle_root(merkle_leaf(patient_id, record_hash), merkle_proof)
+    except (KeyError, TypeError, ValueError):
+        return None
+    return AnchoredRecord.objects.filter(merkle_root=root).first()
+
+
+def _strip_0x(record_hash: str) -> str:
+    return record_hash[2:] if record_hash.startswith("0x") else record_hash
+
+
+def find_anchored_records(
+    records: List[Tuple[str, str, Optional[List[Dict[str, str]]]]],
+) -> Dict[int, AnchoredRecord]:
+    """
+    Bulk find_anchored_record with a handful of IN queries instead of one or
+    two queries per record
+
+    Args:
+        records: (record_hash, patient_id, merkle_proof) tuples
+
+    Returns:
+        {position in records: AnchoredRecord} for the records that were found
+    """
+    found: Dict[int, AnchoredRecord] = {}
+
+    hashes = sorted({_strip_0x(record_hash) for record_hash, _, _ in records})
+    direct: Dict[Tuple[str, str], AnchoredRecord] = {}
+    for start in range(0, len(hashes), QUERY_CHUNK):
+        for anchored in AnchoredRecord.objects.filter(record_hash__in=hashes[start:start + QUERY_CHUNK]):
+            direct.setdefault((anchored.record_hash, anchored.patient_id), anchored)
+
+    roots: Dict[int, str] = {}
+    for position, (record_hash, patient_id, merkle_proof) in enumerate(records):
+        record_hash = _strip_0x(record_hash)
+        anchored = direct.get((record_hash, patient_id))
+        if anchored:
+            found[position] = anchored
+        elif merkle_proof:
+            try:
+                roots[position] = compute_merkle_root(merkle_leaf(patient_id, record_hash), merkle_proof)
+            except (KeyError, TypeError, ValueError):
+                pass
+
+    unique_roots = sorted(set(roots.values()))
+    by_root: Dict[str, AnchoredRecord] = {}
+    for start in range(0, len(unique_roots), QUERY_CHUNK):
+        for anchored in AnchoredRecord.objects.filter(merkle_root__in=unique_roots[start:start + QUERY_CHUNK]):
+            by_root.setdefault(anchored.merkle_root, anchored)
+    for position, root in roots.items():
+        if root in by_root:
+            found[position] = by_root[root]
+
+    return found
@@ -0,0 +1,171 @@
+"""
+IPFS Content Cache
+Content behind a CID never changes, so fetched objects are kept locally:
+a small in-memory LRU for hot records in front of a size-bounded directory
+on disk (IPFS_CACHE_DIR) with least-recently-used eviction.
+
+Only content that hashes back to its CID is cached, so neither tier can
+serve bytes a gateway altered.
+"""
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from .cid import cid_matches
+from .lru_cache import LRUCache
+from .cardano_config import (
+    IPFS_CACHE_DIR,
+    IPFS_CACHE_MAX_BYTES,
+    IPFS_CACHE_MEMORY_ENTRIES,
+    IPFS_CACHE_MEMORY_MAX_OBJECT,
+)
+
+
+def content_matches_cid(cid: str, content: bytes) -> bool:
+    """
+    True if content is what cid addresses (CIDv0, or base32 CIDv1 as
+    `ipfs add` builds it); other CIDs are reported as not matching.
+    """
+    return cid_matches(cid, content)
+
+
+class CIDCache:
+    """
+    Two-tier cache of verified IPFS content
+
+    Args:
+        directory: Directory for the disk tier (created on first write)
+        max_bytes: Disk tier budget; least recently used files are evicted beyond it
+        memory_entries: Objects kept in memory
+        memory_max_object: Larger objects are kept on disk only
+    """
+
+    def __init__(
+        self,
+        directory: str = IPFS_CACHE_DIR,
+        max_bytes: int = IPFS_CACHE_MAX_BYTES,
+        memory_entries: int = IPFS_CACHE_MEMORY_ENTRIES,
+        memory_max_object: int = IPFS_CACHE_MEMORY_MAX_OBJECT,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_max_object = memory_max_object
+        self._memory = LRUCache(memory_entries)
+        # cid -> size in access order; loaded from the directory on first use
+        self._index: "Optional[OrderedDict[str, int]]" = None
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def _path(self, cid: str) -> str:
+        return os.path.join(self.directory, cid[-2:], cid)
+
+    def _load_index(self):
+        """Scan the directory once, oldest access first (by mtime)"""
+        entries = []
+        if os.path.isdir(self.directory):
+            for shard in os.scandir(self.directory):
+                if shard.is_dir():
+                    for entry in os.scandir(shard.path):
+                        if entry.is_file() and not entry.name.startswith("."):
+                            stat = entry.stat()
+                            entries.append((stat.st_mtime, entry.name, stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((cid, size) for _, cid, size in entries)
+        self._total = sum(self._index.values())
+
+    def get(self, cid: str) -> Optional[bytes]:
+        found, content = self._memory.get(cid)
+        if found:
+            return content
+
+        with self._lock:
+            if self._index is None:
+                self._load_index()
+            if cid not in self._index:
+                return None
+            self._index.move_to_end(cid)
+
+        path = self._path(cid)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            os.utime(path)  # recency survives restarts
+        except OSError:
+            # Evicted by another worker sharing the directory
+            with self._lock:
+                self._total -= self._index.pop(cid, 0)
+            return None
+
+        if len(content) <= self.memory_max_object:
+            self._memory.set(cid, content)
+        return content
+
+    def put(self, cid: str, content: bytes):
+        """
+        Store content already verified against cid
+        """
+        if len(content) <= self.memory_max_object:
+            self._memory.set(cid, content)
+        if len(content) > self.max_bytes:
+            return
+
+        path = self._path(cid)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so readers in other workers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".")
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing IPFS cache entry {cid}: {e}")
+            return
+
+        with self._lock:
+            if self._index is None:
+                self._load_index()
+            else:
+                self._total -= self._index.pop(cid, 0)
+                self._index[cid] = len(content)
+                self._total += len(content)
+            evicted = []
+            while self._total > self.max_bytes and len(self._index) > 1:
+                old_cid, size = self._index.popitem(last=False)
+                self._total -= size
+                evicted.append(old_cid)
+
+        for old_cid in evicted:
+            try:
+                os.remove(self._path(old_cid))
+            except OSError:
+                pass
+
+    def clear_memory(self):
+        self._memory.clear()
+
+
+_cache: Optional[CIDCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cid_cache() -> CIDCache:
+    """
+    Process-wide cache used by fetch_from_ipfs
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CIDCache()
+    return _cache
+
+
+def set_cid_cache(cache: Optional[CIDCache]):
+    """
+    Replace the shared cache (e.g. to use a temporary directory)
+    """
+    global _cache
+    with _cache_lock:
+        _cache = cache
@@ -0,0 +1,235 @@
+"""
+IPFS Client
+Shared keep-alive session and retries for the local IPFS node API and the
+gateway, used by integration.ipfs_service and integration.async_ipfs_service
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from typing import Optional, Dict, List, Tuple, BinaryIO, Iterator
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from .async_http import get_async_client
+from .cardano_config import (
+    IPFS_API_URL,
+    IPFS_GATEWAY,
+    IPFS_POOL_SIZE,
+    IPFS_MAX_RETRIES,
+    IPFS_TIMEOUT,
+)
+
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+STREAM_CHUNK = 256 * 1024
+# CIDv0 and non-raw leaves, as compute_cid() assumes
+ADD_PARAMS = {"pin": "true", "cid-version": "0"}
+
+
+class IPFSError(Exception):
+    """The IPFS node answered, but not with the expected result"""
+
+
+def _parse_add_response(text: str) -> Dict[str, str]:
+    """{Name: Hash} from the NDJSON lines /add returns, one per file"""
+    added = {}
+    for line in text.splitlines():
+        if line.strip():
+            item = json.loads(line)
+            if item.get("Hash"):
+                added[item.get("Name", "")] = item["Hash"]
+    return added
+
+
+class IPFSClient:
+    """
+    Pooled IPFS node and gateway client
+
+    Args:
+        api_url: Node RPC root, e.g. http://127.0.0.1:5001/api/v0
+        gateway: Gateway prefix, e.g. https://ipfs.io/ipfs/
+        pool_size: Keep-alive connections kept open per host
+        max_retries: Retries for 5xx responses and connection errors
+        timeout: Per-request timeout in seconds
+    """
+
+    def __init__(
+        self,
+        api_url: str = IPFS_API_URL,
+        gateway: str = IPFS_GATEWAY,
+        pool_size: int = IPFS_POOL_SIZE,
+        max_retries: int = IPFS_MAX_RETRIES,
+        timeout: float = IPFS_TIMEOUT,
+    ):
+        self.api_url = api_url.rstrip("/")
+        self.gateway = gateway if gateway.endswith("/") else gateway + "/"
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(2.0, 0.1 * (2 ** attempt)))
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException:
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def _arequest(self, method: str, url: str, **kwargs) -> httpx.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        client = get_async_client()
+        attempt = 0
+        while True:
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def add_many(self, items: List[Tuple[str, bytes]]) -> Dict[str, str]:
+        """
+        Add and pin several objects with one /add call
+
+        Args:
+            items: (name, content) pairs; names must be unique within the call
+
+        Returns:
+            {name: CID returned by the node}
+
+        Raises:
+            requests.RequestException if the node is unreachable,
+            IPFSError if it answered with an error
+        """
+        files = [("file", (name, content, "application/octet-stream")) for name, content in items]
+        response = self._request("POST", f"{self.api_url}/add", params=ADD_PARAMS, files=files)
+        if response.status_code != 200:
+            raise IPFSError(f"IPFS add returned {response.status_code}: {response.text[:200]}")
+        return _parse_add_response(response.text)
+
+    def add(self, content: bytes, name: str = "file") -> str:
+        """
+        Add and pin one object
+
+        Returns:
+            CID returned by the node
+        """
+        added = self.add_many([(name, content)])
+        if name not in added:
+            raise IPFSError("IPFS add returned no hash")
+        return added[name]
+
+    def add_file(self, fileobj: BinaryIO, name: str = "file") -> str:
+        """
+        Add and pin one file, streaming it as a chunked multipart body so it
+        is never held in memory. Not retried (the pin queue retries).
+
+        Returns:
+            CID returned by the node
+        """
+        boundary = uuid.uuid4().hex
+
+        def body() -> Iterator[bytes]:
+            yield (
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="file"; filename="{name}"\r\n'
+                "Content-Type: application/octet-stream\r\n\r\n"
+            ).encode()
+            while True:
+                chunk = fileobj.read(STREAM_CHUNK)
+                if not chunk:
+                    break
+                yield chunk
+            yield f"\r\n--{boundary}--\r\n".encode()
+
+        response = self.session.post(
+            f"{self.api_url}/add",
+            params=ADD_PARAMS,
+            data=body(),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+            timeout=self.timeout,
+        )
+        if response.status_code != 200:
+            raise IPFSError(f"IPFS add returned {response.status_code}: {response.text[:200]}")
+        added = _parse_add_response(response.text)
+        if name not in added:
+            raise IPFSError("IPFS add returned no hash")
+        return added[name]
+
+    async def aadd(self, content: bytes, name: str = "file") -> str:
+        """
+        Async counterpart of add() on the shared async HTTP client
+        """
+        response = await self._arequest(
+            "POST",
+            f"{self.api_url}/add",
+            params=ADD_PARAMS,
+            files=[("file", (name, content, "application/octet-stream"))],
+        )
+        if response.status_code != 200:
+            raise IPFSError(f"IPFS add returned {response.status_code}: {response.text[:200]}")
+        added = _parse_add_response(response.text)
+        if name not in added:
+            raise IPFSError("IPFS add returned no hash")
+        return added[name]
+
+    def cat(self, cid: str) -> Optional[bytes]:
+        """
+        Content of a CID from the gateway, None if the gateway does not serve it
+        """
+        response = self._request("GET", f"{self.gateway}{cid}")
+        return response.content if response.status_code == 200 else None
+
+    async def acat(self, cid: str) -> Optional[bytes]:
+        """
+        Async counterpart of cat()
+        """
+        response = await self._arequest("GET", f"{self.gateway}{cid}")
+        return response.content if response.status_code == 200 else None
+
+
+_client: Optional[IPFSClient] = None
+_client_lock = threading.Lock()
+
+
+def get_ipfs_client() -> IPFSClient:
+    """
+    Process-wide client shared by all IPFS calls
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = IPFSClient()
+    return _client
+
+
+def set_ipfs_client(client: Optional[IPFSClient]):
+    """
+    Replace the shared client (e.g. to point at a local node or stub)
+    """
+    global _client
+    with _client_lock:
+        _client = client
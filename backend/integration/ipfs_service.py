@@ -1,69 +1,323 @@
 """
 IPFS Service for storing encrypted patient records
+
+Records are addressed by the CID computed locally (integration/cid.py), so
+content already pinned is not uploaded again, several small records can share
+one /add call, and a record uploaded while the node is down is queued in
+IPFSPin and pinned later by process_ipfs_pin_queue instead of being given a
+made-up hash.
+
+With a data key, records are AES-GCM encrypted (integration/encryption.py)
+before their CID is computed, so the node, the gateway and the local cache
+only ever hold ciphertext.
 """
 import json
+from datetime import timedelta
+from typing import Dict, Any, Optional, List, Tuple, Iterable
+
 import requests
-from typing import Dict, Any, Optional
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .cid import compute_cid
+from .models import IPFSPin
+from .ipfs_cache import get_cid_cache, content_matches_cid
+from .ipfs_client import get_ipfs_client, IPFSError
+from .encryption import (
+    encrypt_bytes,
+    decrypt_bytes,
+    is_encrypted,
+    unwrap_key,
+    EncryptingReader,
+    DecryptionError,
+)
+from .cardano_config import (
+    IPFS_API_URL,  # noqa: F401 (re-exported for existing imports)
+    IPFS_GATEWAY,  # noqa: F401
+    IPFS_ADD_BATCH_SIZE,
+    IPFS_PIN_MAX_ATTEMPTS,
+)
+
+PIN_LEASE_SECONDS = 300
+
 
-# IPFS Gateway URL (using public gateway for now, can be configured)
-IPFS_GATEWAY = "https://ipfs.io/ipfs/"
-IPFS_API_URL = "http://127.0.0.1:5001/api/v0"  # Local IPFS node API
+def serialize_record(data: Dict[str, Any]) -> bytes:
+    """
+    Bytes stored on IPFS for a record
+    """
+    return json.dumps(data, default=str).encode("utf-8")
+
+
+def seal_record(data: Dict[str, Any], key: Optional[bytes] = None) -> bytes:
+    """
+    Bytes uploaded for a record: serialized, then encrypted if a key is given
+    """
+    content = serialize_record(data)
+    return encrypt_bytes(key, content) if key is not None else content
 
-def upload_to_ipfs(data: Dict[str, Any], encrypt: bool = True) -> Optional[str]:
+
+def open_record(content: bytes, key: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+    """
+    Inverse of seal_record. Plaintext records (uploaded before encryption)
+    are returned as they are.
+
+    Raises:
+        DecryptionError if the content is encrypted under another key
+    """
+    if is_encrypted(content):
+        if key is None:
+            print("IPFS record is encrypted and no data key was given")
+            return None
+        content = decrypt_bytes(key, content)
+    return json.loads(content)
+
+
+def known_pinned(cids: Iterable[str]) -> set:
+    """
+    The subset of cids already pinned by us
+    """
+    return set(
+        IPFSPin.objects.filter(cid__in=list(cids), status=IPFSPin.STATUS_PINNED).values_list("cid", flat=True)
+    )
+
+
+def _mark_pinned(items: List[Tuple[str, bytes]], added: Dict[str, str]):
+    """
+    Record (local cid, content) pairs as pinned, given {local cid: node cid}
+    """
+    for cid, _ in items:
+        if added.get(cid) != cid:
+            print(f"IPFS node returned {added.get(cid)} for locally computed CID {cid}")
+    IPFSPin.objects.bulk_create(
+        [IPFSPin(cid=cid, size=len(content), status=IPFSPin.STATUS_PINNED) for cid, content in items],
+        ignore_conflicts=True,
+    )
+    IPFSPin.objects.filter(cid__in=[cid for cid, _ in items]).exclude(status=IPFSPin.STATUS_PINNED).update(
+        status=IPFSPin.STATUS_PINNED,
+        content=None,
+        last_error="",
+        pinned_at=timezone.now(),
+    )
+
+
+def _queue_pins(items: List[Tuple[str, bytes]], error: str):
+    """
+    Keep (cid, content) pairs the node could not take for process_pin_queue
+    """
+    IPFSPin.objects.bulk_create(
+        [
+            IPFSPin(cid=cid, size=len(content), content=content, last_error=error[:1000])
+            for cid, content in items
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _add_batch(items: List[Tuple[str, bytes]]) -> Optional[str]:
+    """
+    Upload (cid, content) pairs in one /add call and record them as pinned
+
+    Returns:
+        None on success, the error message if the node could not take them
+    """
+    try:
+        added = get_ipfs_client().add_many(items)
+    except (requests.RequestException, IPFSError, ValueError) as e:
+        return str(e) or e.__class__.__name__
+    missing = [cid for cid, _ in items if cid not in added]
+    if missing:
+        return f"IPFS add returned no hash for {len(missing)} objects"
+    _mark_pinned(items, added)
+    return None
+
+
+def upload_many_to_ipfs(
+    records: List[Dict[str, Any]],
+    keys: Optional[List[Optional[bytes]]] = None,
+) -> List[Optional[str]]:
+    """
+    upload_to_ipfs for many records: already-pinned content is skipped and the
+    rest goes to the node IPFS_ADD_BATCH_SIZE objects per /add call
+
+    Args:
+        records: Record dictionaries
+        keys: Data key per record (None entries are uploaded in plaintext)
+
+    Returns:
+        CIDs in the same order as records (None for records that failed to serialize)
+    """
+    keys = keys or [None] * len(records)
+    cids: List[Optional[str]] = []
+    pending: Dict[str, bytes] = {}
+    for data, key in zip(records, keys):
+        try:
+            content = seal_record(data, key)
+        except (TypeError, ValueError) as e:
+            print(f"Error serializing record for IPFS: {e}")
+            cids.append(None)
+            continue
+        cid = compute_cid(content)
+        cids.append(cid)
+        pending[cid] = content
+
+    for cid in known_pinned(pending):
+        del pending[cid]
+
+    # The content is known to match its CID, so later reads need no gateway
+    cache = get_cid_cache()
+    for cid, content in pending.items():
+        cache.put(cid, content)
+
+    items = list(pending.items())
+    for start in range(0, len(items), IPFS_ADD_BATCH_SIZE):
+        batch = items[start:start + IPFS_ADD_BATCH_SIZE]
+        error = _add_batch(batch)
+        if error:
+            print(f"IPFS node unavailable, queued {len(batch)} objects for pinning: {error}")
+            _queue_pins(batch, error)
+    return cids
+
+
+def upload_to_ipfs(data: Dict[str, Any], encrypt: bool = True, key: Optional[bytes] = None) -> Optional[str]:
     """
     Upload patient record data to IPFS
-    
+
     Args:
         data: Patient record data dictionary
-        encrypt: Whether to encrypt the data (placeholder for encryption)
-    
+        encrypt: Whether to encrypt the data
+        key: The patient's data key (encryption.get_data_key), required if encrypt
+
     Returns:
-        IPFS hash (CID) if successful, None otherwise
+        IPFS hash (CID) if successful, None otherwise. The CID is computed
+        locally, so it is returned even when the upload had to be queued.
     """
     try:
-        # For now, we'll use a simple JSON upload
-        # In production, you'd want to encrypt the data before uploading
-        json_data = json.dumps(data, default=str)
-        
-        # Try to use local IPFS node first
-        try:
-            response = requests.post(
-                f"{IPFS_API_URL}/add",
-                files={"file": json_data.encode('utf-8')},
-                timeout=10
-            )
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("Hash")
-        except requests.exceptions.RequestException:
-            # Fallback: return a mock hash for development
-            # In production, you'd want proper IPFS setup
-            import hashlib
-            hash_obj = hashlib.sha256(json_data.encode()).hexdigest()
-            return f"Qm{hash_obj[:44]}"  # Mock IPFS hash format
-        
-        return None
+        if encrypt and key is None:
+            raise ValueError("encrypt=True needs the patient's data key")
+        return upload_many_to_ipfs([data], [key if encrypt else None])[0]
     except Exception as e:
         print(f"Error uploading to IPFS: {e}")
         return None
 
-def fetch_from_ipfs(ipfs_hash: str) -> Optional[Dict[str, Any]]:
+
+def claim_due_pins(batch_size: int) -> List[IPFSPin]:
+    """
+    Claim queued pins that are due, leasing them like the Cardano outbox does
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=PIN_LEASE_SECONDS)
+    candidates = list(
+        IPFSPin.objects.filter(status=IPFSPin.STATUS_QUEUED, next_attempt_at__lte=now)
+        .select_related("data_key")
+        .order_by("next_attempt_at")[:batch_size]
+    )
+    claimed = []
+    for pin in candidates:
+        if IPFSPin.objects.filter(id=pin.id, next_attempt_at=pin.next_attempt_at).update(next_attempt_at=lease_until):
+            claimed.append(pin)
+    return claimed
+
+
+def _add_stored_file(pin: IPFSPin) -> Optional[str]:
+    """
+    Stream a queued file from default_storage to the node
+
+    Returns:
+        None on success, the error message otherwise
+    """
+    try:
+        with default_storage.open(pin.storage_path, "rb") as f:
+            if pin.data_key_id:
+                key = unwrap_key(pin.data_key.wrapped_key, pin.data_key.subject)
+                f = EncryptingReader(key, f, nonce_prefix=bytes(pin.nonce_prefix))
+            node_cid = get_ipfs_client().add_file(f, name=pin.cid)
+    except (OSError, requests.RequestException, IPFSError, ValueError, DecryptionError) as e:
+        return str(e) or e.__class__.__name__
+    _mark_pinned([(pin.cid, b"")], {pin.cid: node_cid})
+    return None
+
+
+def _reschedule_pins(pins: List[IPFSPin], error: str):
+    from .outbox import compute_backoff
+
+    for pin in pins:
+        pin.attempts += 1
+        pin.last_error = error[:1000]
+        if pin.attempts >= IPFS_PIN_MAX_ATTEMPTS:
+            pin.status = IPFSPin.STATUS_FAILED
+        else:
+            pin.next_attempt_at = timezone.now() + timedelta(seconds=compute_backoff(pin.attempts))
+    IPFSPin.objects.bulk_update(pins, ["attempts", "last_error", "status", "next_attempt_at"])
+
+
+def process_pin_queue(batch_size: int = IPFS_ADD_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Upload one batch of queued pins: stored content goes in a single /add
+    call, files are streamed from storage one per call
+
+    Returns:
+        Counts of processed, pinned and rescheduled-or-failed entries
+    """
+    pins = claim_due_pins(batch_size)
+    failed = 0
+
+    files = [pin for pin in pins if pin.storage_path]
+    for pin in files:
+        error = _add_stored_file(pin)
+        if error:
+            _reschedule_pins([pin], error)
+            failed += 1
+
+    blobs = [pin for pin in pins if not pin.storage_path]
+    if blobs:
+        error = _add_batch([(pin.cid, bytes(pin.content or b"")) for pin in blobs])
+        if error:
+            _reschedule_pins(blobs, error)
+            failed += len(blobs)
+
+    return {"processed": len(pins), "pinned": len(pins) - failed, "failed": failed}
+
+
+def _accept_fetched(ipfs_hash: str, content: Optional[bytes]) -> Optional[bytes]:
+    """
+    Cache content fetched from the gateway if it matches its CID. Content
+    that does not match, or whose CID cannot be checked locally, is dropped.
+    """
+    if content is None:
+        return None
+    if content_matches_cid(ipfs_hash, content):
+        get_cid_cache().put(ipfs_hash, content)
+        return content
+    print(f"IPFS gateway returned content that does not match {ipfs_hash}")
+    return None
+
+
+def fetch_ipfs_content(ipfs_hash: str) -> Optional[bytes]:
+    """
+    Bytes behind a CID: memory tier, then the disk cache, then the gateway
+    """
+    content = get_cid_cache().get(ipfs_hash)
+    if content is not None:
+        return content
+    return _accept_fetched(ipfs_hash, get_ipfs_client().cat(ipfs_hash))
+
+
+def fetch_from_ipfs(ipfs_hash: str, key: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
     """
     Fetch patient record data from IPFS
-    
+
     Args:
         ipfs_hash: IPFS hash (CID) of the record
-    
+        key: The patient's data key, for encrypted records
+
     Returns:
         Patient record data dictionary if successful, None otherwise
     """
     try:
-        # Try to fetch from IPFS gateway
-        response = requests.get(f"{IPFS_GATEWAY}{ipfs_hash}", timeout=10)
-        if response.status_code == 200:
-            return response.json()
+        content = fetch_ipfs_content(ipfs_hash)
+        if content is not None:
+            return open_record(content, key)
         return None
     except Exception as e:
         print(f"Error fetching from IPFS: {e}")
         return None
-
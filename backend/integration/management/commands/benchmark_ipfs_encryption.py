@@ -0,0 +1,96 @@
+import io
+import os
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from integration.cid import CIDBuilder, compute_cid
+from integration.encryption import encrypt_stream, decrypt_stream, encrypt_bytes
+from integration.ipfs_client import get_ipfs_client
+from integration.ipfs_service import seal_record
+from integration.cardano_config import IPFS_ENCRYPTION_CHUNK_SIZE
+
+from .benchmark_record_hashing import synthetic_record
+
+
+def best_of(repeat, run):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def stream_cid(chunks):
+    builder = CIDBuilder()
+    for chunk in chunks:
+        builder.update(chunk)
+    return builder.cid()
+
+
+def read_chunks(src, size):
+    while True:
+        chunk = src.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = "Measure what AES-GCM encryption adds to IPFS uploads, for records and streamed files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--records", type=int, default=2000)
+        parser.add_argument("--visits", type=int, default=10, help="Visits per synthetic record (record size)")
+        parser.add_argument("--file-mb", type=int, default=64, help="Size of the streamed file")
+        parser.add_argument("--chunk-size", type=int, default=IPFS_ENCRYPTION_CHUNK_SIZE)
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per variant; the best is reported")
+        parser.add_argument("--ipfs", action="store_true", help="Also time real /add calls against IPFS_API_URL")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def report(self, name, seconds, megabytes, baseline=None, count=None):
+        line = f"{name:<34} {megabytes / seconds:>9.1f} MB/s"
+        if count:
+            line += f" {seconds / count * 1000:>8.3f} ms/item"
+        if baseline:
+            line += f"  (+{(seconds - baseline) / baseline * 100:.1f}% vs plaintext)"
+        self.stdout.write(line)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        key = os.urandom(32)
+        chunk_size = options["chunk_size"]
+        repeat = options["repeat"]
+
+        records = [synthetic_record(rng, index, options["visits"]) for index in range(options["records"])]
+        megabytes = sum(len(seal_record(record)) for record in records) / 1e6
+        self.stdout.write(f"{len(records)} records, {megabytes:.1f} MB of JSON")
+        plain = best_of(repeat, lambda: [compute_cid(seal_record(record)) for record in records])
+        sealed = best_of(repeat, lambda: [compute_cid(seal_record(record, key)) for record in records])
+        self.report("record: serialize + CID", plain, megabytes, count=len(records))
+        self.report("record: serialize + encrypt + CID", sealed, megabytes, plain, count=len(records))
+
+        data = os.urandom(options["file_mb"] * 1024 * 1024)
+        megabytes = len(data) / 1e6
+        self.stdout.write(f"{options['file_mb']} MiB file, {chunk_size // 1024} KiB chunks")
+        plain = best_of(repeat, lambda: stream_cid(read_chunks(io.BytesIO(data), chunk_size)))
+        sealed = best_of(repeat, lambda: stream_cid(encrypt_stream(key, io.BytesIO(data), chunk_size)))
+        self.report("file: stream CID", plain, megabytes)
+        self.report("file: stream encrypt + CID", sealed, megabytes, plain)
+        ciphertext = encrypt_bytes(key, data, chunk_size)
+        opened = best_of(repeat, lambda: sum(len(chunk) for chunk in decrypt_stream(key, io.BytesIO(ciphertext))))
+        self.report("file: stream decrypt", opened, megabytes)
+
+        if options["ipfs"]:
+            # Encrypted uploads never dedup against each other (random nonces),
+            # so both variants upload fresh content every time
+            client = get_ipfs_client()
+            sample = records[:200]
+            plain = best_of(1, lambda: [client.add(seal_record(dict(record, nonce=rng.random()))) for record in sample])
+            sealed = best_of(1, lambda: [client.add(seal_record(record, key)) for record in sample])
+            megabytes = sum(len(seal_record(record)) for record in sample) / 1e6
+            self.report("IPFS /add: plaintext record", plain, megabytes, count=len(sample))
+            self.report("IPFS /add: encrypted record", sealed, megabytes, plain, count=len(sample))
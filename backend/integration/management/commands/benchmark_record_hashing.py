@@ -0,0 +1,72 @@
+import hashlib
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from integration.record_hashing import hash_record, hash_records_bulk, HASH_BULK_WORKERS
+
+
+def legacy_hash(record):
+    """hash_record_data before the canonical encoder"""
+    return hashlib.sha256(json.dumps(record, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def synthetic_record(rng: random.Random, index: int, visits: int):
+    return {
+        "patient_id": f"PAT-{index:08d}",
+        "full_name": f"Patient {index}",
+        "age": rng.randrange(1, 95),
+        "gender": rng.choice(["male", "female"]),
+        "condition": rng.choice(["Malaria", "Hypertension", "Diabetes", None]),
+        "notes": "x" * rng.randrange(20, 400),
+        "created_at": "2025-01-01T00:00:00+00:00",
+        "vitals": {"weight": rng.randrange(30, 120), "temperature": round(rng.uniform(35.5, 40.0), 1)},
+        "visits": [
+            {
+                "summary": "Follow-up visit " * rng.randrange(1, 8),
+                "diagnosis": rng.choice(["Malaria", "Typhoid", "Flu"]),
+                "created_at": f"2025-01-{day % 28 + 1:02d}T10:00:00Z",
+                "medications": [{"drug_name": "ACT", "dosage": "2x daily", "duration": "3 days"}],
+            }
+            for day in range(visits)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = "Compare record hashing throughput: legacy json.dumps, canonical, and canonical bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--records", type=int, default=20000)
+        parser.add_argument("--visits", type=int, default=10, help="Visits per synthetic record (record size)")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per variant; the best is reported")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        records = [synthetic_record(rng, index, options["visits"]) for index in range(options["records"])]
+        megabytes = sum(len(json.dumps(record)) for record in records) / 1e6
+        self.stdout.write(
+            f"{len(records)} records, {megabytes:.1f} MB of JSON, {HASH_BULK_WORKERS} bulk workers"
+        )
+
+        variants = [
+            ("legacy json.dumps", lambda: [legacy_hash(record) for record in records]),
+            ("canonical hash_record", lambda: [hash_record(record) for record in records]),
+            ("canonical hash_records_bulk", lambda: hash_records_bulk(records)),
+        ]
+        baseline = None
+        for name, run in variants:
+            best = None
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            baseline = baseline or best
+            self.stdout.write(
+                f"{name:<30} {len(records) / best:>10,.0f} records/s {megabytes / best:>8.1f} MB/s "
+                f"({baseline / best:.2f}x legacy)"
+            )
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from integration.indexer import run_indexer, PAGE_SIZE
+
+
+class Command(BaseCommand):
+    help = "Index label-674 record anchors from Blockfrost into AnchoredRecord, resuming from the stored cursor"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=PAGE_SIZE, help="Items requested per Blockfrost page")
+        parser.add_argument("--follow", action="store_true", help="Keep polling for new anchors")
+        parser.add_argument("--poll-interval", type=float, default=20.0, help="Seconds between polls when following")
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                totals = run_indexer(page_size=options["page_size"])
+                if totals["fetched"] or not options["follow"]:
+                    self.stdout.write(
+                        f"Read {totals['fetched']} label-674 transactions over {totals['pages']} pages, "
+                        f"indexed {totals['indexed']} anchors"
+                    )
+            except Exception as e:
+                if not options["follow"]:
+                    raise
+                self.stderr.write(f"Indexer error: {e}")
+
+            if not options["follow"]:
+                break
+            time.sleep(options["poll_interval"])
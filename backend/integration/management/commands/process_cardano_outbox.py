@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from integration.outbox import drain_outbox
+from integration.circuit_breaker import cardano_service_breaker, save_breaker_state
+from integration.anchor_batching import anchor_pending_records
+from integration.mint_batching import aggregate_pending_mints
+from integration.cardano_config import CARDANO_ANCHOR_MODE, CARDANO_MINT_MODE
+
+
+class Command(BaseCommand):
+    help = "Drain the Cardano outbox: submit queued records and CarePoints mints with retries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50, help="Entries claimed per batch")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to sleep when the outbox is idle")
+        parser.add_argument("--once", action="store_true", help="Process due entries once and exit")
+        parser.add_argument(
+            "--flush-anchor-batches",
+            action="store_true",
+            help="In batch anchor mode, seal partial Merkle batches without waiting",
+        )
+        parser.add_argument(
+            "--flush-mint-batches",
+            action="store_true",
+            help="In batch mint mode, aggregate pending CarePoints without waiting for the window",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        poll_interval = options["poll_interval"]
+
+        while True:
+            if CARDANO_ANCHOR_MODE == "batch":
+                for batch in anchor_pending_records(force=options["flush_anchor_batches"]):
+                    self.stdout.write(f"Sealed anchor batch {batch.merkle_root} ({batch.record_count} records)")
+
+            if CARDANO_MINT_MODE == "batch":
+                for batch in aggregate_pending_mints(force=options["flush_mint_batches"]):
+                    self.stdout.write(
+                        f"Sealed mint batch {batch.id} ({batch.total_amount} CP to {len(batch.outputs)} addresses)"
+                    )
+
+            stats = drain_outbox(batch_size=batch_size)
+            # This worker makes the Cardano service calls, so its breaker is the one to report
+            save_breaker_state(cardano_service_breaker)
+            if stats["processed"]:
+                self.stdout.write(
+                    f"Processed {stats['processed']} outbox entries "
+                    f"({stats['succeeded']} succeeded, {stats['failed']} rescheduled or failed)"
+                )
+
+            if options["once"]:
+                if stats["processed"] < batch_size:
+                    break
+                continue
+
+            if stats["processed"] < batch_size:
+                time.sleep(poll_interval)
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from integration.ipfs_service import process_pin_queue
+from integration.cardano_config import IPFS_ADD_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Upload and pin IPFS content that was queued while the node was unavailable"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=IPFS_ADD_BATCH_SIZE, help="Objects per /add call")
+        parser.add_argument("--poll-interval", type=float, default=10.0, help="Seconds to sleep when the queue is idle")
+        parser.add_argument("--once", action="store_true", help="Process due entries once and exit")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        while True:
+            stats = process_pin_queue(batch_size=batch_size)
+            if stats["processed"]:
+                self.stdout.write(
+                    f"Processed {stats['processed']} queued pins "
+                    f"({stats['pinned']} pinned, {stats['failed']} rescheduled or failed)"
+                )
+
+            if stats["processed"] < batch_size:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
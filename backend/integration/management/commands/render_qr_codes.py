@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from integration.qr_codes import QR_FORMATS, prerender_qr, qr_payload, refresh_qr_digest, validate_variant
+from patients.config import QR_PNG_SIZES
+from patients.models import PatientProfile
+
+
+class Command(BaseCommand):
+    help = "Render patient QR images ahead of the first request (they are rendered lazily otherwise)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--formats", default=",".join(QR_FORMATS), help="Comma-separated: png,svg")
+        parser.add_argument(
+            "--sizes", default=",".join(str(size) for size in QR_PNG_SIZES), help="Comma-separated PNG sizes"
+        )
+        parser.add_argument("--patient-id", type=int, action="append", help="Only these patients (repeatable)")
+
+    def handle(self, *args, **options):
+        formats = [fmt.strip() for fmt in options["formats"].split(",") if fmt.strip()]
+        sizes = [int(size) for size in options["sizes"].split(",") if size.strip()]
+        variants = [("svg", 0)] if "svg" in formats else []
+        variants += [("png", size) for size in sizes if "png" in formats]
+        for fmt, size in variants:
+            error = validate_variant(fmt, size)
+            if error:
+                raise CommandError(error)
+        unknown = set(formats) - set(QR_FORMATS)
+        if unknown:
+            raise CommandError(f"Unknown format: {', '.join(sorted(unknown))}")
+
+        patients = PatientProfile.objects.order_by("id")
+        if options["patient_id"]:
+            patients = patients.filter(id__in=options["patient_id"])
+
+        started = time.perf_counter()
+        count = rendered = 0
+        for patient in patients.iterator(chunk_size=500):
+            refresh_qr_digest(patient)
+            rendered += prerender_qr(qr_payload(patient), variants)
+            count += 1
+        self.stdout.write(
+            f"Rendered {rendered} QR images for {count} patients in {time.perf_counter() - started:.1f}s"
+        )
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from integration.simulator import ChainSimulator, FaultConfig, start_simulator
+
+
+class Command(BaseCommand):
+    help = "Run a local Cardano service + Blockfrost simulator for offline load tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=3100)
+        parser.add_argument("--block-time", type=float, default=20.0, help="Seconds between blocks")
+        parser.add_argument("--block-size", type=int, default=300, help="Maximum transactions per block")
+        parser.add_argument("--seed", type=int, default=None, help="Seed for injected latency and faults")
+        parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean added latency per request")
+        parser.add_argument("--jitter-ms", type=float, default=0.0, help="Standard deviation of added latency")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+        parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+        parser.add_argument("--hang-rate", type=float, default=0.0, help="Fraction of requests that hang")
+        parser.add_argument("--hang-seconds", type=float, default=65.0, help="How long a hung request is held")
+        parser.add_argument("--verbose", action="store_true", help="Log every request")
+
+    def handle(self, *args, **options):
+        chain = ChainSimulator(
+            block_time=options["block_time"],
+            block_size=options["block_size"],
+            seed=options["seed"],
+            faults=FaultConfig(
+                latency_ms=options["latency_ms"],
+                jitter_ms=options["jitter_ms"],
+                error_rate=options["error_rate"],
+                throttle_rate=options["throttle_rate"],
+                hang_rate=options["hang_rate"],
+                hang_seconds=options["hang_seconds"],
+            ),
+        )
+        server, chain = start_simulator(options["host"], options["port"], chain, verbose=options["verbose"])
+        url = f"http://{options['host']}:{server.server_address[1]}"
+        self.stdout.write(f"Cardano simulator listening on {url} (block every {options['block_time']}s)")
+        self.stdout.write(f"  CARDANO_SERVICE_URL={url}")
+        self.stdout.write(f"  BLOCKFROST_URL={url}/api/v0")
+
+        try:
+            while True:
+                time.sleep(options["block_time"])
+                status = chain.status()
+                self.stdout.write(f"Height {status['height']}, mempool {status['mempool']}")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            chain.stop()
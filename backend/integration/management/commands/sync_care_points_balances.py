@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from integration.balance_sync import sync_care_points_balances
+from integration.cardano_config import (
+    CAREPOINTS_SYNC_INTERVAL,
+    CAREPOINTS_SYNC_BATCH_SIZE,
+    CAREPOINTS_SYNC_CONCURRENCY,
+)
+
+
+class Command(BaseCommand):
+    help = "Refresh doctors' CarePoints balances from Cardano"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=CAREPOINTS_SYNC_BATCH_SIZE, help="Doctors written per batch")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=CAREPOINTS_SYNC_CONCURRENCY,
+            help="Blockfrost balance lookups in flight at once",
+        )
+        parser.add_argument("--follow", action="store_true", help="Keep syncing every --interval seconds")
+        parser.add_argument("--interval", type=float, default=CAREPOINTS_SYNC_INTERVAL, help="Seconds between sync runs")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            stats = sync_care_points_balances(
+                batch_size=options["batch_size"],
+                concurrency=options["concurrency"],
+            )
+            self.stdout.write(
+                f"Synced {stats['synced']} CarePoints balances ({stats['updated']} updated) "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+
+            if not options["follow"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,107 @@
+"""
+Merkle trees for batched record anchoring
+Lets one Cardano transaction anchor many record hashes at once
+"""
+import hashlib
+from typing import Dict, List, Tuple
+
+# Domain separation so a leaf can never be passed off as an inner node
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def _strip_hex(value: str) -> str:
+    return value[2:] if value.startswith("0x") else value
+
+
+def merkle_leaf(patient_id: str, record_hash: str) -> str:
+    """
+    Leaf hash binding a record hash to its patient ID
+
+    Args:
+        patient_id: Patient ID string (health_id)
+        record_hash: SHA-256 hash of record (hex string)
+
+    Returns:
+        Hexadecimal leaf hash
+    """
+    data = LEAF_PREFIX + patient_id.encode("utf-8") + b"\x00" + bytes.fromhex(_strip_hex(record_hash))
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hash_pair(left: str, right: str) -> str:
+    return hashlib.sha256(NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def build_merkle_tree(leaves: List[str]) -> Tuple[str, List[List[Dict[str, str]]]]:
+    """
+    Build a Merkle tree over leaf hashes
+
+    An odd node at the end of a level is promoted unchanged to the next level,
+    so proofs never contain duplicated siblings.
+
+    Args:
+        leaves: Leaf hashes (hex strings), in batch order
+
+    Returns:
+        Tuple of (root hash, inclusion proof for each leaf). Each proof is a list
+        of {"hash": sibling, "position": "left" | "right"} from leaf to root.
+    """
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+
+    proofs: List[List[Dict[str, str]]] = [[] for _ in leaves]
+    # positions[i] holds the leaf indexes covered by node i of the current level
+    level = list(leaves)
+    positions = [[i] for i in range(len(leaves))]
+
+    while len(level) > 1:
+        next_level = []
+        next_positions = []
+        for i in range(0, len(level), 2):
+            if i + 1 == len(level):
+                next_level.append(level[i])
+                next_positions.append(positions[i])
+                continue
+            left, right = level[i], level[i + 1]
+            for leaf_index in positions[i]:
+                proofs[leaf_index].append({"hash": right, "position": "right"})
+            for leaf_index in positions[i + 1]:
+                proofs[leaf_index].append({"hash": left, "position": "left"})
+            next_level.append(_hash_pair(left, right))
+            next_positions.append(positions[i] + positions[i + 1])
+        level = next_level
+        positions = next_positions
+
+    return level[0], proofs
+
+
+def compute_merkle_root(leaf: str, proof: List[Dict[str, str]]) -> str:
+    """
+    Fold an inclusion proof back up to the root it commits to
+    """
+    current = leaf
+    for step in proof:
+        if step.get("position") == "left":
+            current = _hash_pair(step["hash"], current)
+        else:
+            current = _hash_pair(current, step["hash"])
+    return current
+
+
+def verify_merkle_proof(leaf: str, proof: List[Dict[str, str]], root: str) -> bool:
+    """
+    Check that a leaf is included under a Merkle root
+
+    Args:
+        leaf: Leaf hash from merkle_leaf()
+        proof: Inclusion proof from build_merkle_tree()
+        root: Merkle root anchored on-chain
+
+    Returns:
+        True if the proof folds up to the root
+    """
+    try:
+        return compute_merkle_root(leaf, proof or []) == _strip_hex(root)
+    except (KeyError, TypeError, ValueError):
+        return False
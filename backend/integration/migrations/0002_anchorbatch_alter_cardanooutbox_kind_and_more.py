@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnchorBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('merkle_root', models.CharField(max_length=64, unique=True)),
+                ('record_count', models.IntegerField()),
+                ('issuer_id', models.CharField(max_length=64)),
+                ('cardano_tx_hash', models.CharField(blank=True, max_length=128, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='cardanooutbox',
+            name='kind',
+            field=models.CharField(choices=[('submit_record', 'Submit Record'), ('mint_care_points', 'Mint CarePoints'), ('anchor_batch', 'Anchor Merkle Batch')], max_length=32),
+        ),
+        migrations.AddField(
+            model_name='cardanooutbox',
+            name='anchor_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cardano_outbox_entries', to='integration.anchorbatch'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0002_anchorbatch_alter_cardanooutbox_kind_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MintBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('outputs', models.JSONField(default=list, help_text='List of {address, amount} outputs, one per receiving address')),
+                ('total_amount', models.IntegerField()),
+                ('cardano_tx_hash', models.CharField(blank=True, max_length=128, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='cardanooutbox',
+            name='kind',
+            field=models.CharField(choices=[('submit_record', 'Submit Record'), ('mint_care_points', 'Mint CarePoints'), ('anchor_batch', 'Anchor Merkle Batch'), ('mint_batch', 'Mint CarePoints Batch')], max_length=32),
+        ),
+        migrations.AddField(
+            model_name='cardanooutbox',
+            name='mint_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cardano_outbox_entries', to='integration.mintbatch'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0003_mintbatch_alter_cardanooutbox_kind_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CardanoTxCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tx_hash', models.CharField(max_length=128, unique=True)),
+                ('tx_data', models.JSONField(default=dict)),
+                ('metadata', models.JSONField(blank=True, help_text='Label 674 (CIP-20) metadata, if the transaction carries any', null=True)),
+                ('block_height', models.IntegerField(blank=True, null=True)),
+                ('cached_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
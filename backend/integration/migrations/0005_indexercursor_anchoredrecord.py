@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0004_cardanotxcache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexerCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('page', models.IntegerField(default=1)),
+                ('position', models.IntegerField(default=0, help_text='Items already consumed from the current (partial) page')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnchoredRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tx_hash', models.CharField(max_length=128, unique=True)),
+                ('record_hash', models.CharField(blank=True, max_length=128)),
+                ('patient_id', models.CharField(blank=True, max_length=64)),
+                ('merkle_root', models.CharField(blank=True, help_text='Set instead of record_hash/patient_id for Merkle batch anchors', max_length=64)),
+                ('issuer_id', models.CharField(blank=True, max_length=64)),
+                ('issued_at', models.BigIntegerField(blank=True, null=True)),
+                ('indexed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['record_hash', 'patient_id'], name='integration_record__a75c50_idx'), models.Index(fields=['patient_id'], name='integration_patient_0cbf04_idx'), models.Index(fields=['merkle_root'], name='integration_merkle__a577a3_idx')],
+            },
+        ),
+    ]
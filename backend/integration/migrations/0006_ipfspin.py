@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0005_indexercursor_anchoredrecord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IPFSPin',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cid', models.CharField(max_length=128, unique=True)),
+                ('size', models.BigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('pinned', 'Pinned'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('content', models.BinaryField(blank=True, help_text='Bytes to upload while queued; cleared once pinned', null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('pinned_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='integration_status_809b75_idx')],
+            },
+        ),
+    ]
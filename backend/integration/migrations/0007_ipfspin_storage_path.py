@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0006_ipfspin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ipfspin',
+            name='storage_path',
+            field=models.CharField(blank=True, help_text='For files: default_storage path streamed to the node instead of content', max_length=255),
+        ),
+    ]
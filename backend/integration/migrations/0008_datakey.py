@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0007_ipfspin_storage_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(help_text='Patient health ID', max_length=64, unique=True)),
+                ('wrapped_key', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ipfspin',
+            name='nonce_prefix',
+            field=models.BinaryField(blank=True, help_text='Nonce prefix that reproduces the ciphertext the CID was computed from', null=True),
+        ),
+        migrations.AddField(
+            model_name='ipfspin',
+            name='data_key',
+            field=models.ForeignKey(blank=True, help_text='For files: key the file is encrypted with on its way to the node', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ipfs_pins', to='integration.datakey'),
+        ),
+    ]
@@ -0,0 +1,140 @@
+"""
+Aggregated CarePoints minting
+Collects pending CarePointsTransaction rows per cardano_address and pays them
+out with one multi-output mint per window (CARDANO_MINT_MODE=batch).
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import MintBatch
+from .outbox import enqueue_mint_batch
+from .cardano_config import CARDANO_MINT_WINDOW, CARDANO_MINT_BATCH_SINCE, CAREPOINTS_MAX_MINT
+
+
+class MintBatchConflict(Exception):
+    """Another worker sealed one of the transactions first"""
+
+
+def mint_batch_since() -> Optional[datetime]:
+    """
+    CARDANO_MINT_BATCH_SINCE as an aware datetime, None if unset or invalid
+    """
+    since = parse_datetime(CARDANO_MINT_BATCH_SINCE) if CARDANO_MINT_BATCH_SINCE else None
+    if since is not None and timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def pending_mint_transactions(since: datetime):
+    """
+    CarePointsTransaction rows created since batch mode was enabled and not
+    yet minted or queued for minting
+    """
+    from doctors.models import CarePointsTransaction
+    return CarePointsTransaction.objects.filter(
+        created_at__gte=since,
+        cardano_tx_hash__isnull=True,
+        mint_batch__isnull=True,
+        cardano_outbox_entries__isnull=True,
+        doctor__cardano_address__isnull=False,
+    ).exclude(doctor__cardano_address="").order_by("id")
+
+
+def pack_mint_batches(transactions, cap: int = CAREPOINTS_MAX_MINT) -> List[list]:
+    """
+    Split transactions into groups whose total stays within the per-mint cap.
+    Rows for the same address are kept together where they fit.
+    """
+    groups = []
+    current = []
+    current_total = 0
+    for tx in sorted(transactions, key=lambda t: (t.doctor.cardano_address, t.id)):
+        if current and current_total + tx.amount > cap:
+            groups.append(current)
+            current = []
+            current_total = 0
+        current.append(tx)
+        current_total += tx.amount
+    if current:
+        groups.append(current)
+    return groups
+
+
+def seal_mint_batch(transactions) -> MintBatch:
+    """
+    Aggregate transactions into one MintBatch (one output per address) and
+    queue it on the Cardano outbox
+
+    Args:
+        transactions: CarePointsTransaction rows with doctor preloaded
+
+    Returns:
+        The new MintBatch
+    """
+    from doctors.models import CarePointsTransaction
+
+    amounts: Dict[str, int] = {}
+    for tx in transactions:
+        address = tx.doctor.cardano_address
+        amounts[address] = amounts.get(address, 0) + tx.amount
+    outputs = [{"address": address, "amount": amount} for address, amount in amounts.items()]
+
+    with transaction.atomic():
+        batch = MintBatch.objects.create(
+            outputs=outputs,
+            total_amount=sum(amounts.values()),
+        )
+        ids = [tx.id for tx in transactions]
+        updated = CarePointsTransaction.objects.filter(
+            id__in=ids,
+            mint_batch__isnull=True,
+        ).update(mint_batch=batch)
+        if updated != len(ids):
+            raise MintBatchConflict(f"{len(ids) - updated} transactions already belong to a batch")
+        enqueue_mint_batch(batch)
+    return batch
+
+
+def aggregate_pending_mints(window: int = CARDANO_MINT_WINDOW, force: bool = False) -> List[MintBatch]:
+    """
+    Once the oldest pending transaction has waited a full window (or
+    immediately with force), seal every pending transaction into mint batches
+
+    Returns:
+        Batches sealed during this call
+    """
+    since = mint_batch_since()
+    if since is None:
+        print("CARDANO_MINT_BATCH_SINCE is not set to a valid datetime; not minting in batch mode")
+        return []
+
+    pending = list(
+        pending_mint_transactions(since).select_related("doctor").only(
+            "id", "amount", "created_at", "doctor__cardano_address"
+        )
+    )
+    if not pending:
+        return []
+
+    oldest = min(tx.created_at for tx in pending)
+    if not force and timezone.now() - oldest < timedelta(seconds=window):
+        return []
+
+    mintable = []
+    for tx in pending:
+        if 1 <= tx.amount <= CAREPOINTS_MAX_MINT:
+            mintable.append(tx)
+        else:
+            print(f"Skipping CarePoints transaction {tx.id}: amount {tx.amount} cannot be minted")
+
+    batches = []
+    for group in pack_mint_batches(mintable):
+        try:
+            batches.append(seal_mint_batch(group))
+        except MintBatchConflict as e:
+            print(f"Skipping mint batch: {e}")
+    return batches
@@ -0,0 +1,278 @@
+from django.db import models
+from django.utils import timezone
+
+
+class AnchorBatch(models.Model):
+    """
+    A Merkle tree over many record hashes, anchored on-chain by its root.
+    Each covered PatientProfile stores its inclusion proof.
+    """
+    merkle_root = models.CharField(max_length=64, unique=True)
+    record_count = models.IntegerField()
+    issuer_id = models.CharField(max_length=64)
+    cardano_tx_hash = models.CharField(max_length=128, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"AnchorBatch {self.id} ({self.record_count} records)"
+
+
+class MintBatch(models.Model):
+    """
+    One multi-output CarePoints mint covering many CarePointsTransaction rows
+    """
+    outputs = models.JSONField(
+        default=list,
+        help_text="List of {address, amount} outputs, one per receiving address"
+    )
+    total_amount = models.IntegerField()
+    cardano_tx_hash = models.CharField(max_length=128, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"MintBatch {self.id} ({self.total_amount} CP to {len(self.outputs)} addresses)"
+
+
+class CardanoOutbox(models.Model):
+    """
+    Durable queue of chain calls. Views write rows here in the same
+    transaction as their local changes; the outbox worker drains them.
+    """
+    KIND_SUBMIT_RECORD = "submit_record"
+    KIND_MINT_CARE_POINTS = "mint_care_points"
+    KIND_ANCHOR_BATCH = "anchor_batch"
+    KIND_MINT_BATCH = "mint_batch"
+
+    KIND_CHOICES = [
+        (KIND_SUBMIT_RECORD, "Submit Record"),
+        (KIND_MINT_CARE_POINTS, "Mint CarePoints"),
+        (KIND_ANCHOR_BATCH, "Anchor Merkle Batch"),
+        (KIND_MINT_BATCH, "Mint CarePoints Batch"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_PROCESSING = "processing"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_PROCESSING, "Processing"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    idempotency_key = models.CharField(
+        max_length=128,
+        unique=True,
+        help_text="Forwarded to the Cardano service so retries are not submitted twice"
+    )
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING
+    )
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Earliest time the worker may (re)try this entry"
+    )
+    last_error = models.TextField(blank=True)
+    result = models.JSONField(null=True, blank=True)
+    patient = models.ForeignKey(
+        "patients.PatientProfile",
+        related_name="cardano_outbox_entries",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+    care_points_transaction = models.ForeignKey(
+        "doctors.CarePointsTransaction",
+        related_name="cardano_outbox_entries",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+    anchor_batch = models.ForeignKey(
+        "integration.AnchorBatch",
+        related_name="cardano_outbox_entries",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+    mint_batch = models.ForeignKey(
+        "integration.MintBatch",
+        related_name="cardano_outbox_entries",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} [{self.status}] {self.idempotency_key}"
+
+
+class CardanoTxCache(models.Model):
+    """
+    Blockfrost lookups for transactions past the confirmation depth.
+    Confirmed transactions never change, so rows are never refreshed.
+    """
+    tx_hash = models.CharField(max_length=128, unique=True)
+    tx_data = models.JSONField(default=dict)
+    metadata = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Label 674 (CIP-20) metadata, if the transaction carries any"
+    )
+    block_height = models.IntegerField(null=True, blank=True)
+    cached_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"CardanoTxCache {self.tx_hash}"
+
+
+class AnchoredRecord(models.Model):
+    """
+    Local index of on-chain label-674 anchors carrying ANCHOR_VALIDATOR_HASH,
+    populated by the index_cardano_records command
+    """
+    tx_hash = models.CharField(max_length=128, unique=True)
+    record_hash = models.CharField(max_length=128, blank=True)
+    patient_id = models.CharField(max_length=64, blank=True)
+    merkle_root = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Set instead of record_hash/patient_id for Merkle batch anchors"
+    )
+    issuer_id = models.CharField(max_length=64, blank=True)
+    issued_at = models.BigIntegerField(null=True, blank=True)
+    indexed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["record_hash", "patient_id"]),
+            models.Index(fields=["patient_id"]),
+            models.Index(fields=["merkle_root"]),
+        ]
+
+    def __str__(self):
+        return f"AnchoredRecord {self.record_hash or self.merkle_root} ({self.tx_hash})"
+
+
+class IndexerCursor(models.Model):
+    """
+    Resume position of a chain indexer in Blockfrost's ascending pagination
+    """
+    name = models.CharField(max_length=64, unique=True)
+    page = models.IntegerField(default=1)
+    position = models.IntegerField(
+        default=0,
+        help_text="Items already consumed from the current (partial) page"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ page {self.page}+{self.position}"
+
+
+class CircuitBreakerState(models.Model):
+    """
+    Last reported state of a circuit breaker, saved by the worker that owns
+    it so the health endpoint of any process can show it
+    """
+    name = models.CharField(max_length=64, unique=True)
+    state = models.CharField(max_length=16)
+    consecutive_failures = models.IntegerField(default=0)
+    retry_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When an open circuit lets its next probe through"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} [{self.state}]"
+
+
+class IPFSPin(models.Model):
+    """
+    Content we have put on IPFS, keyed by its locally computed CID.
+    Doubles as the pin queue: uploads that fail while the node is down are
+    stored as queued with their content and pinned later by the
+    process_ipfs_pin_queue command.
+    """
+    STATUS_QUEUED = "queued"
+    STATUS_PINNED = "pinned"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_PINNED, "Pinned"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    cid = models.CharField(max_length=128, unique=True)
+    size = models.BigIntegerField(default=0)
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED
+    )
+    content = models.BinaryField(
+        null=True,
+        blank=True,
+        help_text="Bytes to upload while queued; cleared once pinned"
+    )
+    storage_path = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="For files: default_storage path streamed to the node instead of content"
+    )
+    data_key = models.ForeignKey(
+        "integration.DataKey",
+        related_name="ipfs_pins",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        help_text="For files: key the file is encrypted with on its way to the node"
+    )
+    nonce_prefix = models.BinaryField(
+        null=True,
+        blank=True,
+        help_text="Nonce prefix that reproduces the ciphertext the CID was computed from"
+    )
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    pinned_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"IPFSPin {self.cid} [{self.status}]"
+
+
+class DataKey(models.Model):
+    """
+    Per-patient key for IPFS payloads, stored wrapped with the master key
+    (see integration/encryption.py)
+    """
+    subject = models.CharField(max_length=64, unique=True, help_text="Patient health ID")
+    wrapped_key = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"DataKey {self.subject}"
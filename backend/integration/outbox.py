@@ -0,0 +1,321 @@
+"""
+Cardano Outbox
+Moves record anchoring and CarePoints minting off the request path.
+
+Views call the ``enqueue_*`` helpers inside the same database transaction as
+their local writes and return immediately. The ``process_cardano_outbox``
+management command drains due entries, retries failures with exponential
+backoff and back-fills the resulting tx hash onto the originating row.
+"""
+import random
+from datetime import timedelta
+from typing import Optional, Dict, Any, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CardanoOutbox, AnchorBatch, MintBatch
+from .cardano_service import (
+    submit_record_to_cardano,
+    submit_merkle_root_to_cardano,
+    mint_care_points,
+    mint_care_points_batch,
+)
+from .cardano_config import (
+    CARDANO_OUTBOX_MAX_ATTEMPTS,
+    CARDANO_OUTBOX_BACKOFF_BASE,
+    CARDANO_OUTBOX_BACKOFF_MAX,
+    CARDANO_OUTBOX_LEASE_SECONDS,
+)
+
+
+def enqueue_record_anchor(
+    patient,
+    record_data: Dict[str, Any],
+    record_hash: str,
+    issuer_id: str,
+    doctor_address: Optional[str] = None,
+) -> CardanoOutbox:
+    """
+    Queue a record for submission with the anchor validator
+
+    Args:
+        patient: PatientProfile whose cardano_tx_hash will be back-filled
+        record_data: Medical record data as dictionary
+        record_hash: hash_record_data(record_data), already stored on the patient
+        issuer_id: Doctor's public key hash (hex string)
+        doctor_address: Doctor's Cardano wallet address (optional)
+
+    Returns:
+        The outbox entry (existing one if this record was already queued)
+    """
+    entry, _ = CardanoOutbox.objects.get_or_create(
+        idempotency_key=f"anchor:{patient.health_id}:{record_hash}",
+        defaults={
+            "kind": CardanoOutbox.KIND_SUBMIT_RECORD,
+            "patient": patient,
+            "payload": {
+                "record_data": record_data,
+                "issuer_id": issuer_id,
+                "patient_id": patient.health_id,
+                "doctor_address": doctor_address,
+            },
+        },
+    )
+    return entry
+
+
+def enqueue_care_points_mint(
+    care_points_tx,
+    address: str,
+    owner_pubkey_hash: Optional[str] = None,
+) -> CardanoOutbox:
+    """
+    Queue a CarePoints mint for a recorded CarePointsTransaction
+
+    Args:
+        care_points_tx: CarePointsTransaction whose cardano_tx_hash will be back-filled
+        address: Cardano wallet address to receive tokens
+        owner_pubkey_hash: Public key hash of the policy owner (optional)
+
+    Returns:
+        The outbox entry (existing one if this transaction was already queued)
+    """
+    entry, _ = CardanoOutbox.objects.get_or_create(
+        idempotency_key=f"mint:{care_points_tx.id}",
+        defaults={
+            "kind": CardanoOutbox.KIND_MINT_CARE_POINTS,
+            "care_points_transaction": care_points_tx,
+            "payload": {
+                "address": address,
+                "amount": care_points_tx.amount,
+                "owner_pubkey_hash": owner_pubkey_hash,
+            },
+        },
+    )
+    return entry
+
+
+def enqueue_anchor_batch(batch) -> CardanoOutbox:
+    """
+    Queue the Merkle root of an AnchorBatch for submission
+
+    Args:
+        batch: AnchorBatch whose cardano_tx_hash (and its patients') will be back-filled
+
+    Returns:
+        The outbox entry (existing one if this batch was already queued)
+    """
+    entry, _ = CardanoOutbox.objects.get_or_create(
+        idempotency_key=f"anchor_batch:{batch.merkle_root}",
+        defaults={
+            "kind": CardanoOutbox.KIND_ANCHOR_BATCH,
+            "anchor_batch": batch,
+            "payload": {
+                "merkle_root": batch.merkle_root,
+                "record_count": batch.record_count,
+                "issuer_id": batch.issuer_id,
+            },
+        },
+    )
+    return entry
+
+
+def enqueue_mint_batch(batch) -> CardanoOutbox:
+    """
+    Queue an aggregated multi-output CarePoints mint
+
+    Args:
+        batch: MintBatch whose covered CarePointsTransaction rows will be back-filled
+
+    Returns:
+        The outbox entry (existing one if this batch was already queued)
+    """
+    entry, _ = CardanoOutbox.objects.get_or_create(
+        idempotency_key=f"mint_batch:{batch.id}",
+        defaults={
+            "kind": CardanoOutbox.KIND_MINT_BATCH,
+            "mint_batch": batch,
+            "payload": {"outputs": batch.outputs},
+        },
+    )
+    return entry
+
+
+def compute_backoff(attempts: int) -> float:
+    """
+    Exponential backoff with full jitter, capped at CARDANO_OUTBOX_BACKOFF_MAX
+    """
+    delay = min(CARDANO_OUTBOX_BACKOFF_MAX, CARDANO_OUTBOX_BACKOFF_BASE * (2 ** max(attempts - 1, 0)))
+    return random.uniform(delay / 2, delay)
+
+
+def claim_due_entries(batch_size: int = 50) -> List[CardanoOutbox]:
+    """
+    Claim up to batch_size due entries for this worker.
+
+    Each claim is a conditional UPDATE that pushes next_attempt_at out by the
+    lease, so concurrent workers never process the same entry and entries held
+    by a crashed worker become due again once the lease expires.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=CARDANO_OUTBOX_LEASE_SECONDS)
+    candidates = list(
+        CardanoOutbox.objects.filter(
+            status__in=[CardanoOutbox.STATUS_PENDING, CardanoOutbox.STATUS_PROCESSING],
+            next_attempt_at__lte=now,
+        ).order_by("next_attempt_at")[:batch_size]
+    )
+
+    claimed = []
+    for entry in candidates:
+        updated = CardanoOutbox.objects.filter(
+            id=entry.id,
+            status=entry.status,
+            next_attempt_at=entry.next_attempt_at,
+        ).update(status=CardanoOutbox.STATUS_PROCESSING, next_attempt_at=lease_until)
+        if updated:
+            entry.status = CardanoOutbox.STATUS_PROCESSING
+            entry.next_attempt_at = lease_until
+            claimed.append(entry)
+    return claimed
+
+
+def _submit_record(entry: CardanoOutbox) -> Optional[Dict[str, Any]]:
+    payload = entry.payload
+    return submit_record_to_cardano(
+        record_data=payload["record_data"],
+        issuer_id=payload["issuer_id"],
+        patient_id=payload["patient_id"],
+        doctor_address=payload.get("doctor_address"),
+        idempotency_key=entry.idempotency_key,
+    )
+
+
+def _record_submitted(entry: CardanoOutbox, result: Dict[str, Any]):
+    if entry.patient_id:
+        from patients.models import PatientProfile
+        PatientProfile.objects.filter(id=entry.patient_id).update(
+            cardano_tx_hash=result["tx_hash"],
+            cardano_record_hash=result["record_hash"],
+        )
+
+
+def _anchor_batch(entry: CardanoOutbox) -> Optional[Dict[str, Any]]:
+    payload = entry.payload
+    return submit_merkle_root_to_cardano(
+        merkle_root=payload["merkle_root"],
+        record_count=payload["record_count"],
+        issuer_id=payload["issuer_id"],
+        idempotency_key=entry.idempotency_key,
+    )
+
+
+def _batch_anchored(entry: CardanoOutbox, result: Dict[str, Any]):
+    if entry.anchor_batch_id:
+        from patients.models import PatientProfile
+        AnchorBatch.objects.filter(id=entry.anchor_batch_id).update(cardano_tx_hash=result["tx_hash"])
+        PatientProfile.objects.filter(anchor_batch_id=entry.anchor_batch_id).update(
+            cardano_tx_hash=result["tx_hash"],
+        )
+
+
+def _mint_care_points(entry: CardanoOutbox) -> Optional[Dict[str, Any]]:
+    payload = entry.payload
+    return mint_care_points(
+        address=payload["address"],
+        amount=payload["amount"],
+        owner_pubkey_hash=payload.get("owner_pubkey_hash"),
+        idempotency_key=entry.idempotency_key,
+    )
+
+
+def _care_points_minted(entry: CardanoOutbox, result: Dict[str, Any]):
+    if entry.care_points_transaction_id:
+        from doctors.models import CarePointsTransaction
+        CarePointsTransaction.objects.filter(id=entry.care_points_transaction_id).update(
+            cardano_tx_hash=result["tx_hash"],
+        )
+
+
+def _mint_batch(entry: CardanoOutbox) -> Optional[Dict[str, Any]]:
+    return mint_care_points_batch(
+        outputs=entry.payload["outputs"],
+        idempotency_key=entry.idempotency_key,
+    )
+
+
+def _batch_minted(entry: CardanoOutbox, result: Dict[str, Any]):
+    if entry.mint_batch_id:
+        from doctors.models import CarePointsTransaction
+        MintBatch.objects.filter(id=entry.mint_batch_id).update(cardano_tx_hash=result["tx_hash"])
+        CarePointsTransaction.objects.filter(mint_batch_id=entry.mint_batch_id).update(
+            cardano_tx_hash=result["tx_hash"],
+        )
+
+
+# kind -> (chain call, back-fill of the result). The chain call runs outside
+# any transaction so no database lock is held during the network round trip.
+HANDLERS = {
+    CardanoOutbox.KIND_SUBMIT_RECORD: (_submit_record, _record_submitted),
+    CardanoOutbox.KIND_MINT_CARE_POINTS: (_mint_care_points, _care_points_minted),
+    CardanoOutbox.KIND_ANCHOR_BATCH: (_anchor_batch, _batch_anchored),
+    CardanoOutbox.KIND_MINT_BATCH: (_mint_batch, _batch_minted),
+}
+
+
+def process_entry(entry: CardanoOutbox) -> bool:
+    """
+    Run one claimed entry and record the outcome
+
+    Returns:
+        True if the chain call succeeded, False if it was rescheduled or failed
+    """
+    handler = HANDLERS.get(entry.kind)
+    error = ""
+    try:
+        if handler is None:
+            error = f"Unknown outbox kind: {entry.kind}"
+        else:
+            call, record = handler
+            result = call(entry)
+            if result and result.get("tx_hash"):
+                with transaction.atomic():
+                    record(entry, result)
+                    entry.status = CardanoOutbox.STATUS_DONE
+                    entry.result = result
+                    entry.attempts += 1
+                    entry.last_error = ""
+                    entry.completed_at = timezone.now()
+                    entry.save()
+                return True
+            error = "Cardano service returned no transaction"
+    except Exception as e:
+        error = str(e)
+
+    entry.attempts += 1
+    entry.last_error = error
+    if entry.attempts >= CARDANO_OUTBOX_MAX_ATTEMPTS:
+        entry.status = CardanoOutbox.STATUS_FAILED
+        entry.completed_at = timezone.now()
+    else:
+        entry.status = CardanoOutbox.STATUS_PENDING
+        entry.next_attempt_at = timezone.now() + timedelta(seconds=compute_backoff(entry.attempts))
+    entry.save()
+    return False
+
+
+def drain_outbox(batch_size: int = 50) -> Dict[str, int]:
+    """
+    Claim and process one batch of due entries
+
+    Returns:
+        Counts of processed, succeeded and failed entries
+    """
+    entries = claim_due_entries(batch_size)
+    succeeded = sum(1 for entry in entries if process_entry(entry))
+    return {
+        "processed": len(entries),
+        "succeeded": succeeded,
+        "failed": len(entries) - succeeded,
+    }
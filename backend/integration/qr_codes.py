@@ -0,0 +1,190 @@
+"""
+Patient QR Codes
+QR images are addressed by a digest of their payload and rendered on first
+request (or ahead of time by the render_qr_codes command), then kept in
+default_storage and a small in-memory LRU. A digest always maps to the same
+image, so responses can be cached as immutable; when the payload changes
+(e.g. the Cardano tx hash is back-filled) the patient gets a new digest.
+"""
+import hashlib
+import io
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import qrcode
+import qrcode.image.svg
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from .lru_cache import LRUCache
+from patients.config import QR_PNG_SIZES, QR_DEFAULT_SIZE, QR_CACHE_ENTRIES
+
+QR_FORMATS = ("png", "svg")
+CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+BORDER = 4
+
+_images = LRUCache(QR_CACHE_ENTRIES)
+
+
+def qr_payload(patient) -> Dict[str, Any]:
+    """
+    Data encoded in a patient's QR code
+    """
+    return {
+        "patient_id": patient.id,
+        "health_id": patient.health_id,
+        "record_hash": patient.cardano_record_hash,
+        "tx_hash": patient.cardano_tx_hash,
+        "type": "patient_access"
+    }
+
+
+def _encode_payload(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload)
+
+
+def payload_digest(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(_encode_payload(payload).encode("utf-8")).hexdigest()[:32]
+
+
+def refresh_qr_digest(patient) -> str:
+    """
+    Digest of the patient's current payload, saved on the profile if it changed
+    """
+    digest = payload_digest(qr_payload(patient))
+    if patient.qr_digest != digest:
+        type(patient).objects.filter(id=patient.id).update(qr_digest=digest)
+        patient.qr_digest = digest
+    return digest
+
+
+def variant_name(fmt: str, size: int) -> str:
+    return f"{size}.png" if fmt == "png" else "qr.svg"
+
+
+def storage_path(digest: str, fmt: str, size: int) -> str:
+    return f"qrcodes/{digest}/{variant_name(fmt, size)}"
+
+
+def etag(digest: str, fmt: str, size: int) -> str:
+    return f'"{digest}-{variant_name(fmt, size)}"'
+
+
+def validate_variant(fmt: str, size: Optional[int]) -> Optional[str]:
+    """
+    Returns:
+        An error message for an unsupported format or size, None otherwise
+    """
+    if fmt not in QR_FORMATS:
+        return f"format must be one of {', '.join(QR_FORMATS)}"
+    if fmt == "png" and size not in QR_PNG_SIZES:
+        return f"size must be one of {', '.join(str(s) for s in QR_PNG_SIZES)}"
+    return None
+
+
+def render_qr(payload: Dict[str, Any], fmt: str = "png", size: int = QR_DEFAULT_SIZE) -> bytes:
+    """
+    Encode a payload as a QR image
+
+    Args:
+        payload: Data to encode (JSON)
+        fmt: "png" or "svg"
+        size: PNG width and height in pixels (modules are scaled by a whole
+            factor and centered, so they stay sharp)
+
+    Returns:
+        Image bytes
+    """
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, border=BORDER)
+    qr.add_data(_encode_payload(payload))
+    qr.make(fit=True)
+
+    buffer = io.BytesIO()
+    if fmt == "svg":
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+        return buffer.getvalue()
+
+    matrix = qr.get_matrix()
+    modules = len(matrix)
+    # One pixel per module, then a nearest-neighbour upscale, instead of
+    # drawing every module as its own rectangle
+    image = Image.new("1", (modules, modules))
+    image.putdata([0 if dark else 1 for row in matrix for dark in row])
+    scale = max(1, size // modules)
+    image = image.resize((modules * scale, modules * scale), Image.NEAREST)
+    if image.size[0] < size:
+        canvas = Image.new("1", (size, size), 1)
+        offset = (canvas.size[0] - image.size[0]) // 2
+        canvas.paste(image, (offset, offset))
+        image = canvas
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def get_cached_qr(digest: str, fmt: str, size: int) -> Optional[bytes]:
+    """
+    A rendered variant from memory or storage, None if it was never rendered
+    """
+    path = storage_path(digest, fmt, size)
+    found, content = _images.get(path)
+    if found:
+        return content
+    try:
+        with default_storage.open(path, "rb") as f:
+            content = f.read()
+    except (FileNotFoundError, OSError):
+        return None
+    _images.set(path, content)
+    return content
+
+
+def get_qr_image(payload: Dict[str, Any], fmt: str = "png", size: int = QR_DEFAULT_SIZE) -> bytes:
+    """
+    A QR variant for a payload, rendered and stored on first use
+    """
+    digest = payload_digest(payload)
+    content = get_cached_qr(digest, fmt, size)
+    if content is not None:
+        return content
+
+    content = render_qr(payload, fmt, size)
+    path = storage_path(digest, fmt, size)
+    saved = default_storage.save(path, ContentFile(content))
+    if saved != path:
+        # Another worker rendered the same variant first; keep theirs
+        default_storage.delete(saved)
+    _images.set(path, content)
+    return content
+
+
+def prerender_qr(payload: Dict[str, Any], variants: List[Tuple[str, int]]) -> int:
+    """
+    Render the given (format, size) variants of a payload that are not stored yet
+
+    Returns:
+        Number of variants rendered
+    """
+    digest = payload_digest(payload)
+    rendered = 0
+    for fmt, size in variants:
+        if not default_storage.exists(storage_path(digest, fmt, size)):
+            get_qr_image(payload, fmt, size)
+            rendered += 1
+    return rendered
+
+
+def qr_code_url(request, digest: str, fmt: str = "png", size: int = QR_DEFAULT_SIZE) -> str:
+    path = f"/api/patient/qr/{digest}/?format={fmt}"
+    if fmt == "png":
+        path += f"&size={size}"
+    return request.build_absolute_uri(path)
+
+
+def qr_code_urls(request, digest: str) -> Dict[str, str]:
+    """
+    URLs of every variant, keyed "png_<size>" and "svg"
+    """
+    urls = {f"png_{size}": qr_code_url(request, digest, "png", size) for size in QR_PNG_SIZES}
+    urls["svg"] = qr_code_url(request, digest, "svg")
+    return urls
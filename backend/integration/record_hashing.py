@@ -0,0 +1,269 @@
+"""
+Canonical Record Hashing
+RFC 8785-style canonical JSON for medical records, so the same record always
+hashes to the same SHA-256 whatever produced it (views, outbox, demo scripts).
+
+Canonical form:
+- objects: keys sorted, no whitespace
+- numbers: integers exactly; floats in ECMAScript form (70.0 -> 70, 1e-07 -> 1e-7,
+  1.2345678901234568e+20 -> 123456789012345680000)
+- datetimes: ISO 8601 in UTC with a "Z" suffix; dates and times: ISO 8601
+- Decimal: as a number; UUID: string; bytes: lowercase hex; sets: sorted lists
+
+Differences from RFC 8785: int values above 2**53 keep every digit, and keys
+sort by code point (the same as UTF-16 order unless keys mix astral-plane
+characters with U+E000-U+FFFF).
+
+Stdlib only, so the scripts under smart-contracts/ can import it too.
+"""
+import datetime
+import decimal
+import hashlib
+import json
+import math
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List
+
+HASH_BULK_WORKERS = int(os.getenv("HASH_BULK_WORKERS", str(min(8, os.cpu_count() or 1))))
+HASH_BULK_CHUNK = 256  # records per pool task
+
+_executor = ThreadPoolExecutor(max_workers=HASH_BULK_WORKERS, thread_name_prefix="record-hash")
+# Substrings the C encoder only emits for floats that are not yet canonical
+# (70.0, 1e-05, 1e+16); strings containing them just take the slower path
+_INTEGRAL_MARKERS = (".0,", ".0]", ".0}")
+# Integral floats below this are written as the integer they hold exactly
+_EXACT_INTEGERS = 2 ** 53
+
+
+class _ExactNumbers(Exception):
+    """Raised by _normalize when the record needs the pure-Python encoder"""
+
+
+def _format_digits(negative: bool, digits: str, exponent: int) -> str:
+    """
+    ECMAScript Number::toString layout for digits * 10**exponent
+    """
+    k = len(digits)
+    n = k + exponent  # position of the decimal point
+    if k <= n <= 21:
+        text = digits + "0" * (n - k)
+    elif 0 < n <= 21:
+        text = digits[:n] + "." + digits[n:]
+    elif -6 < n <= 0:
+        text = "0." + "0" * -n + digits
+    else:
+        e = n - 1
+        text = digits[0] + ("." + digits[1:] if k > 1 else "") + "e" + ("+" if e > 0 else "-") + str(abs(e))
+    return "-" + text if negative else text
+
+
+def _format_decimal(value: decimal.Decimal) -> str:
+    if not value.is_finite():
+        raise ValueError(f"Cannot canonicalize non-finite number {value}")
+    if not value:
+        return "0"
+    sign, digits, exponent = value.normalize().as_tuple()
+    return _format_digits(bool(sign), "".join(map(str, digits)), exponent)
+
+
+def format_float(value: float) -> str:
+    """
+    Shortest round-trip float in ECMAScript notation
+    """
+    if not math.isfinite(value):
+        raise ValueError(f"Cannot canonicalize non-finite number {value}")
+    if value.is_integer() and abs(value) < _EXACT_INTEGERS:
+        return str(int(value))
+    # Above 2**53 the shortest round-trip digits, not the exact binary value
+    return _format_decimal(decimal.Decimal(repr(value)))
+
+
+def _canonical_scalar(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return value.isoformat() + "Z"
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+def _normalize(value: Any) -> Any:
+    """
+    Rewrite floats the C JSON encoder would not render canonically, copying
+    containers only when something inside them changes. Only called for
+    records whose first encoding contained such a float.
+
+    Raises:
+        _ExactNumbers for Decimals and floats below 1e-4, whose canonical
+        form the C encoder cannot produce
+    """
+    kind = type(value)
+    if kind is str or kind is int or kind is bool or value is None:
+        return value
+    if kind is float:
+        if not math.isfinite(value):
+            raise ValueError(f"Cannot canonicalize non-finite number {value}")
+        if value.is_integer():
+            if abs(value) < _EXACT_INTEGERS:
+                return int(value)
+            if abs(value) < 1e21:
+                # Shortest round-trip digits padded with zeros, as in ECMAScript
+                # (1.2345678901234568e+20 -> 123456789012345680000)
+                return int(decimal.Decimal(repr(value)))
+            return value  # repr already matches ECMAScript (e.g. 1e+21)
+        if abs(value) < 1e-4:
+            raise _ExactNumbers
+        return value  # shortest repr without exponent, as in ECMAScript
+    if kind is dict:
+        changed = None
+        for key, item in value.items():
+            normalized = _normalize(item)
+            if normalized is not item:
+                if changed is None:
+                    changed = {}
+                changed[key] = normalized
+        if changed is None:
+            return value
+        return {key: changed[key] if key in changed else item for key, item in value.items()}
+    if kind is list or kind is tuple:
+        items = [_normalize(item) for item in value]
+        if kind is list and all(new is old for new, old in zip(items, value)):
+            return value
+        return items
+    if isinstance(value, decimal.Decimal):
+        raise _ExactNumbers
+    if isinstance(value, (set, frozenset)):
+        return [_normalize(item) for item in sorted(value, key=canonical_json)]
+    if isinstance(value, bool):
+        return bool(value)
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return _normalize(float(value))
+    if isinstance(value, dict):
+        return _normalize(dict(value))
+    if isinstance(value, (list, tuple)):
+        return _normalize(list(value))
+    return _canonical_scalar(value)
+
+
+def _default(value: Any) -> Any:
+    """
+    JSONEncoder hook for types JSON has no literal for
+    """
+    if isinstance(value, decimal.Decimal):
+        raise _ExactNumbers
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=canonical_json)
+    return _canonical_scalar(value)
+
+
+_encoder = json.JSONEncoder(
+    ensure_ascii=False,
+    allow_nan=False,
+    sort_keys=True,
+    separators=(",", ":"),
+    default=_default,
+)
+
+
+def _json_key(key: Any) -> str:
+    """Dict key as the json module renders it"""
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, bool):
+        return json.dumps(key)
+    if isinstance(key, int):
+        return str(int(key))
+    return repr(key)
+
+
+def _encode_exact(value: Any) -> str:
+    """
+    Pure-Python canonical encoder, used when a record contains Decimals or
+    floats below 1e-4
+    """
+    if value is None or isinstance(value, bool):
+        return "null" if value is None else ("true" if value else "false")
+    if isinstance(value, int):
+        return str(int(value))
+    if isinstance(value, float):
+        return format_float(value)
+    if isinstance(value, decimal.Decimal):
+        return _format_decimal(value)
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, dict):
+        items = sorted(((_json_key(key), item) for key, item in value.items()), key=lambda pair: pair[0])
+        return "{" + ",".join(json.dumps(key, ensure_ascii=False) + ":" + _encode_exact(item) for key, item in items) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_encode_exact(item) for item in value) + "]"
+    if isinstance(value, (set, frozenset)):
+        return "[" + ",".join(sorted(_encode_exact(item) for item in value)) + "]"
+    return json.dumps(_canonical_scalar(value), ensure_ascii=False)
+
+
+def canonical_json(value: Any) -> str:
+    """
+    Canonical JSON text for a record (see module docstring)
+    """
+    try:
+        text = _encoder.encode(value)
+        if "e-" in text or "e+" in text or (
+            ".0" in text and (text.endswith(".0") or any(marker in text for marker in _INTEGRAL_MARKERS))
+        ):
+            text = _encoder.encode(_normalize(value))
+        return text
+    except _ExactNumbers:
+        return _encode_exact(value)
+
+
+def hash_record(record: Any) -> str:
+    """
+    SHA-256 of the canonical JSON of a record
+
+    Returns:
+        Hexadecimal hash string
+    """
+    return hashlib.sha256(canonical_json(record).encode("utf-8")).hexdigest()
+
+
+def _hash_chunk(records: List[Any]) -> List[str]:
+    return [hash_record(record) for record in records]
+
+
+def hash_records_bulk(records: Iterable[Any], chunk_size: int = HASH_BULK_CHUNK) -> List[str]:
+    """
+    hash_record for many records, in chunks on a shared thread pool
+    (hashlib releases the GIL while digesting large records)
+
+    Args:
+        records: Records to hash
+        chunk_size: Records per pool task
+
+    Returns:
+        Hashes in the same order as records
+    """
+    records = list(records)
+    if len(records) <= chunk_size:
+        return _hash_chunk(records)
+    chunks = [records[start:start + chunk_size] for start in range(0, len(records), chunk_size)]
+    hashes: List[str] = []
+    for chunk_hashes in _executor.map(_hash_chunk, chunks):
+        hashes.extend(chunk_hashes)
+    return hashes
+
+
+def hash_records_by_key(records: Dict[Any, Any]) -> Dict[Any, str]:
+    """
+    hash_records_bulk for a mapping of id -> record
+    """
+    keys = list(records)
+    return dict(zip(keys, hash_records_bulk(records[key] for key in keys)))
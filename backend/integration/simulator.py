@@ -0,0 +1,375 @@
+"""
+Cardano Chain Simulator
+Local stand-in for the Cardano service and a Blockfrost-compatible subset of
+the API, for offline, reproducible load tests of the chain integration.
+
+Submitted transactions wait in a mempool until the next simulated block.
+Latency and failures (5xx, 429, hangs) can be injected per request from a
+seeded RNG.
+
+Point the backend at it with:
+    CARDANO_SERVICE_URL=http://127.0.0.1:3100
+    BLOCKFROST_URL=http://127.0.0.1:3100/api/v0
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from .cardano_config import CAREPOINTS_POLICY_HASH, CAREPOINTS_MAX_MINT, MIN_ADA_UTXO
+
+BLOCKFROST_PREFIX = "/api/v0"
+CAREPOINTS_UNIT = CAREPOINTS_POLICY_HASH + "CarePoints".encode("utf-8").hex()
+TX_FEE = 170_000  # lovelace
+
+
+@dataclass
+class FaultConfig:
+    """
+    Injected behaviour applied to every request
+
+    Args:
+        latency_ms: Mean added latency
+        jitter_ms: Standard deviation of the added latency
+        error_rate: Fraction of requests answered with 500
+        throttle_rate: Fraction of requests answered with 429 (Retry-After: 1)
+        hang_rate: Fraction of requests held for hang_seconds before answering 504
+        hang_seconds: How long a hung request is held
+    """
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    hang_rate: float = 0.0
+    hang_seconds: float = 65.0
+
+
+class ChainSimulator:
+    """
+    In-memory chain: mempool, blocks, label-674 feed and token balances
+
+    Args:
+        block_time: Seconds between blocks
+        block_size: Maximum transactions per block
+        seed: Seed for injected faults and latency
+        faults: FaultConfig applied by the HTTP handler
+    """
+
+    def __init__(
+        self,
+        block_time: float = 20.0,
+        block_size: int = 300,
+        seed: Optional[int] = None,
+        faults: Optional[FaultConfig] = None,
+    ):
+        self.block_time = block_time
+        self.block_size = block_size
+        self.faults = faults or FaultConfig()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+        self.height = 0
+        self.block_hash = "0" * 64
+        self.slot = 0
+        self.mempool: List[str] = []
+        self.txs: Dict[str, Dict[str, Any]] = {}
+        self.idempotency: Dict[str, str] = {}
+        self.label_674: List[str] = []
+        self.balances: Dict[str, Dict[str, int]] = {}
+        self.tx_counts: Dict[str, int] = {}
+        self._sequence = 0
+
+        self._stop = threading.Event()
+        self._producer: Optional[threading.Thread] = None
+
+    # Block production
+
+    def start(self):
+        """Produce a block every block_time seconds in a background thread"""
+        self._producer = threading.Thread(target=self._produce, name="chain-simulator", daemon=True)
+        self._producer.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _produce(self):
+        while not self._stop.wait(self.block_time):
+            self.mint_block()
+
+    def mint_block(self) -> int:
+        """
+        Move up to block_size mempool transactions into a new block
+
+        Returns:
+            Number of transactions included
+        """
+        with self.lock:
+            included, self.mempool = self.mempool[:self.block_size], self.mempool[self.block_size:]
+            self.height += 1
+            self.slot += max(1, int(self.block_time))
+            self.block_hash = hashlib.sha256(f"{self.block_hash}{self.height}".encode()).hexdigest()
+            block_time = int(time.time())
+            for index, tx_hash in enumerate(included):
+                tx = self.txs[tx_hash]
+                tx.update(block=self.block_hash, block_height=self.height, block_time=block_time, slot=self.slot, index=index)
+                for address, unit, quantity in tx["outputs"]:
+                    units = self.balances.setdefault(address, {})
+                    units[unit] = units.get(unit, 0) + quantity
+                    self.tx_counts[address] = self.tx_counts.get(address, 0) + 1
+                if tx["metadata"] is not None:
+                    self.label_674.append(tx_hash)
+            return len(included)
+
+    # Cardano service contract
+
+    def submit(self, kind: str, body: Dict[str, Any], metadata: Optional[Dict[str, Any]], outputs) -> str:
+        """
+        Add a transaction to the mempool (or return the one already submitted
+        with the same idempotency key)
+        """
+        key = body.get("idempotency_key")
+        with self.lock:
+            if key and key in self.idempotency:
+                return self.idempotency[key]
+            self._sequence += 1
+            tx_hash = hashlib.sha256(
+                f"{self._sequence}:{json.dumps(body, sort_keys=True, default=str)}".encode()
+            ).hexdigest()
+            self.txs[tx_hash] = {
+                "kind": kind,
+                "metadata": metadata,
+                "outputs": outputs,
+                "block": None,
+                "block_height": None,
+            }
+            self.mempool.append(tx_hash)
+            if key:
+                self.idempotency[key] = tx_hash
+            return tx_hash
+
+    def submit_record(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        if not body.get("record_hash"):
+            return 400, {"error": "record_hash is required"}
+        tx_hash = self.submit("submitRecord", body, body.get("metadata") or {}, [])
+        return 200, {"tx_hash": tx_hash}
+
+    def mint(self, body: Dict[str, Any], outputs: List[Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+        try:
+            amounts = [(output["address"], int(output["amount"])) for output in outputs]
+        except (KeyError, TypeError, ValueError):
+            return 400, {"error": "outputs need an address and an integer amount"}
+        total = sum(amount for _, amount in amounts)
+        if not amounts or any(amount < 1 for _, amount in amounts) or total > CAREPOINTS_MAX_MINT:
+            return 400, {"error": f"Mint total must be between 1 and {CAREPOINTS_MAX_MINT}"}
+        chain_outputs = []
+        for address, amount in amounts:
+            chain_outputs.append((address, "lovelace", MIN_ADA_UTXO))
+            chain_outputs.append((address, CAREPOINTS_UNIT, amount))
+        tx_hash = self.submit("mintCarePoints", body, None, chain_outputs)
+        return 200, {"tx_hash": tx_hash, "policy_id": CAREPOINTS_POLICY_HASH, "amount": total}
+
+    # Blockfrost subset
+
+    def tx_details(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            tx = self.txs.get(tx_hash)
+            if not tx or tx["block"] is None:
+                return None
+            output_amount: Dict[str, int] = {}
+            for _, unit, quantity in tx["outputs"]:
+                output_amount[unit] = output_amount.get(unit, 0) + quantity
+            return {
+                "hash": tx_hash,
+                "block": tx["block"],
+                "block_height": tx["block_height"],
+                "block_time": tx["block_time"],
+                "slot": tx["slot"],
+                "index": tx["index"],
+                "output_amount": [{"unit": unit, "quantity": str(quantity)} for unit, quantity in output_amount.items()],
+                "fees": str(TX_FEE),
+                "utxo_count": len(tx["outputs"]),
+                "asset_mint_or_burn_count": int(any(unit != "lovelace" for _, unit, _ in tx["outputs"])),
+                "valid_contract": True,
+            }
+
+    def tx_metadata(self, tx_hash: str) -> Optional[List[Dict[str, Any]]]:
+        with self.lock:
+            tx = self.txs.get(tx_hash)
+            if not tx or tx["block"] is None:
+                return None
+            if tx["metadata"] is None:
+                return []
+            return [{"label": "674", "json_metadata": tx["metadata"]}]
+
+    def latest_block(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"height": self.height, "hash": self.block_hash, "slot": self.slot, "tx_count": 0}
+
+    def address(self, address: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            if address not in self.balances:
+                return None
+            return {
+                "address": address,
+                "amount": [{"unit": unit, "quantity": str(quantity)} for unit, quantity in self.balances[address].items()],
+                "type": "shelley",
+                "script": False,
+            }
+
+    def address_total(self, address: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            if address not in self.balances:
+                return None
+            return {
+                "address": address,
+                "received_sum": [{"unit": unit, "quantity": str(quantity)} for unit, quantity in self.balances[address].items()],
+                "sent_sum": [],
+                "tx_count": self.tx_counts.get(address, 0),
+            }
+
+    def label_page(self, page: int, count: int, order: str) -> List[Dict[str, Any]]:
+        with self.lock:
+            feed = self.label_674 if order != "desc" else self.label_674[::-1]
+            start = (page - 1) * count
+            return [
+                {"tx_hash": tx_hash, "json_metadata": self.txs[tx_hash]["metadata"]}
+                for tx_hash in feed[start:start + count]
+            ]
+
+    def status(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"height": self.height, "mempool": len(self.mempool), "transactions": len(self.txs)}
+
+
+NOT_FOUND = {"status_code": 404, "error": "Not Found", "message": "The requested component has not been found."}
+TX_PATH = re.compile(r"^/txs/([0-9a-fA-F]{64})(/metadata)?$")
+ADDRESS_PATH = re.compile(r"^/addresses/([^/]+)(/total)?$")
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real services
+    chain: ChainSimulator = None
+    verbose = False
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _inject_faults(self) -> bool:
+        """Apply latency and failures; True if a failure response was sent"""
+        faults = self.chain.faults
+        with self.chain.lock:
+            roll = self.chain.rng.random()
+            delay = max(0.0, self.chain.rng.gauss(faults.latency_ms, faults.jitter_ms)) / 1000 if faults.latency_ms or faults.jitter_ms else 0.0
+        if delay:
+            time.sleep(delay)
+        if roll < faults.hang_rate:
+            time.sleep(faults.hang_seconds)
+            self._send(504, {"status_code": 504, "error": "Gateway Timeout", "message": "Simulated hang"})
+            return True
+        roll -= faults.hang_rate
+        if roll < faults.error_rate:
+            self._send(500, {"status_code": 500, "error": "Internal Server Error", "message": "Simulated failure"})
+            return True
+        roll -= faults.error_rate
+        if roll < faults.throttle_rate:
+            self._send(429, {"status_code": 429, "error": "Project Over Limit", "message": "Simulated throttling"}, {"Retry-After": "1"})
+            return True
+        return False
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send(400, {"error": "Invalid JSON"})
+            return
+        if self._inject_faults():
+            return
+
+        path = urlsplit(self.path).path
+        if path == "/submitRecord":
+            self._send(*self.chain.submit_record(body))
+        elif path == "/mintCarePoints":
+            self._send(*self.chain.mint(body, [{"address": body.get("address"), "amount": body.get("amount")}]))
+        elif path == "/mintCarePointsBatch":
+            self._send(*self.chain.mint(body, body.get("outputs") or []))
+        else:
+            self._send(404, NOT_FOUND)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path
+        if path == "/status":
+            self._send(200, self.chain.status())
+            return
+        if self._inject_faults():
+            return
+
+        if path.startswith(BLOCKFROST_PREFIX):
+            path = path[len(BLOCKFROST_PREFIX):]
+
+        result = None
+        match = TX_PATH.match(path)
+        if match:
+            tx_hash = match.group(1).lower()
+            result = self.chain.tx_metadata(tx_hash) if match.group(2) else self.chain.tx_details(tx_hash)
+        elif ADDRESS_PATH.match(path):
+            match = ADDRESS_PATH.match(path)
+            result = self.chain.address_total(match.group(1)) if match.group(2) else self.chain.address(match.group(1))
+        elif path == "/blocks/latest":
+            result = self.chain.latest_block()
+        elif path == "/metadata/txs/labels/674":
+            query = parse_qs(url.query)
+            try:
+                page = max(1, int(query.get("page", ["1"])[0]))
+                count = min(100, max(1, int(query.get("count", ["100"])[0])))
+            except ValueError:
+                self._send(400, {"status_code": 400, "error": "Bad Request", "message": "Invalid paging"})
+                return
+            result = self.chain.label_page(page, count, query.get("order", ["asc"])[0])
+        elif path.startswith("/txs/"):
+            self._send(400, {"status_code": 400, "error": "Bad Request", "message": "Invalid transaction hash"})
+            return
+
+        if result is None:
+            self._send(404, NOT_FOUND)
+        else:
+            self._send(200, result)
+
+
+def start_simulator(
+    host: str = "127.0.0.1",
+    port: int = 3100,
+    chain: Optional[ChainSimulator] = None,
+    verbose: bool = False,
+) -> Tuple[ThreadingHTTPServer, ChainSimulator]:
+    """
+    Start the simulator in background threads (port 0 picks a free port)
+
+    Returns:
+        (server, chain); call server.shutdown() and chain.stop() to stop it
+    """
+    chain = chain or ChainSimulator()
+    handler = type("BoundSimulatorHandler", (SimulatorHandler,), {"chain": chain, "verbose": verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    chain.start()
+    threading.Thread(target=server.serve_forever, name="chain-simulator-http", daemon=True).start()
+    return server, chain
@@ -0,0 +1,845 @@
+import datetime
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from doctors.models import CarePointsTransaction, DoctorProfile
+from patients.models import PatientProfile
+from users.models import User
+
+from integration.apps import check_encryption_key
+from integration.blockfrost_client import BlockfrostClient, TokenBucket
+from integration.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, save_breaker_state
+from integration.cardano_config import (
+    ANCHOR_VALIDATOR_HASH,
+    CARDANO_CONFIRMATION_DEPTH,
+    CARDANO_OUTBOX_BACKOFF_BASE,
+    CARDANO_OUTBOX_BACKOFF_MAX,
+    CARDANO_OUTBOX_MAX_ATTEMPTS,
+)
+from integration.models import AnchoredRecord, CardanoOutbox, CardanoTxCache, IndexerCursor
+from integration.balance_sync import doctors_to_sync, sync_care_points_balances
+from integration.blockfrost_client import set_blockfrost_client
+from integration.cardano_service import mint_care_points_batch, verify_record_hash
+from integration.indexer import run_indexer
+from integration.cid import CHUNK_SIZE, CIDBuilder, cid_matches, compute_cid
+from integration import encryption
+from integration.encryption import (
+    DecryptionError,
+    EncryptingReader,
+    decrypt_bytes,
+    encrypt_bytes,
+    encrypted_size,
+    get_data_key,
+    get_data_keys,
+    wrap_key,
+    unwrap_key,
+)
+from integration.ipfs_cache import CIDCache, set_cid_cache
+from integration.ipfs_client import IPFSClient, set_ipfs_client
+from integration.ipfs_service import fetch_ipfs_content
+from integration.merkle import build_merkle_tree, merkle_leaf, verify_merkle_proof
+from integration.mint_batching import aggregate_pending_mints
+from integration.simulator import ChainSimulator, FaultConfig, start_simulator
+from integration.record_hashing import canonical_json, hash_record, hash_records_bulk
+from integration.uploads import HashingFile, save_upload
+from integration.tx_cache import invalidate_transaction, lookup_transaction
+from integration.outbox import (
+    claim_due_entries,
+    compute_backoff,
+    enqueue_record_anchor,
+    process_entry,
+)
+
+
+class StubServer:
+    """
+    Local HTTP server answering with the (status, body, headers) tuples
+    queued in responses, one per request (bytes bodies are sent as they
+    are, anything else as JSON); records every request path
+    """
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _answer(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                stub.requests.append(self.path)
+                status, body, headers = stub.responses.pop(0) if stub.responses else (404, {}, {})
+                raw = isinstance(body, bytes)
+                content = body if raw else json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/octet-stream" if raw else "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = _answer
+            do_POST = _answer
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_patient(health_id="PAT-TEST0001"):
+    user = User.objects.create(username=health_id, role=User.ROLE_PATIENT)
+    return PatientProfile.objects.create(user=user, health_id=health_id)
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.patient = make_patient()
+        self.entry = enqueue_record_anchor(self.patient, {"name": "x"}, "abc", "issuer")
+
+    def test_enqueue_is_idempotent(self):
+        again = enqueue_record_anchor(self.patient, {"name": "x"}, "abc", "issuer")
+        self.assertEqual(again.id, self.entry.id)
+        self.assertEqual(CardanoOutbox.objects.count(), 1)
+
+    def test_claim_leases_entry(self):
+        claimed = claim_due_entries()
+        self.assertEqual([e.id for e in claimed], [self.entry.id])
+        self.assertEqual(claimed[0].status, CardanoOutbox.STATUS_PROCESSING)
+        # Leased entries are not due again until the lease expires
+        self.assertEqual(claim_due_entries(), [])
+
+        CardanoOutbox.objects.filter(id=self.entry.id).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual([e.id for e in claim_due_entries()], [self.entry.id])
+
+    def test_success_backfills_patient(self):
+        result = {"tx_hash": "tx1", "record_hash": "rh1"}
+        with mock.patch("integration.outbox.submit_record_to_cardano", return_value=result):
+            self.assertTrue(process_entry(claim_due_entries()[0]))
+
+        self.entry.refresh_from_db()
+        self.patient.refresh_from_db()
+        self.assertEqual(self.entry.status, CardanoOutbox.STATUS_DONE)
+        self.assertEqual(self.entry.attempts, 1)
+        self.assertEqual(self.patient.cardano_tx_hash, "tx1")
+        self.assertEqual(self.patient.cardano_record_hash, "rh1")
+
+    def test_failure_is_rescheduled_then_failed(self):
+        with mock.patch("integration.outbox.submit_record_to_cardano", side_effect=RuntimeError("down")):
+            self.assertFalse(process_entry(claim_due_entries()[0]))
+            self.entry.refresh_from_db()
+            self.assertEqual(self.entry.status, CardanoOutbox.STATUS_PENDING)
+            self.assertEqual(self.entry.last_error, "down")
+            self.assertGreater(self.entry.next_attempt_at, timezone.now())
+
+            CardanoOutbox.objects.filter(id=self.entry.id).update(attempts=CARDANO_OUTBOX_MAX_ATTEMPTS - 1)
+            self.entry.refresh_from_db()
+            self.assertFalse(process_entry(self.entry))
+
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.status, CardanoOutbox.STATUS_FAILED)
+        self.patient.refresh_from_db()
+        self.assertIsNone(self.patient.cardano_tx_hash)
+
+    def test_backoff_grows_and_is_capped(self):
+        for attempts in range(1, 30):
+            delay = min(CARDANO_OUTBOX_BACKOFF_MAX, CARDANO_OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1))
+            self.assertTrue(delay / 2 <= compute_backoff(attempts) <= delay)
+
+
+class IntegrationHealthTests(TestCase):
+    def test_reports_outbox_backlog(self):
+        self.assertEqual(self.client.get("/api/integration/health/").json(), {
+            "status": "ok",
+            "cardano_outbox": {"pending": 0, "failed": 0, "recent_failed": 0, "oldest_due_seconds": 0},
+            "cardano_service": None,
+        })
+
+        patient = make_patient()
+        entry = enqueue_record_anchor(patient, {"name": "x"}, "abc", "issuer")
+        enqueue_record_anchor(patient, {"name": "y"}, "def", "issuer")
+        CardanoOutbox.objects.filter(id=entry.id).update(next_attempt_at=timezone.now() - timedelta(hours=1))
+        body = self.client.get("/api/integration/health/").json()
+        self.assertEqual(body["status"], "degraded")
+        self.assertEqual((body["cardano_outbox"]["pending"], body["cardano_outbox"]["failed"]), (2, 0))
+        self.assertGreaterEqual(body["cardano_outbox"]["oldest_due_seconds"], 3600)
+
+        CardanoOutbox.objects.filter(id=entry.id).update(status=CardanoOutbox.STATUS_FAILED, completed_at=timezone.now())
+        body = self.client.get("/api/integration/health/").json()
+        self.assertEqual(body["status"], "degraded")
+        self.assertEqual((body["cardano_outbox"]["pending"], body["cardano_outbox"]["failed"]), (1, 1))
+        self.assertEqual(body["cardano_outbox"]["recent_failed"], 1)
+
+        # An old failure stays counted but no longer degrades the status
+        CardanoOutbox.objects.filter(id=entry.id).update(completed_at=timezone.now() - timedelta(days=1))
+        body = self.client.get("/api/integration/health/").json()
+        self.assertEqual(body["status"], "ok")
+        self.assertEqual((body["cardano_outbox"]["failed"], body["cardano_outbox"]["recent_failed"]), (1, 0))
+
+    def test_reports_the_workers_circuit_breaker(self):
+        breaker = CircuitBreaker("cardano_service", failure_threshold=1, reset_timeout=30)
+        save_breaker_state(breaker)
+        body = self.client.get("/api/integration/health/").json()
+        self.assertEqual(body["status"], "ok")
+        self.assertEqual(body["cardano_service"]["state"], CLOSED)
+
+        breaker.record_failure()
+        save_breaker_state(breaker)
+        body = self.client.get("/api/integration/health/").json()
+        self.assertEqual(body["status"], "degraded")
+        self.assertEqual((body["cardano_service"]["state"], body["cardano_service"]["consecutive_failures"]), (OPEN, 1))
+        self.assertGreater(body["cardano_service"]["retry_in"], 0)
+
+
+class OutboxTransactionTests(TransactionTestCase):
+    def test_chain_call_runs_outside_transaction(self):
+        make_patient()
+        enqueue_record_anchor(PatientProfile.objects.get(), {"name": "x"}, "abc", "issuer")
+        in_transaction = []
+
+        def submit(**kwargs):
+            in_transaction.append(connection.in_atomic_block)
+            return {"tx_hash": "tx1", "record_hash": "rh1"}
+
+        with mock.patch("integration.outbox.submit_record_to_cardano", side_effect=submit):
+            self.assertTrue(process_entry(claim_due_entries()[0]))
+        self.assertEqual(in_transaction, [False])
+
+
+class MintBatchingTests(TestCase):
+    def setUp(self):
+        user = User.objects.create(username="doc", role=User.ROLE_DOCTOR)
+        self.doctor = DoctorProfile.objects.create(user=user, hospital="H", cardano_address="addr_test1")
+        self.old = CarePointsTransaction.objects.create(doctor=self.doctor, amount=5)
+        CarePointsTransaction.objects.filter(id=self.old.id).update(created_at=timezone.now() - timedelta(days=30))
+        self.new = CarePointsTransaction.objects.create(doctor=self.doctor, amount=7)
+
+    def test_only_rows_since_cutoff_are_batched(self):
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        with mock.patch("integration.mint_batching.CARDANO_MINT_BATCH_SINCE", since):
+            batches = aggregate_pending_mints(force=True)
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(batches[0].outputs, [{"address": "addr_test1", "amount": 7}])
+        self.old.refresh_from_db()
+        self.assertIsNone(self.old.mint_batch_id)
+
+    def test_nothing_is_batched_without_cutoff(self):
+        with mock.patch("integration.mint_batching.CARDANO_MINT_BATCH_SINCE", ""):
+            self.assertEqual(aggregate_pending_mints(force=True), [])
+
+    def test_batch_mint_fails_on_error_response(self):
+        outputs = [{"address": "addr_test1", "amount": 7}]
+        with StubServer([(404, {"error": "Not found"}, {}), (200, {"tx_hash": "tx9"}, {})]) as stub:
+            with mock.patch("integration.cardano_service.CARDANO_SERVICE_URL", stub.url):
+                self.assertIsNone(mint_care_points_batch(outputs, idempotency_key="k"))
+                self.assertEqual(mint_care_points_batch(outputs, idempotency_key="k")["tx_hash"], "tx9")
+        self.assertEqual(stub.requests, ["/mintCarePointsBatch", "/mintCarePointsBatch"])
+
+
+class BlockfrostClientTests(SimpleTestCase):
+    def blockfrost(self, url, **kwargs):
+        kwargs.setdefault("rate", 1000)
+        kwargs.setdefault("burst", 1000)
+        return BlockfrostClient(base_url=url, api_key="test", max_retries=3, **kwargs)
+
+    def test_retries_server_errors(self):
+        responses = [(500, {}, {}), (503, {}, {}), (200, {"hash": "tx"}, {})]
+        with StubServer(responses) as stub, mock.patch("integration.blockfrost_client.random.uniform", return_value=0):
+            client = self.blockfrost(stub.url)
+            response = client.get("/txs/tx", endpoint="/txs/{hash}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(stub.requests), 3)
+        stats = client.stats()["/txs/{hash}"]
+        self.assertEqual((stats["count"], stats["retries"], stats["errors"]), (3, 2, 2))
+
+    def test_gives_up_after_max_retries(self):
+        with StubServer([(502, {}, {})] * 10) as stub, mock.patch("integration.blockfrost_client.random.uniform", return_value=0):
+            response = self.blockfrost(stub.url).get("/blocks/latest")
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(len(stub.requests), 4)
+
+    def test_not_found_is_not_retried(self):
+        with StubServer([(404, {}, {})]) as stub:
+            client = self.blockfrost(stub.url)
+            self.assertEqual(client.get("/txs/missing").status_code, 404)
+        self.assertEqual(len(stub.requests), 1)
+        self.assertEqual(client.stats()["/txs/missing"]["errors"], 0)
+
+    def test_retry_after_is_honoured_and_clamped(self):
+        responses = [(429, {}, {"Retry-After": "3600"}), (200, {}, {})]
+        with StubServer(responses) as stub:
+            client = self.blockfrost(stub.url, max_retry_after=0.2)
+            started = time.monotonic()
+            response = client.get("/blocks/latest")
+            elapsed = time.monotonic() - started
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertLess(elapsed, 2)
+
+    def test_token_bucket_limits_rate(self):
+        with StubServer([(200, {}, {})] * 6) as stub:
+            client = self.blockfrost(stub.url, rate=20, burst=2)
+            started = time.monotonic()
+            for _ in range(6):
+                client.get("/blocks/latest")
+            elapsed = time.monotonic() - started
+        # Two requests from the burst, four more at 20 per second
+        self.assertGreaterEqual(elapsed, 0.19)
+
+    def test_token_bucket_refills_up_to_capacity(self):
+        bucket = TokenBucket(rate=100, capacity=3)
+        self.assertEqual([bucket._take() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertGreater(bucket._take(), 0)
+        time.sleep(0.1)
+        self.assertEqual([bucket._take() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertGreater(bucket._take(), 0)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("integration.circuit_breaker.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+
+    def trip(self):
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.record_failure()
+
+    def test_opens_at_threshold(self):
+        for _ in range(2):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        # A success resets the count of consecutive failures
+        self.assertEqual((self.breaker.state, self.breaker.failures), (CLOSED, 1))
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_fails_fast_while_open(self):
+        self.trip()
+        self.now += 29
+        self.assertFalse(self.breaker.allow_request())
+        self.assertEqual(self.breaker.snapshot()["retry_in"], 1)
+
+    def test_single_probe_when_half_open(self):
+        self.trip()
+        self.now += 30
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        self.breaker.record_success()
+        self.assertEqual((self.breaker.state, self.breaker.failures), (CLOSED, 0))
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_failed_probe_reopens(self):
+        self.trip()
+        self.now += 30
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.now += 29
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_lost_probe_is_replaced_after_reset_timeout(self):
+        self.trip()
+        self.now += 30
+        self.assertTrue(self.breaker.allow_request())
+        self.now += 30
+        self.assertTrue(self.breaker.allow_request())
+
+
+class SimulatorTests(SimpleTestCase):
+    def setUp(self):
+        # No blocks unless a test mints one or shortens the interval
+        self.start(block_time=3600)
+
+    def start(self, block_time):
+        server, self.chain = start_simulator(port=0, chain=ChainSimulator(block_time=block_time, seed=1))
+        self.addCleanup(self.chain.stop)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def submit(self, **body):
+        body.setdefault("record_hash", "ab" * 32)
+        return requests.post(f"{self.url}/submitRecord", json=body, timeout=5)
+
+    def wait_for_block(self, tx_hash):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            response = requests.get(f"{self.url}/api/v0/txs/{tx_hash}", timeout=5)
+            if response.status_code == 200:
+                return response.json()
+            time.sleep(0.05)
+        self.fail(f"{tx_hash} was not included in a block")
+
+    def test_submitted_record_waits_in_the_mempool_until_the_next_block(self):
+        tx_hash = self.submit(idempotency_key="anchor:1", metadata={"msg": ["x"]}).json()["tx_hash"]
+        self.assertEqual(requests.get(f"{self.url}/status", timeout=5).json(), {"height": 0, "mempool": 1, "transactions": 1})
+        self.assertEqual(requests.get(f"{self.url}/api/v0/txs/{tx_hash}", timeout=5).status_code, 404)
+
+        self.assertEqual(self.chain.mint_block(), 1)
+        tx = requests.get(f"{self.url}/api/v0/txs/{tx_hash}", timeout=5).json()
+        self.assertEqual((tx["hash"], tx["block_height"], tx["index"]), (tx_hash, 1, 0))
+        self.assertEqual(self.chain.mempool, [])
+        metadata = requests.get(f"{self.url}/api/v0/txs/{tx_hash}/metadata", timeout=5).json()
+        self.assertEqual(metadata, [{"label": "674", "json_metadata": {"msg": ["x"]}}])
+
+    def test_blocks_are_produced_every_block_time(self):
+        self.start(block_time=0.1)
+        tx_hash = self.submit().json()["tx_hash"]
+        self.assertGreaterEqual(self.wait_for_block(tx_hash)["block_height"], 1)
+
+    def test_idempotency_key_returns_the_same_transaction(self):
+        first = self.submit(idempotency_key="anchor:1").json()["tx_hash"]
+        self.assertEqual(self.submit(idempotency_key="anchor:1").json()["tx_hash"], first)
+        self.assertNotEqual(self.submit(idempotency_key="anchor:2").json()["tx_hash"], first)
+
+    def test_unknown_and_invalid_requests(self):
+        self.assertEqual(self.submit(record_hash="").status_code, 400)
+        self.assertEqual(requests.get(f"{self.url}/api/v0/txs/{'cd' * 32}", timeout=5).status_code, 404)
+        self.assertEqual(requests.get(f"{self.url}/api/v0/txs/not-a-hash", timeout=5).status_code, 400)
+
+    def test_injected_failures(self):
+        self.chain.faults = FaultConfig(error_rate=1.0)
+        self.assertEqual(self.submit().status_code, 500)
+        self.chain.faults = FaultConfig(throttle_rate=1.0)
+        response = self.submit()
+        self.assertEqual((response.status_code, response.headers["Retry-After"]), (429, "1"))
+        self.chain.faults = FaultConfig(hang_rate=1.0, hang_seconds=0.01)
+        self.assertEqual(self.submit().status_code, 504)
+        self.assertEqual(self.chain.txs, {})
+
+    def test_injected_latency(self):
+        self.chain.faults = FaultConfig(latency_ms=200)
+        started = time.monotonic()
+        self.assertEqual(self.submit().status_code, 200)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+
+class MerkleTests(SimpleTestCase):
+    def test_every_leaf_proves_against_root(self):
+        for size in range(1, 10):
+            leaves = [merkle_leaf(f"PAT-{i}", f"{i:064x}") for i in range(size)]
+            root, proofs = build_merkle_tree(leaves)
+            for leaf, proof in zip(leaves, proofs):
+                self.assertTrue(verify_merkle_proof(leaf, proof, root))
+
+    def test_tampered_leaf_or_proof_fails(self):
+        leaves = [merkle_leaf(f"PAT-{i}", f"{i:064x}") for i in range(5)]
+        root, proofs = build_merkle_tree(leaves)
+        self.assertFalse(verify_merkle_proof(merkle_leaf("PAT-0", f"{9:064x}"), proofs[0], root))
+        self.assertFalse(verify_merkle_proof(leaves[0], proofs[1], root))
+        # The leaf binds the patient ID: same hash under another patient fails
+        self.assertFalse(verify_merkle_proof(merkle_leaf("PAT-1", f"{0:064x}"), proofs[0], root))
+
+
+class VerifyRecordTests(TestCase):
+    record_hash = "ab" * 32
+
+    def test_unknown_hash_is_not_verified_in_mock_mode(self):
+        result = verify_record_hash(self.record_hash, "PAT-1", allow_mock=True)
+        self.assertFalse(result["verified"])
+        self.assertNotIn("mock", result)
+
+    def test_mock_transaction_is_flagged_and_echoed(self):
+        with mock.patch("integration.cardano_service.lookup_transaction", return_value=None):
+            result = verify_record_hash(self.record_hash, "PAT-1", tx_hash="mock_tx_1", allow_mock=True)
+        self.assertFalse(result["verified"])
+        self.assertTrue(result["mock"])
+        self.assertEqual(result["tx_hash"], "mock_tx_1")
+
+    def test_indexed_anchor_verifies(self):
+        AnchoredRecord.objects.create(tx_hash="tx1", record_hash=self.record_hash, patient_id="PAT-1")
+        self.assertTrue(verify_record_hash("0x" + self.record_hash, "PAT-1")["verified"])
+        self.assertFalse(verify_record_hash(self.record_hash, "PAT-2", allow_mock=False)["verified"])
+
+    def test_indexed_merkle_anchor_verifies_with_proof(self):
+        leaves = [merkle_leaf("PAT-1", self.record_hash), merkle_leaf("PAT-2", "cd" * 32)]
+        root, proofs = build_merkle_tree(leaves)
+        AnchoredRecord.objects.create(tx_hash="tx2", merkle_root=root)
+        result = verify_record_hash(self.record_hash, "PAT-1", merkle_proof=proofs[0])
+        self.assertEqual((result["verified"], result["tx_hash"]), (True, "tx2"))
+        self.assertFalse(verify_record_hash(self.record_hash, "PAT-1", merkle_proof=proofs[1])["verified"])
+
+
+@mock.patch("integration.tx_cache.get_tip_height", return_value=100 + CARDANO_CONFIRMATION_DEPTH - 1)
+class TxCacheTests(TestCase):
+    TX_HASH = "ef" * 32
+
+    def tearDown(self):
+        invalidate_transaction(self.TX_HASH)
+
+    def entry(self, block_height):
+        return {"tx": {"hash": self.TX_HASH, "block_height": block_height}, "metadata": {"record_hash": "ab"}}
+
+    def test_confirmed_transaction_is_fetched_once(self, tip):
+        with mock.patch("integration.tx_cache._fetch", return_value=self.entry(100)) as fetch:
+            first = lookup_transaction(self.TX_HASH)
+            self.assertEqual(lookup_transaction(self.TX_HASH), first)
+            invalidate_transaction(self.TX_HASH)
+            self.assertEqual(lookup_transaction(self.TX_HASH), first)
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(CardanoTxCache.objects.get(tx_hash=self.TX_HASH).block_height, 100)
+
+    def test_shallow_transaction_is_not_persisted(self, tip):
+        with mock.patch("integration.tx_cache._fetch", return_value=self.entry(101)):
+            self.assertIsNotNone(lookup_transaction(self.TX_HASH))
+        self.assertFalse(CardanoTxCache.objects.exists())
+
+    def test_unknown_hash_is_negatively_cached(self, tip):
+        with mock.patch("integration.tx_cache._fetch", return_value=None) as fetch:
+            self.assertIsNone(lookup_transaction(self.TX_HASH))
+            self.assertIsNone(lookup_transaction(self.TX_HASH))
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_errors_are_not_cached(self, tip):
+        with mock.patch("integration.tx_cache._fetch", side_effect=[LookupError("503"), self.entry(100)]) as fetch:
+            self.assertIsNone(lookup_transaction(self.TX_HASH))
+            self.assertIsNotNone(lookup_transaction(self.TX_HASH))
+        self.assertEqual(fetch.call_count, 2)
+
+
+class IndexerTests(TestCase):
+    def tearDown(self):
+        set_blockfrost_client(None)
+
+    def test_fresh_cursor_starts_at_configured_page(self):
+        anchor = {
+            "tx_hash": "tx1",
+            "json_metadata": {"anchor_validator": ANCHOR_VALIDATOR_HASH, "record_hash": "ab", "patient_id": "PAT-1"},
+        }
+        other = {"tx_hash": "tx2", "json_metadata": {"msg": ["hello"]}}
+        with StubServer([(200, [anchor, other], {})]) as stub, \
+                mock.patch("integration.indexer.CARDANO_INDEXER_START_PAGE", 42):
+            set_blockfrost_client(BlockfrostClient(base_url=stub.url, api_key="test"))
+            totals = run_indexer()
+        self.assertIn("page=42&", stub.requests[0])
+        self.assertEqual((totals["fetched"], totals["indexed"]), (2, 1))
+        cursor = IndexerCursor.objects.get()
+        self.assertEqual((cursor.page, cursor.position), (42, 2))
+        self.assertEqual(list(AnchoredRecord.objects.values_list("tx_hash", flat=True)), ["tx1"])
+
+
+class BalanceSyncTests(TestCase):
+    def make_doctor(self, name, balance):
+        user = User.objects.create(username=name, role=User.ROLE_DOCTOR)
+        return DoctorProfile.objects.create(
+            user=user, hospital="H", cardano_address=f"addr_{name}", care_points_balance=balance
+        )
+
+    def test_changed_balances_are_written_without_losing_awards(self):
+        unchanged = self.make_doctor("unchanged", 10)
+        changed = self.make_doctor("changed", 10)
+        raced = self.make_doctor("raced", 10)
+        chain = {"addr_unchanged": 0, "addr_changed": 20, "addr_raced": 12}
+
+        # The sync reads balances before its Blockfrost lookups; a request
+        # then awards points to one doctor before the results are written
+        stale = list(doctors_to_sync().only("id", "cardano_address", "care_points_balance"))
+        DoctorProfile.objects.filter(id=raced.id).update(care_points_balance=F("care_points_balance") + 5)
+        doctors = mock.Mock()
+        doctors.only.return_value = stale
+
+        with mock.patch("integration.balance_sync.doctors_to_sync", return_value=doctors), \
+                mock.patch("integration.balance_sync.get_care_points_balance", side_effect=chain.get):
+            totals = sync_care_points_balances()
+
+        self.assertEqual(totals, {"synced": 3, "updated": 1})
+        balances = dict(DoctorProfile.objects.values_list("id", "care_points_balance"))
+        self.assertEqual(balances, {unchanged.id: 10, changed.id: 20, raced.id: 15})
+        self.assertFalse(DoctorProfile.objects.filter(care_points_synced_at__isnull=True).exists())
+
+
+class CanonicalJsonTests(SimpleTestCase):
+    def test_number_vectors(self):
+        vectors = [
+            (70.0, "70"),
+            (-0.0, "0"),
+            (0.1, "0.1"),
+            (1e-7, "1e-7"),
+            (0.000015, "0.000015"),
+            (1.5e-10, "1.5e-10"),
+            (5e-324, "5e-324"),
+            (123456789.0, "123456789"),
+            (2.0 ** 53 + 2, "9007199254740994"),
+            (2.0 ** 60, "1152921504606847000"),
+            (1.2345678901234568e+20, "123456789012345680000"),
+            (-1.2345678901234568e+20, "-123456789012345680000"),
+            (1e21, "1e+21"),
+            (2 ** 64, "18446744073709551616"),
+            (Decimal("70.00"), "70"),
+            (Decimal("1E-7"), "1e-7"),
+            (Decimal("12.3400"), "12.34"),
+            (Decimal("-0.5"), "-0.5"),
+        ]
+        for value, expected in vectors:
+            with self.subTest(value=value):
+                self.assertEqual(canonical_json(value), expected)
+                # Same text inside containers, where the fast encoder runs first
+                self.assertEqual(canonical_json([value]), f"[{expected}]")
+                self.assertEqual(canonical_json({"v": value, "w": 70.0}), f'{{"v":{expected},"w":70}}')
+
+    def test_keys_are_sorted_without_whitespace(self):
+        record = {"b": 1, "a": {"d": [1, 2], "c": None}, "ä": True}
+        self.assertEqual(canonical_json(record), '{"a":{"c":null,"d":[1,2]},"b":1,"ä":true}')
+        self.assertEqual(canonical_json(record), canonical_json(dict(reversed(list(record.items())))))
+
+    def test_scalar_vectors(self):
+        eat = datetime.timezone(datetime.timedelta(hours=3))
+        record = {
+            "aware": datetime.datetime(2024, 5, 1, 12, 30, tzinfo=eat),
+            "naive": datetime.datetime(2024, 5, 1, 9, 30, 0, 500),
+            "date": datetime.date(2024, 5, 1),
+            "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "raw": b"\x00\xff",
+            "tags": {"b", "a"},
+        }
+        self.assertEqual(
+            canonical_json(record),
+            '{"aware":"2024-05-01T09:30:00Z","date":"2024-05-01",'
+            '"id":"12345678-1234-5678-1234-567812345678","naive":"2024-05-01T09:30:00.000500Z",'
+            '"raw":"00ff","tags":["a","b"]}',
+        )
+
+    def test_non_finite_numbers_are_rejected(self):
+        for value in (float("nan"), float("inf"), Decimal("NaN")):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                canonical_json({"v": value})
+
+    def test_bulk_hashes_match(self):
+        records = [{"i": i, "w": 70.0 + i, "d": Decimal(i) / 8} for i in range(600)]
+        self.assertEqual(hash_records_bulk(records, chunk_size=50), [hash_record(record) for record in records])
+        self.assertEqual(hash_record({"w": 70.0}), hash_record({"w": 70}))
+
+
+class CIDTests(SimpleTestCase):
+    def test_known_cids(self):
+        self.assertEqual(compute_cid(b"hello world\n"), "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o")
+        builder = CIDBuilder(raw_leaves=True)
+        builder.update(b"hello world")
+        self.assertEqual(builder.cid(), "bafkreifzjut3te2nhyekklss27nh3k72ysco7y32koao5eei66wof36n5e")
+
+    def test_builder_matches_one_shot_across_chunks(self):
+        data = os.urandom(3 * CHUNK_SIZE + 17)
+        builder = CIDBuilder()
+        for start in range(0, len(data), 100000):
+            builder.update(data[start:start + 100000])
+        self.assertEqual(builder.cid(), compute_cid(data))
+
+    def test_cid_matches_v0_and_v1(self):
+        data = os.urandom(2 * CHUNK_SIZE + 1)
+        raw_leaves = CIDBuilder(raw_leaves=True)
+        raw_leaves.update(data)
+        v1 = raw_leaves.cid()
+        self.assertTrue(v1.startswith("bafy"))
+        for cid in (compute_cid(data), v1):
+            with self.subTest(cid=cid):
+                self.assertTrue(cid_matches(cid, data))
+                self.assertFalse(cid_matches(cid, data[:-1]))
+        self.assertTrue(cid_matches("bafkreifzjut3te2nhyekklss27nh3k72ysco7y32koao5eei66wof36n5e", b"hello world"))
+        # CIDv0 DAG written as CIDv1 (ipfs cid format -v 1)
+        self.assertTrue(cid_matches("bafybeicg2rebjoofv4kbyovkw7af3rpiitvnl6i7ckcywaq6xjcxnc2mby", b"hello world\n"))
+
+    def test_unsupported_cids_never_match(self):
+        for cid in ("zb2rhe5P4gXftAwvA4eXQ5HJwsER2owDyS9sKaQRRVQPn93bA", "k51qzi5uqu5dl", "b!!", "bafyinvalid", ""):
+            with self.subTest(cid=cid):
+                self.assertFalse(cid_matches(cid, b"hello world"))
+
+
+class UploadTests(SimpleTestCase):
+    DATA = os.urandom(3 * CHUNK_SIZE + 1000)
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def upload(self, name="scan.pdf"):
+        return SimpleUploadedFile(name, self.DATA, content_type="application/pdf")
+
+    def test_upload_is_hashed_while_it_is_stored(self):
+        with mock.patch("integration.uploads._hash_stored") as rehash:
+            stored = save_upload(self.upload(), "lab_results/scan.pdf")
+        rehash.assert_not_called()
+        self.assertEqual(stored.sha256, hashlib.sha256(self.DATA).hexdigest())
+        self.assertEqual(stored.cid, compute_cid(self.DATA))
+        self.assertEqual(stored.size, len(self.DATA))
+        self.assertFalse(stored.deduplicated)
+        with default_storage.open(stored.path, "rb") as f:
+            self.assertEqual(f.read(), self.DATA)
+
+    def test_rewound_reads_are_hashed_once(self):
+        hashing = HashingFile(ContentFile(self.DATA), "scan.pdf")
+        hashing.read(1000)
+        hashing.seek(0)
+        self.assertEqual(b"".join(hashing.chunks()), self.DATA)
+        self.assertTrue(hashing.complete)
+        self.assertEqual(hashing.sha256.hexdigest(), hashlib.sha256(self.DATA).hexdigest())
+
+        hashing = HashingFile(ContentFile(self.DATA), "scan.pdf")
+        hashing.seek(10)
+        hashing.read()
+        self.assertFalse(hashing.complete)
+
+    def test_identical_upload_reuses_the_stored_file(self):
+        first = save_upload(self.upload(), "lab_results/scan.pdf")
+        known = {first.sha256: first.path}
+        second = save_upload(self.upload("copy.pdf"), "lab_results/copy.pdf", find_existing=known.get)
+
+        self.assertTrue(second.deduplicated)
+        self.assertEqual((second.path, second.sha256, second.cid), (first.path, first.sha256, first.cid))
+        self.assertEqual(default_storage.listdir("lab_results")[1], ["scan.pdf"])
+
+    def test_different_upload_is_kept(self):
+        first = save_upload(self.upload(), "lab_results/scan.pdf")
+        other = SimpleUploadedFile("other.pdf", b"other")
+        stored = save_upload(other, "lab_results/other.pdf", find_existing={first.sha256: first.path}.get)
+        self.assertFalse(stored.deduplicated)
+        self.assertEqual(sorted(default_storage.listdir("lab_results")[1]), ["other.pdf", "scan.pdf"])
+
+
+class FetchIpfsContentTests(SimpleTestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        set_cid_cache(CIDCache(directory=self.cache_dir.name))
+
+    def tearDown(self):
+        set_cid_cache(None)
+        set_ipfs_client(None)
+        self.cache_dir.cleanup()
+
+    def fetch(self, cid, body):
+        with StubServer([(200, body, {})]) as stub:
+            set_ipfs_client(IPFSClient(api_url=stub.url, gateway=f"{stub.url}/ipfs/", max_retries=0))
+            return fetch_ipfs_content(cid)
+
+    def test_verified_content_is_served_and_cached(self):
+        cid = "bafkreifzjut3te2nhyekklss27nh3k72ysco7y32koao5eei66wof36n5e"
+        self.assertEqual(self.fetch(cid, b"hello world"), b"hello world")
+        # Served from the cache now, no gateway needed
+        self.assertEqual(fetch_ipfs_content(cid), b"hello world")
+
+    def test_mismatching_content_is_refused(self):
+        self.assertIsNone(self.fetch("QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o", b"tampered\n"))
+        self.assertIsNone(self.fetch("bafkreifzjut3te2nhyekklss27nh3k72ysco7y32koao5eei66wof36n5e", b"tampered"))
+
+    def test_uncheckable_cid_is_refused(self):
+        self.assertIsNone(self.fetch("zb2rhe5P4gXftAwvA4eXQ5HJwsER2owDyS9sKaQRRVQPn93bA", b"hello world"))
+
+
+TEST_MASTER_KEY = "AAECAwQFBgcICQoLDA0ODxAREhMUFRYXGBkaGxwdHh8"
+
+
+class EncryptionTests(SimpleTestCase):
+    key = bytes(range(32))
+
+    def test_round_trip(self):
+        for size in (0, 1, 15, 16, 17, 64, 1000):
+            with self.subTest(size=size):
+                data = os.urandom(size)
+                sealed = encrypt_bytes(self.key, data, chunk_size=16)
+                self.assertEqual(len(sealed), encrypted_size(size, chunk_size=16))
+                self.assertEqual(decrypt_bytes(self.key, sealed), data)
+
+    def test_reader_matches_encrypt_bytes(self):
+        data = os.urandom(1000)
+        reader = EncryptingReader(self.key, io.BytesIO(data), nonce_prefix=b"\x01" * 7, chunk_size=64)
+        pieces = iter(lambda: reader.read(37), b"")
+        self.assertEqual(decrypt_bytes(self.key, b"".join(pieces)), data)
+
+    def test_truncated_or_tampered_payload_fails(self):
+        data = os.urandom(100)
+        sealed = encrypt_bytes(self.key, data, chunk_size=16)
+        header, sealed_chunk = encryption.HEADER_SIZE, 16 + encryption.TAG_SIZE
+        truncated = sealed[:header + 3 * sealed_chunk]
+        reordered = sealed[:header] + sealed[header + sealed_chunk:header + 2 * sealed_chunk] + \
+            sealed[header:header + sealed_chunk] + sealed[header + 2 * sealed_chunk:]
+        flipped = sealed[:-1] + bytes([sealed[-1] ^ 1])
+        for name, payload in (("truncated", truncated), ("reordered", reordered), ("flipped", flipped)):
+            with self.subTest(name), self.assertRaises(DecryptionError):
+                decrypt_bytes(self.key, payload)
+        with self.assertRaises(DecryptionError):
+            decrypt_bytes(bytes(32), sealed)
+        with self.assertRaises(DecryptionError):
+            decrypt_bytes(self.key, b"not encrypted")
+
+    def test_master_key_is_required(self):
+        for value in ("", "c2hvcnQ", "not base64 !"):
+            with self.subTest(value=value), mock.patch("integration.encryption.IPFS_ENCRYPTION_KEY", value):
+                with self.assertRaises(ImproperlyConfigured):
+                    wrap_key(self.key, "PAT-1")
+
+    @override_settings(DEBUG=True)
+    def test_missing_key_fails_the_deploy_check(self):
+        with mock.patch("integration.cardano_config.IPFS_ENCRYPTION_KEY", ""):
+            self.assertEqual([error.id for error in check_encryption_key(None)], ["integration.E001"])
+        with mock.patch("integration.cardano_config.IPFS_ENCRYPTION_KEY", TEST_MASTER_KEY):
+            self.assertEqual(check_encryption_key(None), [])
+
+    def test_wrapped_key_is_bound_to_subject(self):
+        with mock.patch("integration.encryption.IPFS_ENCRYPTION_KEY", TEST_MASTER_KEY):
+            wrapped = wrap_key(self.key, "PAT-1")
+            self.assertEqual(unwrap_key(wrapped, "PAT-1"), self.key)
+            with self.assertRaises(DecryptionError):
+                unwrap_key(wrapped, "PAT-2")
+
+
+class DataKeyTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("integration.encryption.IPFS_ENCRYPTION_KEY", TEST_MASTER_KEY)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        encryption._keys.clear()
+        self.addCleanup(encryption._keys.clear)
+
+    def test_keys_are_created_once_per_patient(self):
+        key = get_data_key("PAT-1")
+        self.assertEqual(len(key), 32)
+        encryption._keys.clear()
+        self.assertEqual(get_data_key("PAT-1"), key)
+        self.assertIsNone(get_data_key("PAT-2", create=False))
+
+        keys = get_data_keys(["PAT-1", "PAT-2", "PAT-3"])
+        self.assertEqual(keys["PAT-1"], key)
+        self.assertEqual(len(set(keys.values())), 3)
+        encryption._keys.clear()
+        self.assertEqual(get_data_key("PAT-3", create=False), keys["PAT-3"])
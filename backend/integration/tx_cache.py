@@ -0,0 +1,261 @@
+"""
+Transaction Lookup Cache
+Caches Blockfrost transaction details and label-674 metadata.
+
+Lookups go memory LRU -> CardanoTxCache table -> Blockfrost. Transactions at
+least CARDANO_CONFIRMATION_DEPTH blocks deep are persisted and never fetched
+again; shallower ones are kept in memory briefly, and unknown hashes are
+negatively cached for CARDANO_TX_NEGATIVE_TTL seconds. alookup_transaction()
+is the async counterpart and shares the memory tier.
+"""
+import asyncio
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any
+
+import httpx
+
+from .models import CardanoTxCache
+from .lru_cache import LRUCache
+from .blockfrost_client import get_blockfrost_client
+from .cardano_config import (
+    BLOCKFROST_POOL_SIZE,
+    CARDANO_CONFIRMATION_DEPTH,
+    CARDANO_TX_CACHE_SIZE,
+    CARDANO_TX_NEGATIVE_TTL,
+    CARDANO_TX_UNCONFIRMED_TTL,
+)
+
+# Blockfrost answers 404 for unknown transactions and 400 for malformed hashes
+NOT_FOUND_STATUS_CODES = {400, 404}
+TIP_TTL = 20  # seconds
+
+_memory = LRUCache(CARDANO_TX_CACHE_SIZE)
+_executor = ThreadPoolExecutor(max_workers=BLOCKFROST_POOL_SIZE, thread_name_prefix="blockfrost")
+_tip = {"height": None, "fetched_at": 0.0}
+_tip_lock = threading.Lock()
+
+
+def extract_record_metadata(metadata_array) -> Optional[Dict[str, Any]]:
+    """
+    Find metadata with label 674 (CIP-20) in a Blockfrost metadata response
+    """
+    for item in metadata_array or []:
+        if item.get("label") == "674":
+            return item.get("json_metadata") or item.get("metadata")
+    return None
+
+
+def _cached_tip() -> Optional[int]:
+    with _tip_lock:
+        if _tip["height"] is not None and time.monotonic() - _tip["fetched_at"] < TIP_TTL:
+            return _tip["height"]
+    return None
+
+
+def _store_tip(response) -> Optional[int]:
+    if response.status_code != 200:
+        return None
+    height = response.json().get("height")
+    with _tip_lock:
+        _tip["height"] = height
+        _tip["fetched_at"] = time.monotonic()
+    return height
+
+
+def get_tip_height() -> Optional[int]:
+    """
+    Latest block height, refreshed at most every TIP_TTL seconds
+    """
+    height = _cached_tip()
+    if height is not None:
+        return height
+    return _store_tip(get_blockfrost_client().get("/blocks/latest", endpoint="/blocks/latest"))
+
+
+async def aget_tip_height() -> Optional[int]:
+    """
+    Async counterpart of get_tip_height()
+    """
+    height = _cached_tip()
+    if height is not None:
+        return height
+    return _store_tip(await get_blockfrost_client().aget("/blocks/latest", endpoint="/blocks/latest"))
+
+
+def _depth_reached(tx_data: Dict[str, Any], tip: Optional[int]) -> bool:
+    block_height = tx_data.get("block_height")
+    if block_height is None or tip is None:
+        return False
+    return tip - block_height + 1 >= CARDANO_CONFIRMATION_DEPTH
+
+
+def is_confirmed(tx_data: Dict[str, Any]) -> bool:
+    if tx_data.get("block_height") is None:
+        return False
+    return _depth_reached(tx_data, get_tip_height())
+
+
+async def ais_confirmed(tx_data: Dict[str, Any]) -> bool:
+    if tx_data.get("block_height") is None:
+        return False
+    return _depth_reached(tx_data, await aget_tip_height())
+
+
+def _fetch_metadata(tx_hash: str):
+    return get_blockfrost_client().get(f"/txs/{tx_hash}/metadata", endpoint="/txs/{hash}/metadata")
+
+
+def _fetch(tx_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetch the transaction and its metadata concurrently.
+
+    Returns:
+        {"tx": ..., "metadata": ...}, None if Blockfrost does not know the hash
+
+    Raises:
+        LookupError if Blockfrost answered with an error (nothing is cached)
+    """
+    client = get_blockfrost_client()
+    metadata_future = _executor.submit(_fetch_metadata, tx_hash)
+    tx_response = client.get(f"/txs/{tx_hash}", endpoint="/txs/{hash}")
+    return _parse_responses(tx_hash, tx_response, metadata_future.result())
+
+
+async def _afetch(tx_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Async counterpart of _fetch(): both requests are in flight together
+    """
+    client = get_blockfrost_client()
+    tx_response, metadata_response = await asyncio.gather(
+        client.aget(f"/txs/{tx_hash}", endpoint="/txs/{hash}"),
+        client.aget(f"/txs/{tx_hash}/metadata", endpoint="/txs/{hash}/metadata"),
+    )
+    return _parse_responses(tx_hash, tx_response, metadata_response)
+
+
+def _parse_responses(tx_hash: str, tx_response, metadata_response) -> Optional[Dict[str, Any]]:
+    if tx_response.status_code in NOT_FOUND_STATUS_CODES:
+        return None
+    if tx_response.status_code != 200:
+        raise LookupError(f"Blockfrost returned {tx_response.status_code} for {tx_hash}")
+
+    metadata = None
+    if metadata_response.status_code == 200:
+        metadata = extract_record_metadata(metadata_response.json())
+    elif metadata_response.status_code not in NOT_FOUND_STATUS_CODES:
+        raise LookupError(f"Blockfrost returned {metadata_response.status_code} for {tx_hash} metadata")
+
+    return {"tx": tx_response.json(), "metadata": metadata}
+
+
+def lookup_transaction(tx_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Cached transaction details and label-674 metadata
+
+    Args:
+        tx_hash: Transaction hash
+
+    Returns:
+        {"tx": transaction details, "metadata": label 674 metadata or None},
+        or None if the transaction is unknown or Blockfrost is failing
+    """
+    found, entry = _memory.get(tx_hash)
+    if found:
+        return entry
+
+    row = CardanoTxCache.objects.filter(tx_hash=tx_hash).first()
+    if row:
+        entry = {"tx": row.tx_data, "metadata": row.metadata}
+        _memory.set(tx_hash, entry)
+        return entry
+
+    try:
+        entry = _fetch(tx_hash)
+    except LookupError as e:
+        print(f"Error querying Blockfrost API: {e}")
+        return None
+
+    if entry is None:
+        _memory.set(tx_hash, None, ttl=CARDANO_TX_NEGATIVE_TTL)
+        return None
+
+    if is_confirmed(entry["tx"]):
+        # get_or_create tolerates another worker caching it first; the content is identical
+        CardanoTxCache.objects.get_or_create(
+            tx_hash=tx_hash,
+            defaults={
+                "tx_data": entry["tx"],
+                "metadata": entry["metadata"],
+                "block_height": entry["tx"].get("block_height"),
+            },
+        )
+        _memory.set(tx_hash, entry)
+    else:
+        _memory.set(tx_hash, entry, ttl=CARDANO_TX_UNCONFIRMED_TTL)
+    return entry
+
+
+async def alookup_transaction(tx_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Async counterpart of lookup_transaction(), sharing its memory tier
+    """
+    found, entry = _memory.get(tx_hash)
+    if found:
+        return entry
+
+    row = await CardanoTxCache.objects.filter(tx_hash=tx_hash).afirst()
+    if row:
+        entry = {"tx": row.tx_data, "metadata": row.metadata}
+        _memory.set(tx_hash, entry)
+        return entry
+
+    try:
+        entry = await _afetch(tx_hash)
+    except (LookupError, httpx.TransportError) as e:
+        print(f"Error querying Blockfrost API: {e}")
+        return None
+
+    if entry is None:
+        _memory.set(tx_hash, None, ttl=CARDANO_TX_NEGATIVE_TTL)
+        return None
+
+    if await ais_confirmed(entry["tx"]):
+        await CardanoTxCache.objects.aget_or_create(
+            tx_hash=tx_hash,
+            defaults={
+                "tx_data": entry["tx"],
+                "metadata": entry["metadata"],
+                "block_height": entry["tx"].get("block_height"),
+            },
+        )
+        _memory.set(tx_hash, entry)
+    else:
+        _memory.set(tx_hash, entry, ttl=CARDANO_TX_UNCONFIRMED_TTL)
+    return entry
+
+
+def warm_transactions(tx_hashes) -> int:
+    """
+    Load persisted transactions into the memory tier with one query per 500
+    hashes, ahead of many lookups
+
+    Returns:
+        Number of transactions loaded
+    """
+    missing = [tx_hash for tx_hash in tx_hashes if not _memory.get(tx_hash)[0]]
+    loaded = 0
+    for start in range(0, len(missing), 500):
+        rows = CardanoTxCache.objects.filter(tx_hash__in=missing[start:start + 500])
+        for row in rows.only("tx_hash", "tx_data", "metadata"):
+            _memory.set(row.tx_hash, {"tx": row.tx_data, "metadata": row.metadata})
+            loaded += 1
+    return loaded
+
+
+def invalidate_transaction(tx_hash: str):
+    """
+    Drop a transaction from the memory tier (e.g. after a rollback)
+    """
+    _memory.delete(tx_hash)
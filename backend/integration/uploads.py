@@ -0,0 +1,174 @@
+"""
+Streaming Uploads
+Saves uploaded files to storage chunk by chunk while computing their SHA-256
+and IPFS CID, so memory per upload stays constant whatever the file size.
+"""
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from .cid import CIDBuilder
+from .encryption import NONCE_PREFIX_SIZE, encrypt_stream, get_data_key_entry, unwrap_key
+from .models import IPFSPin
+
+READ_CHUNK = 64 * 1024
+
+
+class HashingFile(File):
+    """
+    File wrapper that hashes bytes as storage reads them. Storage backends
+    may read through chunks() or read() and may rewind; only bytes past the
+    furthest point already hashed are fed to the hashes.
+    """
+
+    def __init__(self, file, name=None):
+        super().__init__(file, name)
+        self.sha256 = hashlib.sha256()
+        self.cid_builder = CIDBuilder()
+        self._position = 0
+        self._hashed = 0
+        self._skipped = False
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        start = self._position
+        self._position += len(data)
+        if start > self._hashed:
+            self._skipped = True
+        elif self._position > self._hashed:
+            fresh = data[self._hashed - start:]
+            self.sha256.update(fresh)
+            self.cid_builder.update(fresh)
+            self._hashed = self._position
+        return data
+
+    def seek(self, offset, whence=0):
+        result = self.file.seek(offset, whence)
+        self._position = self.file.tell()
+        return result
+
+    def chunks(self, chunk_size=None):
+        chunk_size = chunk_size or READ_CHUNK
+        if self.seekable():
+            self.seek(0)
+        while True:
+            data = self.read(chunk_size)
+            if not data:
+                break
+            yield data
+
+    def __iter__(self):
+        # File.__iter__ splits on newlines; storage only needs the bytes
+        return self.chunks()
+
+    @property
+    def complete(self) -> bool:
+        """True if every byte passed through the hashes exactly once, in order"""
+        return not self._skipped and self._hashed == self.size
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    size: int
+    sha256: str
+    cid: str
+    deduplicated: bool = False
+
+
+def _hash_stored(path: str):
+    sha256 = hashlib.sha256()
+    cid_builder = CIDBuilder()
+    with default_storage.open(path, "rb") as f:
+        for chunk in f.chunks(READ_CHUNK):
+            sha256.update(chunk)
+            cid_builder.update(chunk)
+    return sha256, cid_builder
+
+
+def save_upload(
+    upload,
+    path: str,
+    find_existing: Optional[Callable[[str], Optional[str]]] = None,
+) -> StoredUpload:
+    """
+    Stream an uploaded file into default_storage, hashing it on the way
+
+    Args:
+        upload: Django/Ninja UploadedFile (or any File)
+        path: Storage name to save under (storage may pick a free variant)
+        find_existing: Called with the SHA-256 hex digest; returns the storage
+            path of an identical file already stored, or None. When it finds
+            one, the new copy is deleted and the existing path is returned.
+
+    Returns:
+        StoredUpload with the final path, size, SHA-256 and CIDv0
+    """
+    hashing = HashingFile(upload, upload.name)
+    saved_path = default_storage.save(path, hashing)
+
+    if hashing.complete:
+        sha256, cid_builder = hashing.sha256, hashing.cid_builder
+    else:
+        # The backend read the file out of order; hash what was stored
+        sha256, cid_builder = _hash_stored(saved_path)
+    digest = sha256.hexdigest()
+    cid = cid_builder.cid()
+    size = cid_builder.size
+
+    if find_existing is not None:
+        existing = find_existing(digest)
+        if existing and existing != saved_path and default_storage.exists(existing):
+            default_storage.delete(saved_path)
+            return StoredUpload(existing, size, digest, cid, deduplicated=True)
+
+    return StoredUpload(saved_path, size, digest, cid)
+
+
+def queue_file_pin(stored: StoredUpload, subject: Optional[str] = None) -> str:
+    """
+    Queue a stored file for pinning by process_ipfs_pin_queue, which streams
+    it from storage to the IPFS node
+
+    Args:
+        stored: Result of save_upload
+        subject: Health ID of the patient whose data key encrypts the file;
+            None pins the plaintext
+
+    Returns:
+        CID the file will have on IPFS (of the ciphertext when encrypted)
+    """
+    if subject is None:
+        IPFSPin.objects.get_or_create(
+            cid=stored.cid,
+            defaults={"size": stored.size, "storage_path": stored.path},
+        )
+        return stored.cid
+
+    data_key = get_data_key_entry(subject)
+    existing = IPFSPin.objects.filter(storage_path=stored.path, data_key=data_key).values_list("cid", flat=True).first()
+    if existing:
+        return existing
+
+    # The ciphertext CID is computed now, with a nonce prefix kept on the pin
+    # so the worker reproduces exactly these bytes when it streams the file
+    key = unwrap_key(data_key.wrapped_key, subject)
+    nonce_prefix = os.urandom(NONCE_PREFIX_SIZE)
+    cid_builder = CIDBuilder()
+    with default_storage.open(stored.path, "rb") as f:
+        for chunk in encrypt_stream(key, f, nonce_prefix=nonce_prefix):
+            cid_builder.update(chunk)
+    pin, _ = IPFSPin.objects.get_or_create(
+        cid=cid_builder.cid(),
+        defaults={
+            "size": cid_builder.size,
+            "storage_path": stored.path,
+            "data_key": data_key,
+            "nonce_prefix": nonce_prefix,
+        },
+    )
+    return pin.cid
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from ninja import Router
+
+from .models import CardanoOutbox
+from .circuit_breaker import CLOSED, cardano_service_breaker, load_breaker_state
+from .cardano_config import CARDANO_OUTBOX_FAILED_WINDOW, CARDANO_OUTBOX_MAX_LAG
+
+router = Router(tags=["Integration"])
+
+
+def outbox_health():
+    """
+    Backlog of the Cardano outbox, shared by every process through the database
+
+    Returns:
+        {"pending": entries waiting or in flight, "failed": entries that gave
+        up, "recent_failed": those that gave up within CARDANO_OUTBOX_FAILED_WINDOW,
+        "oldest_due_seconds": how long the oldest due entry has waited}
+    """
+    now = timezone.now()
+    open_statuses = [CardanoOutbox.STATUS_PENDING, CardanoOutbox.STATUS_PROCESSING]
+    failed = Q(status=CardanoOutbox.STATUS_FAILED)
+    stats = CardanoOutbox.objects.aggregate(
+        pending=Count("id", filter=Q(status__in=open_statuses)),
+        failed=Count("id", filter=failed),
+        recent_failed=Count(
+            "id", filter=failed & Q(completed_at__gte=now - timedelta(seconds=CARDANO_OUTBOX_FAILED_WINDOW))
+        ),
+        oldest_due=Min("next_attempt_at", filter=Q(status__in=open_statuses, next_attempt_at__lte=now)),
+    )
+    oldest_due = stats.pop("oldest_due")
+    stats["oldest_due_seconds"] = round((now - oldest_due).total_seconds(), 1) if oldest_due else 0
+    return stats
+
+
+@router.get("/health/", response=dict)
+def integration_health(request):
+    """
+    State of the Cardano outbox and of the outbox worker's circuit breaker
+    for the Cardano service (null until the worker has reported). Chain calls
+    are made by the worker, not the web process, so these are what show an
+    outage. "degraded" means an entry has failed for good within
+    CARDANO_OUTBOX_FAILED_WINDOW, a due entry has waited longer than
+    CARDANO_OUTBOX_MAX_LAG, or the circuit is not closed. Older failures are
+    still counted in "failed" but no longer affect the status.
+    """
+    outbox = outbox_health()
+    breaker = load_breaker_state(cardano_service_breaker.name)
+    degraded = (
+        outbox["recent_failed"] > 0
+        or outbox["oldest_due_seconds"] > CARDANO_OUTBOX_MAX_LAG
+        or (breaker is not None and breaker["state"] != CLOSED)
+    )
+    return {
+        "status": "degraded" if degraded else "ok",
+        "cardano_outbox": outbox,
+        "cardano_service": breaker,
+    }
@@ -0,0 +1,20 @@
+"""
+Patients Configuration
+Configuration for health IDs, QR images and emergency cards
+"""
+import os
+
+# Health ID allocation (see patients/health_ids.py)
+HEALTH_ID_BLOCK_SIZE = int(os.getenv("HEALTH_ID_BLOCK_SIZE", "100"))  # IDs reserved per process per database round trip
+
+# Patient QR images (see integration/qr_codes.py)
+QR_PNG_SIZES = [int(size) for size in os.getenv("QR_PNG_SIZES", "256,512,1024").split(",")]  # pixels
+QR_DEFAULT_SIZE = int(os.getenv("QR_DEFAULT_SIZE", "512"))
+QR_CACHE_ENTRIES = int(os.getenv("QR_CACHE_ENTRIES", "256"))  # rendered images kept in memory
+
+# Emergency cards (see patients/emergency_cards.py)
+EMERGENCY_CARD_CACHE_ENTRIES = int(os.getenv("EMERGENCY_CARD_CACHE_ENTRIES", "100000"))  # cards kept in memory per process
+EMERGENCY_CARD_SYNC_INTERVAL = float(os.getenv("EMERGENCY_CARD_SYNC_INTERVAL", "2"))  # seconds between change polls
+EMERGENCY_CARD_IDLE_AFTER = float(os.getenv("EMERGENCY_CARD_IDLE_AFTER", "60"))  # seconds without lookups before polls pause
+# Warm the cache when an ASGI worker starts (lifespan startup in core/asgi.py)
+EMERGENCY_CARD_WARM = os.getenv("EMERGENCY_CARD_WARM", "true").lower() in ("1", "true", "yes")
@@ -0,0 +1,74 @@
+"""
+Patient Counters
+Visit, medication and lab result counts and the time of the last activity,
+kept on PatientProfile so scans and dashboards read them instead of
+counting. The views that add records bump them with one F() update;
+rebuild_patient_counters recomputes them from the related tables.
+"""
+from typing import Iterable, Optional
+
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import PatientProfile, Visit, Medication, LabResult
+
+COUNTERS = {
+    "visits": ("visits_count", Visit),
+    "medications": ("medications_count", Medication),
+    "lab_results": ("lab_results_count", LabResult),
+}
+
+
+def record_patient_activity(patient, kind: str, at=None):
+    """
+    Count one new visit, medication or lab result of a patient
+
+    Args:
+        patient: PatientProfile
+        kind: "visits", "medications" or "lab_results"
+        at: Time of the activity (now if omitted)
+    """
+    field, _ = COUNTERS[kind]
+    at = at or timezone.now()
+    PatientProfile.objects.filter(id=patient.id).update(**{field: F(field) + 1}, last_activity_at=at)
+    setattr(patient, field, getattr(patient, field) + 1)
+    patient.last_activity_at = at
+
+
+def _count_of(model):
+    counts = (
+        model.objects.filter(patient=OuterRef("pk"))
+        .order_by()
+        .values("patient")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def rebuild_patient_counters(first_id: Optional[int] = None, last_id: Optional[int] = None,
+                             patient_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute the counters of a range (or list) of patients with one UPDATE.
+    last_activity_at is only filled in where it was never recorded, from the
+    latest visit; medications carry no timestamp and lab results only a date.
+
+    Returns:
+        Number of patients updated
+    """
+    patients = PatientProfile.objects.all()
+    if patient_ids is not None:
+        patients = patients.filter(id__in=list(patient_ids))
+    if first_id is not None:
+        patients = patients.filter(id__gte=first_id)
+    if last_id is not None:
+        patients = patients.filter(id__lte=last_id)
+
+    latest_visit = Visit.objects.filter(patient=OuterRef("pk")).order_by().values("patient").annotate(
+        at=Max("created_at")
+    ).values("at")
+    return patients.update(
+        **{field: _count_of(model) for field, model in COUNTERS.values()},
+        last_activity_at=Coalesce(F("last_activity_at"), Subquery(latest_visit)),
+    )
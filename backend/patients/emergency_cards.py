@@ -0,0 +1,225 @@
+"""
+Emergency Cards
+Name, emergency contact and a short critical summary per patient, served
+from memory. Cards are precomputed on PatientSnapshot.emergency_card (see
+patients/snapshots.py) and kept here as ready-to-send JSON bytes.
+
+The cache is warmed with the most recently updated cards when an ASGI
+worker starts (lifespan startup in core/asgi.py); otherwise the first lookup
+starts syncing without a warm-up. A background thread then polls for
+snapshots updated since its last poll, so changes made by other workers show
+up within EMERGENCY_CARD_SYNC_INTERVAL; changes made by this process are
+written through once they commit. Polling pauses after
+EMERGENCY_CARD_IDLE_AFTER seconds without lookups, and the next lookup
+catches up first.
+"""
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from integration.lru_cache import LRUCache
+from .config import (
+    EMERGENCY_CARD_CACHE_ENTRIES,
+    EMERGENCY_CARD_IDLE_AFTER,
+    EMERGENCY_CARD_SYNC_INTERVAL,
+    EMERGENCY_CARD_WARM,
+)
+
+# Polls overlap by this much, so a snapshot committed just after a poll
+# started (or stamped by a slightly slower clock) is still picked up
+SYNC_OVERLAP = timedelta(seconds=10)
+WARM_CHUNK = 2000
+
+
+def encode_card(card: Dict[str, Any]) -> bytes:
+    return json.dumps(card, separators=(",", ":")).encode("utf-8")
+
+
+class EmergencyCardCache:
+    """
+    Process-wide cache of encoded emergency cards, keyed by health ID
+
+    Args:
+        maxsize: Cards kept in memory
+        sync_interval: Seconds between polls for changed snapshots
+        idle_after: Seconds without lookups after which polling pauses
+    """
+
+    def __init__(self, maxsize: int = EMERGENCY_CARD_CACHE_ENTRIES, sync_interval: float = EMERGENCY_CARD_SYNC_INTERVAL,
+                 idle_after: float = EMERGENCY_CARD_IDLE_AFTER):
+        self.maxsize = maxsize
+        self.sync_interval = sync_interval
+        self.idle_after = idle_after
+        self._cards = LRUCache(maxsize)
+        self._synced_at = None
+        self._used_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _load(self, health_id: str) -> Optional[bytes]:
+        from .models import PatientProfile, PatientSnapshot
+        from .snapshots import refresh_patient_snapshot
+
+        card = PatientSnapshot.objects.filter(patient__health_id=health_id).values_list(
+            "emergency_card", flat=True
+        ).first()
+        if not card:
+            # No snapshot yet, or one from before emergency cards existed
+            patient = PatientProfile.objects.select_related("user").filter(health_id=health_id).first()
+            if patient is None:
+                return None
+            card = refresh_patient_snapshot(patient).emergency_card
+        return encode_card(card)
+
+    def get(self, health_id: str) -> Optional[bytes]:
+        """
+        Encoded card of a patient, None if there is no such patient
+        """
+        now = time.monotonic()
+        if not self._running():
+            self.start(warm=False)
+        elif now - self._used_at > self.idle_after and self._synced_at is not None:
+            # Polls were paused; pick up what other workers changed meanwhile
+            self.sync()
+        self._used_at = now
+        found, content = self._cards.get(health_id)
+        if found:
+            return content
+        content = self._load(health_id)
+        # Unknown IDs are remembered briefly so repeated misses stay cheap;
+        # a patient created meanwhile arrives with the next sync anyway
+        self._cards.set(health_id, content, ttl=None if content else self.sync_interval)
+        return content
+
+    def put(self, card: Dict[str, Any]):
+        if card:
+            self._cards.set(card["health_id"], encode_card(card))
+
+    def warm(self) -> int:
+        """
+        Load the most recently updated cards, up to maxsize
+
+        Returns:
+            Number of cards loaded
+        """
+        from .models import PatientSnapshot
+
+        self._synced_at = timezone.now()
+        cards = PatientSnapshot.objects.exclude(emergency_card={}).order_by("-updated_at").values_list(
+            "emergency_card", flat=True
+        )[:self.maxsize]
+        loaded = 0
+        # Oldest first, so the most recent cards end up least likely to be evicted
+        for card in reversed(list(cards.iterator(chunk_size=WARM_CHUNK))):
+            self.put(card)
+            loaded += 1
+        return loaded
+
+    def sync(self) -> int:
+        """
+        Refresh cards of snapshots updated since the last poll
+
+        Returns:
+            Number of cards refreshed
+        """
+        from .models import PatientSnapshot
+
+        started = timezone.now()
+        changed = PatientSnapshot.objects.exclude(emergency_card={})
+        if self._synced_at is not None:
+            changed = changed.filter(updated_at__gte=self._synced_at - SYNC_OVERLAP)
+        refreshed = 0
+        for card in changed.values_list("emergency_card", flat=True).iterator(chunk_size=WARM_CHUNK):
+            self.put(card)
+            refreshed += 1
+        self._synced_at = started
+        return refreshed
+
+    def _run(self, warm: bool):
+        if warm:
+            try:
+                loaded = self.warm()
+                print(f"Emergency card cache warmed with {loaded} cards")
+            except Exception as e:
+                print(f"Emergency card cache warm-up failed: {e}")
+            finally:
+                close_old_connections()
+        while True:
+            time.sleep(self.sync_interval)
+            self._poll()
+
+    def _poll(self) -> bool:
+        """
+        One background sync, skipped while no lookups are being served
+        """
+        if time.monotonic() - self._used_at > self.idle_after:
+            return False
+        try:
+            self.sync()
+        except Exception as e:
+            print(f"Emergency card cache sync failed: {e}")
+        finally:
+            close_old_connections()
+        return True
+
+    def _running(self) -> bool:
+        # Threads do not survive a fork, so a process forked from one that
+        # started the thread (e.g. gunicorn --preload) has to start its own
+        return self._thread is not None and self._pid == os.getpid()
+
+    def start(self, warm: bool = True):
+        """
+        Keep the cache in sync from a background thread, warming it first
+        (once per process; started by the first lookup if not before)
+        """
+        with self._lock:
+            if not self._running():
+                if not warm and self._synced_at is None:
+                    self._synced_at = timezone.now()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, args=(warm,), name="emergency-card-cache", daemon=True
+                )
+                self._thread.start()
+
+    def clear(self):
+        self._cards.clear()
+
+
+_cache: Optional[EmergencyCardCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_emergency_card_cache() -> EmergencyCardCache:
+    """
+    Process-wide emergency card cache
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmergencyCardCache()
+    return _cache
+
+
+def set_emergency_card_cache(cache: Optional[EmergencyCardCache]):
+    """
+    Replace the process-wide cache (e.g. with another size)
+    """
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+def start_emergency_card_cache():
+    """
+    Called when an ASGI worker starts; warms the cache unless EMERGENCY_CARD_WARM is off
+    """
+    get_emergency_card_cache().start(warm=EMERGENCY_CARD_WARM)
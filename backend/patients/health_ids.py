@@ -0,0 +1,182 @@
+"""
+Health ID allocation (PAT-XXXXXXXX)
+
+IDs are a counter, not random draws checked against the database. Each
+process reserves a block of counter values from HealthIdSequence with one
+UPDATE, then hands them out from memory, so allocation costs no query per
+patient and two processes can never hand out the same value.
+
+A counter value is mixed by a keyed permutation (a small Feistel network
+with cycle walking over 36^7 values, keyed per database) so consecutive
+patients do not get guessable consecutive IDs, written as 7 base-36
+characters, and followed by an ISO 7064 MOD 37,36 check character that
+catches any single mistyped character and any swap of adjacent characters.
+
+Random IDs issued before this scheme stay valid; a new ID matching one of
+them is as unlikely as two random IDs colliding, and the unique constraint
+on PatientProfile.health_id still guards against it.
+"""
+import hashlib
+import secrets
+import threading
+from typing import List, Optional
+
+from django.db import transaction
+from django.db.models import F
+
+from .config import HEALTH_ID_BLOCK_SIZE
+
+HEALTH_ID_PREFIX = "PAT-"
+HEALTH_ID_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+PAYLOAD_LENGTH = 7
+ID_SPACE = len(HEALTH_ID_ALPHABET) ** PAYLOAD_LENGTH
+SEQUENCE_NAME = "patient"
+
+_HALF_BITS = 19  # 2^38 > 36^7
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_ROUNDS = 4
+
+
+def _feistel(value: int, key: bytes) -> int:
+    left, right = value >> _HALF_BITS, value & _HALF_MASK
+    for round_index in range(_ROUNDS):
+        digest = hashlib.blake2b(bytes([round_index]) + right.to_bytes(3, "big"), key=key, digest_size=4).digest()
+        left, right = right, left ^ (int.from_bytes(digest, "big") & _HALF_MASK)
+    return (left << _HALF_BITS) | right
+
+
+def permute(counter: int, key: bytes) -> int:
+    """
+    Bijection on [0, ID_SPACE): walk the Feistel cycle until it lands back in range
+    """
+    value = _feistel(counter, key)
+    while value >= ID_SPACE:
+        value = _feistel(value, key)
+    return value
+
+
+def check_character(payload: str) -> str:
+    """
+    ISO 7064 MOD 37,36 check character for an alphanumeric payload
+    """
+    modulus = len(HEALTH_ID_ALPHABET)
+    product = modulus
+    for char in payload:
+        total = (product + HEALTH_ID_ALPHABET.index(char)) % modulus or modulus
+        product = (total * 2) % (modulus + 1)
+    return HEALTH_ID_ALPHABET[(modulus + 1 - product) % modulus]
+
+
+def encode_health_id(counter: int, key: bytes) -> str:
+    value = permute(counter, key)
+    digits = []
+    for _ in range(PAYLOAD_LENGTH):
+        value, digit = divmod(value, len(HEALTH_ID_ALPHABET))
+        digits.append(HEALTH_ID_ALPHABET[digit])
+    payload = "".join(reversed(digits))
+    return f"{HEALTH_ID_PREFIX}{payload}{check_character(payload)}"
+
+
+def is_valid_health_id(health_id: str) -> bool:
+    """
+    True if health_id was issued by this scheme and has no typo
+    """
+    if not health_id.startswith(HEALTH_ID_PREFIX):
+        return False
+    body = health_id[len(HEALTH_ID_PREFIX):].upper()
+    if len(body) != PAYLOAD_LENGTH + 1 or any(char not in HEALTH_ID_ALPHABET for char in body):
+        return False
+    return check_character(body[:-1]) == body[-1]
+
+
+class HealthIdAllocator:
+    """
+    Hands out health IDs from counter blocks reserved in the database
+
+    Args:
+        block_size: Counter values reserved per database round trip. Values
+            left in a block when the process exits are never used.
+    """
+
+    def __init__(self, block_size: int = HEALTH_ID_BLOCK_SIZE):
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._key: Optional[bytes] = None
+        self._lock = threading.Lock()
+
+    def _reserve(self, count: int) -> int:
+        """
+        Reserve count counter values; returns the first. Commits on its
+        own, so call it outside transactions that may roll back.
+        """
+        from .models import HealthIdSequence
+
+        with transaction.atomic():
+            HealthIdSequence.objects.get_or_create(
+                name=SEQUENCE_NAME,
+                defaults={"key": secrets.token_bytes(16)},
+            )
+            HealthIdSequence.objects.filter(name=SEQUENCE_NAME).update(next_value=F("next_value") + count)
+            sequence = HealthIdSequence.objects.get(name=SEQUENCE_NAME)
+        end = sequence.next_value
+        if end > ID_SPACE:
+            raise RuntimeError("Health ID space exhausted")
+        self._key = bytes(sequence.key)
+        return end - count
+
+    def allocate(self, count: int = 1) -> List[str]:
+        """
+        count distinct, never-issued health IDs
+        """
+        with self._lock:
+            if count > self._end - self._next and count >= self.block_size:
+                # Large requests (bulk import) get a block of their own
+                start = self._reserve(count)
+                return [encode_health_id(counter, self._key) for counter in range(start, start + count)]
+
+            counters = []
+            while len(counters) < count:
+                if self._next >= self._end:
+                    self._next = self._reserve(self.block_size)
+                    self._end = self._next + self.block_size
+                take = min(count - len(counters), self._end - self._next)
+                counters.extend(range(self._next, self._next + take))
+                self._next += take
+            return [encode_health_id(counter, self._key) for counter in counters]
+
+
+_allocator: Optional[HealthIdAllocator] = None
+_allocator_lock = threading.Lock()
+
+
+def get_health_id_allocator() -> HealthIdAllocator:
+    """
+    Process-wide allocator
+    """
+    global _allocator
+    if _allocator is None:
+        with _allocator_lock:
+            if _allocator is None:
+                _allocator = HealthIdAllocator()
+    return _allocator
+
+
+def set_health_id_allocator(allocator: Optional[HealthIdAllocator]):
+    """
+    Replace the process-wide allocator (e.g. with another block size)
+    """
+    global _allocator
+    with _allocator_lock:
+        _allocator = allocator
+
+
+def allocate_health_id() -> str:
+    return get_health_id_allocator().allocate(1)[0]
+
+
+def allocate_health_ids(count: int) -> List[str]:
+    """
+    count new health IDs with at most one query
+    """
+    return get_health_id_allocator().allocate(count)
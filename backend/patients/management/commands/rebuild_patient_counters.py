@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from patients.models import PatientProfile
+from patients.counters import rebuild_patient_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute visit, medication and lab result counters of patients"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Patients per UPDATE (by id range)")
+        parser.add_argument("--patient-id", type=int, action="append", help="Only these patients (repeatable)")
+
+    def handle(self, *args, **options):
+        if options["patient_id"]:
+            updated = rebuild_patient_counters(patient_ids=options["patient_id"])
+            self.stdout.write(f"Rebuilt counters of {updated} patients")
+            return
+
+        bounds = PatientProfile.objects.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            self.stdout.write("No patients")
+            return
+
+        updated = 0
+        batch_size = options["batch_size"]
+        for first_id in range(bounds["low"], bounds["high"] + 1, batch_size):
+            updated += rebuild_patient_counters(first_id=first_id, last_id=first_id + batch_size - 1)
+        self.stdout.write(f"Rebuilt counters of {updated} patients")
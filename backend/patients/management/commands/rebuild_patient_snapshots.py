@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from patients.models import PatientProfile
+from patients.snapshots import rebuild_patient_snapshots
+
+
+class Command(BaseCommand):
+    help = "Rebuild the decode-qr snapshots of patients (backfill, or repair after direct database edits)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--patient-id", type=int, action="append", help="Only these patients (repeatable)")
+        parser.add_argument("--missing", action="store_true", help="Only patients without a snapshot")
+
+    def handle(self, *args, **options):
+        patients = PatientProfile.objects.order_by("id")
+        if options["patient_id"]:
+            patients = patients.filter(id__in=options["patient_id"])
+        if options["missing"]:
+            patients = patients.filter(snapshot__isnull=True)
+
+        rebuilt = 0
+        last_id = 0
+        while True:
+            ids = list(patients.filter(id__gt=last_id).values_list("id", flat=True)[:options["batch_size"]])
+            if not ids:
+                break
+            rebuilt += rebuild_patient_snapshots(ids)
+            last_id = ids[-1]
+        self.stdout.write(f"Rebuilt {rebuilt} patient snapshots")
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integration', '0002_anchorbatch_alter_cardanooutbox_kind_and_more'),
+        ('patients', '0003_alter_patientprofile_cardano_record_hash_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patientprofile',
+            name='anchor_batch',
+            field=models.ForeignKey(blank=True, help_text='Merkle batch whose root anchors this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='patients', to='integration.anchorbatch'),
+        ),
+        migrations.AddField(
+            model_name='patientprofile',
+            name='cardano_merkle_proof',
+            field=models.JSONField(blank=True, help_text='Inclusion proof of cardano_record_hash when anchored in a Merkle batch', null=True),
+        ),
+    ]
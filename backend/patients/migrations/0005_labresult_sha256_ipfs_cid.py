@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0004_patientprofile_anchor_batch_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='labresult',
+            name='ipfs_cid',
+            field=models.CharField(blank=True, max_length=128),
+        ),
+        migrations.AddField(
+            model_name='labresult',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the file; identical uploads share one stored file', max_length=64),
+        ),
+    ]
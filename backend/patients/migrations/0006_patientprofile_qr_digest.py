@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0005_labresult_sha256_ipfs_cid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patientprofile',
+            name='qr_digest',
+            field=models.CharField(blank=True, db_index=True, help_text='Digest of the QR payload; QR images are served and cached under it', max_length=32),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0007_patientimportjob'),
+        ('patients', '0006_patientprofile_qr_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patientprofile',
+            name='import_job',
+            field=models.ForeignKey(blank=True, help_text='Bulk import that created this patient', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='patients', to='doctors.patientimportjob'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0007_patientprofile_import_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HealthIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32, unique=True)),
+                ('next_value', models.BigIntegerField(default=0)),
+                ('key', models.BinaryField(help_text='Key of the permutation that turns counter values into health IDs')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0008_healthidsequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientSnapshot',
+            fields=[
+                ('patient', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='patients.patientprofile')),
+                ('record', models.JSONField(blank=True, help_text='Record the patient was created with (the IPFS payload), once fetched', null=True)),
+                ('record_data', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
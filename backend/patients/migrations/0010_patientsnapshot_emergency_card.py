@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0009_patientsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patientsnapshot',
+            name='emergency_card',
+            field=models.JSONField(default=dict, help_text='Compact summary served by the emergency card endpoint'),
+        ),
+        migrations.AlterField(
+            model_name='patientsnapshot',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
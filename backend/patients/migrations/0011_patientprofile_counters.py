@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:44
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    PatientProfile = apps.get_model("patients", "PatientProfile")
+
+    def count_of(model_name):
+        model = apps.get_model("patients", model_name)
+        counts = model.objects.filter(patient=OuterRef("pk")).order_by().values("patient").annotate(
+            n=Count("id")
+        ).values("n")
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+    Visit = apps.get_model("patients", "Visit")
+    latest_visit = Visit.objects.filter(patient=OuterRef("pk")).order_by().values("patient").annotate(
+        at=Max("created_at")
+    ).values("at")
+    PatientProfile.objects.update(
+        visits_count=count_of("Visit"),
+        medications_count=count_of("Medication"),
+        lab_results_count=count_of("LabResult"),
+        last_activity_at=Subquery(latest_visit),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0010_patientsnapshot_emergency_card'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patientprofile',
+            name='lab_results_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='patientprofile',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, help_text='When a visit, medication or lab result was last added', null=True),
+        ),
+        migrations.AddField(
+            model_name='patientprofile',
+            name='medications_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='patientprofile',
+            name='visits_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -13,6 +13,12 @@ class PatientProfile(models.Model):
     )
     health_id = models.CharField(max_length=64, unique=True)
     qr_code = models.ImageField(upload_to=qr_path, null=True, blank=True)
+    qr_digest = models.CharField(
+        max_length=32,
+        blank=True,
+        db_index=True,
+        help_text="Digest of the QR payload; QR images are served and cached under it"
+    )
     emergency_contact = models.CharField(max_length=255, blank=True, default="")
     ipfs_hash = models.CharField(
         max_length=128, 
@@ -32,6 +38,27 @@ class PatientProfile(models.Model):
         null=True,
         help_text="Hash of the medical record stored on Cardano"
     )
+    cardano_merkle_proof = models.JSONField(
+        blank=True,
+        null=True,
+        help_text="Inclusion proof of cardano_record_hash when anchored in a Merkle batch"
+    )
+    anchor_batch = models.ForeignKey(
+        "integration.AnchorBatch",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="patients",
+        help_text="Merkle batch whose root anchors this record"
+    )
+    import_job = models.ForeignKey(
+        "doctors.PatientImportJob",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="patients",
+        help_text="Bulk import that created this patient"
+    )
     created_by_doctor = models.ForeignKey(
         "doctors.DoctorProfile",
         on_delete=models.SET_NULL,
@@ -40,6 +67,15 @@ class PatientProfile(models.Model):
         related_name="created_patients",
         help_text="Doctor who created this patient profile"
     )
+    # Maintained by patients/counters.py; rebuild_patient_counters repairs them
+    visits_count = models.PositiveIntegerField(default=0)
+    medications_count = models.PositiveIntegerField(default=0)
+    lab_results_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When a visit, medication or lab result was last added"
+    )
 
     def __str__(self):
         return f"{self.user.full_name or self.user.username} ({self.health_id})"
@@ -95,8 +131,53 @@ class LabResult(models.Model):
         on_delete=models.CASCADE
     )
     file = models.FileField(upload_to="lab_results/")
+    sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text="SHA-256 of the file; identical uploads share one stored file"
+    )
+    ipfs_cid = models.CharField(max_length=128, blank=True)
     summary = models.TextField(blank=True)
     date = models.DateField()
 
     def __str__(self):
         return f"LabResult {self.id} for {self.patient}"
+
+
+class PatientSnapshot(models.Model):
+    """
+    What decode-qr returns for a patient, maintained by patients/snapshots.py
+    """
+    patient = models.OneToOneField(
+        PatientProfile,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="snapshot"
+    )
+    record = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Record the patient was created with (the IPFS payload), once fetched"
+    )
+    record_data = models.JSONField(default=dict)
+    emergency_card = models.JSONField(
+        default=dict,
+        help_text="Compact summary served by the emergency card endpoint"
+    )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"Snapshot of {self.patient_id}"
+
+
+class HealthIdSequence(models.Model):
+    """
+    Counter behind patients/health_ids.py; processes reserve blocks of it
+    """
+    name = models.CharField(max_length=32, unique=True)
+    next_value = models.BigIntegerField(default=0)
+    key = models.BinaryField(help_text="Key of the permutation that turns counter values into health IDs")
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
@@ -0,0 +1,204 @@
+"""
+Patient Snapshots
+The record data decode-qr returns, kept ready in one PatientSnapshot row per
+patient so a scan is a single indexed read instead of the visits,
+medications and lab queries plus an IPFS fetch.
+
+The snapshot holds the record the patient was created with (the IPFS
+payload, kept so it is fetched at most once) and the most recent visits,
+medications and lab results, plus the compact emergency card. Views that
+change those call refresh_patient_snapshot; rebuild_patient_snapshots
+repairs or backfills snapshots in bulk.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+
+from .models import PatientProfile, PatientSnapshot, Visit, Medication, LabResult
+from .emergency_cards import get_emergency_card_cache
+
+RECENT_ITEMS = 10
+CARD_MEDICATIONS = 3
+RECENT_ATTRS = ("recent_visits", "recent_medications", "recent_lab_results")
+
+
+def _prefetch_recent():
+    return [
+        Prefetch("visits", queryset=Visit.objects.order_by("-created_at", "-id")[:RECENT_ITEMS], to_attr="recent_visits"),
+        Prefetch("medications", queryset=Medication.objects.order_by("-id")[:RECENT_ITEMS], to_attr="recent_medications"),
+        Prefetch(
+            "lab_results",
+            queryset=LabResult.objects.order_by("-date", "-id")[:RECENT_ITEMS],
+            to_attr="recent_lab_results",
+        ),
+    ]
+
+
+def _recent_visits(patient) -> List[Dict[str, Any]]:
+    return [
+        {
+            "summary": v.summary,
+            "diagnosis": v.diagnosis,
+            "created_at": v.created_at.isoformat() if v.created_at else None,
+        }
+        for v in patient.recent_visits
+    ]
+
+
+def _recent_medications(patient) -> List[Dict[str, Any]]:
+    return [
+        {
+            "drug_name": m.drug_name,
+            "dosage": m.dosage,
+            "duration": m.duration,
+        }
+        for m in patient.recent_medications
+    ]
+
+
+def _recent_lab_results(patient) -> List[Dict[str, Any]]:
+    return [
+        {
+            "summary": l.summary,
+            "date": l.date.isoformat(),
+            "ipfs_cid": l.ipfs_cid or None,
+        }
+        for l in patient.recent_lab_results
+    ]
+
+
+def build_record_data(patient, record: Optional[Dict[str, Any]], empty: bool = False) -> Dict[str, Any]:
+    """
+    Record data returned by decode-qr
+
+    Args:
+        patient: PatientProfile with its user loaded and, unless empty,
+            the recent_* lists of _prefetch_recent
+        record: The creation record from IPFS, or None to describe the
+            patient from the database
+        empty: The patient is new and has no visits, medications or labs
+            (skips those queries)
+    """
+    if record:
+        data = dict(record)
+    else:
+        data = {
+            "patient_id": patient.health_id,
+            "full_name": patient.user.full_name or patient.user.username,
+            "emergency_contact": patient.emergency_contact,
+        }
+    data["visits"] = [] if empty else _recent_visits(patient)
+    data["medications"] = [] if empty else _recent_medications(patient)
+    data["lab_results"] = [] if empty else _recent_lab_results(patient)
+    return data
+
+
+def _clip(value: Optional[str], length: int) -> Optional[str]:
+    return value[:length] if value else value
+
+
+def build_emergency_card(patient, record: Optional[Dict[str, Any]], empty: bool = False) -> Dict[str, Any]:
+    """
+    What an emergency responder needs first, with every field capped so the
+    card stays small (served by GET /doctor/emergency-card/{health_id}/)
+
+    Args:
+        patient: As for build_record_data
+        record: The creation record, if known
+        empty: The patient is new and has no visits or medications
+    """
+    record = record or {}
+    visits = [] if empty else patient.recent_visits
+    medications = [] if empty else patient.recent_medications
+    return {
+        "health_id": patient.health_id,
+        "full_name": _clip(patient.user.full_name or patient.user.username, 64),
+        "emergency_contact": _clip(patient.emergency_contact, 32),
+        "age": record.get("age"),
+        "gender": _clip(record.get("gender"), 16),
+        "condition": _clip(record.get("condition"), 160),
+        "last_diagnosis": _clip(next((v.diagnosis for v in visits if v.diagnosis), None), 160),
+        "medications": [
+            {"drug_name": _clip(m.drug_name, 48), "dosage": _clip(m.dosage, 32)}
+            for m in medications[:CARD_MEDICATIONS]
+        ],
+    }
+
+
+def new_patient_snapshot(patient, record: Optional[Dict[str, Any]]) -> PatientSnapshot:
+    """
+    Unsaved snapshot of a patient created just now (no queries)
+    """
+    return PatientSnapshot(
+        patient=patient,
+        record=record,
+        record_data=build_record_data(patient, record, empty=True),
+        emergency_card=build_emergency_card(patient, record, empty=True),
+    )
+
+
+def refresh_patient_snapshot(patient, record: Optional[Dict[str, Any]] = None) -> PatientSnapshot:
+    """
+    Rebuild a patient's snapshot from the database
+
+    Args:
+        patient: PatientProfile
+        record: Creation record to store; the stored one is kept if omitted
+
+    Returns:
+        The saved snapshot
+    """
+    with transaction.atomic():
+        snapshot, created = PatientSnapshot.objects.get_or_create(patient=patient, defaults={"record": record})
+        if not created:
+            # Lock the row so concurrent refreshes of one patient apply in order
+            snapshot = PatientSnapshot.objects.select_for_update().get(pk=snapshot.pk)
+            if record is not None:
+                snapshot.record = record
+        # A patient refreshed before keeps its old lists, which prefetching would not replace
+        for attr in RECENT_ATTRS:
+            patient.__dict__.pop(attr, None)
+        prefetch_related_objects([patient], *_prefetch_recent())
+        snapshot.record_data = build_record_data(patient, snapshot.record)
+        snapshot.emergency_card = build_emergency_card(patient, snapshot.record)
+        snapshot.save()
+    patient.snapshot = snapshot
+    # Callers may hold an outer transaction; a card it rolls back must not be served
+    card = snapshot.emergency_card
+    transaction.on_commit(lambda: get_emergency_card_cache().put(card))
+    return snapshot
+
+
+def rebuild_patient_snapshots(patient_ids: Iterable[int]) -> int:
+    """
+    Rebuild the snapshots of many patients with a fixed number of queries,
+    keeping stored creation records
+
+    Returns:
+        Number of snapshots written
+    """
+    patients = list(
+        PatientProfile.objects.filter(id__in=list(patient_ids))
+        .select_related("user")
+        .prefetch_related(*_prefetch_recent())
+    )
+    records = dict(
+        PatientSnapshot.objects.filter(patient__in=patients).values_list("patient_id", "record")
+    )
+    snapshots = [
+        PatientSnapshot(
+            patient=patient,
+            record=records.get(patient.id),
+            record_data=build_record_data(patient, records.get(patient.id)),
+            emergency_card=build_emergency_card(patient, records.get(patient.id)),
+        )
+        for patient in patients
+    ]
+    PatientSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=["patient"],
+        update_fields=["record_data", "emergency_card", "updated_at"],
+    )
+    return len(snapshots)
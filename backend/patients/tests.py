@@ -1,3 +1,312 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from users.models import User
+from integration import qr_codes
+from integration.qr_codes import refresh_qr_digest, storage_path
+from patients.counters import record_patient_activity, rebuild_patient_counters
+from patients.emergency_cards import EmergencyCardCache, set_emergency_card_cache
+from patients.health_ids import (
+    HEALTH_ID_ALPHABET,
+    HEALTH_ID_PREFIX,
+    ID_SPACE,
+    HealthIdAllocator,
+    encode_health_id,
+    is_valid_health_id,
+    permute,
+)
+from patients.models import HealthIdSequence, LabResult, Medication, PatientProfile, PatientSnapshot, Visit
+from patients.snapshots import rebuild_patient_snapshots, refresh_patient_snapshot
+
+KEY = bytes(range(16))
+
+
+def make_patient(health_id="PAT-TEST0001", **fields):
+    user = User.objects.create(username=health_id, role=User.ROLE_PATIENT, full_name=fields.pop("full_name", ""))
+    return PatientProfile.objects.create(user=user, health_id=health_id, **fields)
+
+
+class HealthIdTests(SimpleTestCase):
+    def test_issued_ids_are_valid(self):
+        for counter in (0, 1, 2, ID_SPACE - 1):
+            health_id = encode_health_id(counter, KEY)
+            self.assertTrue(health_id.startswith(HEALTH_ID_PREFIX))
+            self.assertEqual(len(health_id), len(HEALTH_ID_PREFIX) + 8)
+            self.assertTrue(is_valid_health_id(health_id))
+
+    def test_single_typos_are_caught(self):
+        health_id = encode_health_id(12345, KEY)
+        for position in range(len(HEALTH_ID_PREFIX), len(health_id)):
+            for char in HEALTH_ID_ALPHABET:
+                if char != health_id[position]:
+                    typo = health_id[:position] + char + health_id[position + 1:]
+                    self.assertFalse(is_valid_health_id(typo), typo)
+
+    def test_adjacent_swaps_are_caught(self):
+        for counter in range(50):
+            health_id = encode_health_id(counter, KEY)
+            for position in range(len(HEALTH_ID_PREFIX), len(health_id) - 1):
+                a, b = health_id[position], health_id[position + 1]
+                if a != b:
+                    swapped = health_id[:position] + b + a + health_id[position + 2:]
+                    self.assertFalse(is_valid_health_id(swapped), swapped)
+
+    def test_malformed_ids_are_rejected(self):
+        for value in ("", "PAT-", "PAT-1234567", "XYZ-12345678", "PAT-1234567!", "PAT-123456789"):
+            self.assertFalse(is_valid_health_id(value), value)
+
+    def test_consecutive_counters_do_not_collide(self):
+        values = [permute(counter, KEY) for counter in range(5000)]
+        self.assertEqual(len(set(values)), len(values))
+        self.assertTrue(all(0 <= value < ID_SPACE for value in values))
+        self.assertNotEqual(values[:3], sorted(values[:3]))
+
+
+class HealthIdAllocatorTests(TestCase):
+    def test_processes_never_share_ids(self):
+        first, second = HealthIdAllocator(block_size=5), HealthIdAllocator(block_size=5)
+        ids = first.allocate(3) + second.allocate(4) + first.allocate(4) + second.allocate(1)
+        self.assertEqual(len(set(ids)), 12)
+        self.assertTrue(all(is_valid_health_id(health_id) for health_id in ids))
+        # Two blocks for the first allocator, one for the second
+        self.assertEqual(HealthIdSequence.objects.get().next_value, 15)
+
+    def test_large_requests_get_their_own_block(self):
+        allocator = HealthIdAllocator(block_size=5)
+        allocator.allocate(1)
+        ids = allocator.allocate(12)
+        self.assertEqual(len(set(ids)), 12)
+        self.assertEqual(HealthIdSequence.objects.get().next_value, 17)
+        # The rest of the first block is still handed out
+        allocator.allocate(4)
+        self.assertEqual(HealthIdSequence.objects.get().next_value, 17)
+
+
+class PatientCounterTests(TestCase):
+    def setUp(self):
+        self.patient = make_patient()
+
+    def test_activity_is_counted(self):
+        record_patient_activity(self.patient, "visits")
+        record_patient_activity(self.patient, "lab_results")
+        self.patient.refresh_from_db()
+        self.assertEqual(
+            (self.patient.visits_count, self.patient.medications_count, self.patient.lab_results_count), (1, 0, 1)
+        )
+        self.assertIsNotNone(self.patient.last_activity_at)
+
+    def test_rebuild_recounts_from_the_tables(self):
+        other = make_patient("PAT-TEST0002")
+        visit = Visit.objects.create(patient=self.patient, summary="Checkup")
+        Visit.objects.create(patient=self.patient, summary="Follow-up")
+        Medication.objects.create(patient=self.patient, drug_name="Aspirin", dosage="100mg")
+        LabResult.objects.create(patient=other, file="lab_results/a.pdf", date=date.today())
+        PatientProfile.objects.filter(id=self.patient.id).update(medications_count=7)
+
+        self.assertEqual(rebuild_patient_counters(), 2)
+        self.patient.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(
+            (self.patient.visits_count, self.patient.medications_count, self.patient.lab_results_count), (2, 1, 0)
+        )
+        self.assertEqual((other.visits_count, other.lab_results_count), (0, 1))
+        self.assertGreaterEqual(self.patient.last_activity_at, visit.created_at)
+        self.assertIsNone(other.last_activity_at)
+
+    def test_rebuild_can_be_limited_to_a_range(self):
+        other = make_patient("PAT-TEST0002")
+        Visit.objects.create(patient=self.patient, summary="Checkup")
+        Visit.objects.create(patient=other, summary="Checkup")
+        self.assertEqual(rebuild_patient_counters(first_id=other.id), 1)
+        self.patient.refresh_from_db()
+        self.assertEqual(self.patient.visits_count, 0)
+
+
+class SnapshotTests(TestCase):
+    RECORD = {"patient_id": "PAT-TEST0001", "age": 41, "gender": "F", "condition": "Asthma"}
+
+    def setUp(self):
+        self.patient = make_patient(full_name="Ada", emergency_contact="555-0100")
+
+    def test_snapshot_holds_recent_items_and_keeps_the_record(self):
+        refresh_patient_snapshot(self.patient, record=self.RECORD)
+        Visit.objects.create(patient=self.patient, summary="Checkup", diagnosis="Bronchitis")
+        Medication.objects.create(patient=self.patient, drug_name="Salbutamol", dosage="2 puffs")
+        snapshot = refresh_patient_snapshot(self.patient)
+
+        self.assertEqual(snapshot.record, self.RECORD)
+        self.assertEqual(snapshot.record_data["condition"], "Asthma")
+        self.assertEqual([v["diagnosis"] for v in snapshot.record_data["visits"]], ["Bronchitis"])
+        self.assertEqual([m["drug_name"] for m in snapshot.record_data["medications"]], ["Salbutamol"])
+
+    def test_rebuild_keeps_stored_records(self):
+        refresh_patient_snapshot(self.patient, record=self.RECORD)
+        other = make_patient("PAT-TEST0002")
+        Visit.objects.create(patient=self.patient, summary="Checkup", diagnosis="Flu")
+
+        self.assertEqual(rebuild_patient_snapshots([self.patient.id, other.id]), 2)
+        snapshot = PatientSnapshot.objects.get(patient=self.patient)
+        self.assertEqual(snapshot.record, self.RECORD)
+        self.assertEqual([v["diagnosis"] for v in snapshot.record_data["visits"]], ["Flu"])
+        self.assertEqual(PatientSnapshot.objects.get(patient=other).record_data["visits"], [])
+
+
+class EmergencyCardTests(TestCase):
+    RECORD = {"patient_id": "PAT-TEST0001", "age": 41, "gender": "F", "condition": "Asthma"}
+
+    def setUp(self):
+        self.cache = EmergencyCardCache()
+        set_emergency_card_cache(self.cache)
+        self.addCleanup(set_emergency_card_cache, None)
+        self.patient = make_patient(full_name="N" * 100, emergency_contact="555-0100")
+
+    def test_card_is_capped_and_cached(self):
+        Visit.objects.create(patient=self.patient, summary="Checkup", diagnosis="D" * 500)
+        for number in range(5):
+            Medication.objects.create(patient=self.patient, drug_name=f"Drug {number}", dosage="1")
+        with self.captureOnCommitCallbacks(execute=True):
+            card = refresh_patient_snapshot(self.patient, record=self.RECORD).emergency_card
+
+        self.assertEqual(len(card["full_name"]), 64)
+        self.assertEqual(len(card["last_diagnosis"]), 160)
+        self.assertEqual(len(card["medications"]), 3)
+        self.assertEqual((card["age"], card["gender"], card["emergency_contact"]), (41, "F", "555-0100"))
+        found, content = self.cache._cards.get(self.patient.health_id)
+        self.assertTrue(found)
+        self.assertIn(b'"condition":"Asthma"', content)
+
+    def test_rolled_back_card_is_not_cached(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    refresh_patient_snapshot(self.patient, record=self.RECORD)
+                    raise RuntimeError("rolled back")
+            except RuntimeError:
+                pass
+        self.assertFalse(self.cache._cards.get(self.patient.health_id)[0])
+
+    @mock.patch.object(EmergencyCardCache, "start")
+    def test_cache_builds_missing_cards_and_remembers_unknown_ids(self, start):
+        content = self.cache.get(self.patient.health_id)
+        self.assertIn(b'"emergency_contact":"555-0100"', content)
+        self.assertTrue(PatientSnapshot.objects.filter(patient=self.patient).exists())
+
+        self.assertIsNone(self.cache.get("PAT-MISSING0"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.cache.get("PAT-MISSING0"))
+
+
+class EmergencyCardSyncTests(TestCase):
+    def setUp(self):
+        self.cache = EmergencyCardCache(idle_after=60)
+        set_emergency_card_cache(self.cache)
+        self.addCleanup(set_emergency_card_cache, None)
+        # As if the sync thread had been started in this process
+        self.cache._thread, self.cache._pid = mock.Mock(), os.getpid()
+        self.cache._synced_at = timezone.now() - timedelta(minutes=5)
+        self.patient = make_patient(emergency_contact="555-0100")
+        self.card = refresh_patient_snapshot(self.patient).emergency_card
+
+    def change_contact(self, contact):
+        card = dict(self.card, emergency_contact=contact)
+        PatientSnapshot.objects.filter(patient=self.patient).update(emergency_card=card, updated_at=timezone.now())
+
+    def test_polls_pause_while_idle(self):
+        with mock.patch.object(self.cache, "sync") as sync:
+            self.assertFalse(self.cache._poll())
+            self.cache.get(self.patient.health_id)
+            self.assertTrue(self.cache._poll())
+        self.assertEqual(sync.call_count, 2)
+
+    def test_first_lookup_after_idle_catches_up(self):
+        self.cache.put(self.card)
+        self.change_contact("555-0199")
+        self.assertIn(b'"555-0199"', self.cache.get(self.patient.health_id))
+
+        # Busy again: served from memory until the next poll
+        self.change_contact("555-0142")
+        with self.assertNumQueries(0):
+            self.assertIn(b'"555-0199"', self.cache.get(self.patient.health_id))
+        self.assertTrue(self.cache._poll())
+        self.assertIn(b'"555-0142"', self.cache.get(self.patient.health_id))
+
+
+@mock.patch("patients.emergency_cards.threading.Thread")
+class EmergencyCardThreadTests(SimpleTestCase):
+    def test_sync_thread_starts_once_per_process(self, thread):
+        cache = EmergencyCardCache()
+        cache.start(warm=False)
+        cache.start(warm=False)
+        self.assertEqual(thread.call_count, 1)
+
+    def test_forked_process_starts_its_own_thread(self, thread):
+        cache = EmergencyCardCache()
+        cache.start(warm=False)
+        with mock.patch("patients.emergency_cards.os.getpid", return_value=-1):
+            cache.start(warm=False)
+        self.assertEqual(thread.call_count, 2)
+
+
+class QRCodeTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        qr_codes._images.clear()
+        self.addCleanup(qr_codes._images.clear)
+        self.patient = make_patient()
+        self.digest = refresh_qr_digest(self.patient)
+        self.url = f"/api/patient/qr/{self.digest}/?format=png&size=256"
+
+    def test_image_is_rendered_once_per_digest(self):
+        with mock.patch("integration.qr_codes.render_qr", wraps=qr_codes.render_qr) as render:
+            first = self.client.get(self.url)
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(first["Content-Type"], "image/png")
+            self.assertTrue(default_storage.exists(storage_path(self.digest, "png", 256)))
+
+            self.assertEqual(self.client.get(self.url).content, first.content)
+            qr_codes._images.clear()
+            self.assertEqual(self.client.get(self.url).content, first.content)
+            svg = self.client.get(f"/api/patient/qr/{self.digest}/?format=svg")
+        # Memory, then storage; only the new variant is rendered
+        self.assertEqual(render.call_count, 2)
+        self.assertEqual(svg["Content-Type"], "image/svg+xml")
+
+    def test_responses_are_immutable_and_revalidated_by_etag(self):
+        response = self.client.get(self.url)
+        tag = response["ETag"]
+        self.assertEqual(tag, f'"{self.digest}-256.png"')
+        self.assertIn("immutable", response["Cache-Control"])
+
+        with mock.patch("integration.qr_codes.render_qr") as render, self.assertNumQueries(0):
+            cached = self.client.get(self.url, headers={"If-None-Match": tag})
+        render.assert_not_called()
+        self.assertEqual((cached.status_code, cached.content), (304, b""))
+        self.assertEqual(cached["ETag"], tag)
+        self.assertIn("immutable", cached["Cache-Control"])
+
+        other_size = self.client.get(f"/api/patient/qr/{self.digest}/?format=png&size=512", headers={"If-None-Match": tag})
+        self.assertEqual(other_size.status_code, 200)
+
+    def test_changed_payload_redirects_to_the_new_digest(self):
+        PatientProfile.objects.filter(id=self.patient.id).update(cardano_tx_hash="ab" * 32)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.patient.refresh_from_db()
+        self.assertNotEqual(self.patient.qr_digest, self.digest)
+        self.assertIn(f"/api/patient/qr/{self.patient.qr_digest}/?format=png&size=256", response["Location"])
+
+    def test_unknown_digests_and_variants_are_rejected(self):
+        self.assertEqual(self.client.get("/api/patient/qr/0123456789abcdef0123456789abcdef/").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/patient/qr/{self.digest}/?size=300").status_code, 400)
+        self.assertEqual(self.client.get(f"/api/patient/qr/{self.digest}/?format=gif").status_code, 400)
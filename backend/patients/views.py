@@ -1,6 +1,21 @@
-from ninja import Router, Form
+from django.http import HttpResponse, HttpResponseRedirect
+from ninja import Router, Form, Query
 from users.auth import AuthBearer
+from integration.qr_codes import (
+    CONTENT_TYPES,
+    etag,
+    get_cached_qr,
+    get_qr_image,
+    payload_digest,
+    qr_code_url,
+    qr_code_urls,
+    qr_payload,
+    refresh_qr_digest,
+    validate_variant,
+)
 from .models import PatientProfile, Visit, Medication, LabResult
+from .snapshots import refresh_patient_snapshot
+from .config import QR_DEFAULT_SIZE
 from .schemas import PatientProfileModel, VisitModel, MedicationModel, LabResultModel
 
 router = Router(tags=["Patient Views"])
@@ -25,6 +40,7 @@ def update_patient_profile(request, emergency_contact: str = Form(...)):
         return {}
     profile.emergency_contact = emergency_contact
     profile.save()
+    refresh_patient_snapshot(profile)
     return {
         "id": profile.id,
         "health_id": profile.health_id,
@@ -36,10 +52,46 @@ def update_patient_profile(request, emergency_contact: str = Form(...)):
 @router.get("/patient/qr-code/", response={200: dict}, auth=AuthBearer())
 def get_patient_qr_code(request):
     profile = getattr(request.user, "patient_profile", None)
-    if not profile or not profile.qr_code:
+    if not profile:
         return {"qr_code_url": None}
-    qr_url = request.build_absolute_uri(profile.qr_code.url)
-    return {"qr_code_url": qr_url}
+    digest = refresh_qr_digest(profile)
+    return {
+        "qr_code_url": qr_code_url(request, digest),
+        "variants": qr_code_urls(request, digest),
+    }
+
+
+@router.get("/qr/{digest}/", response={400: dict, 404: dict})
+def get_qr_image_by_digest(
+    request,
+    digest: str,
+    fmt: str = Query("png", alias="format"),
+    size: int = QR_DEFAULT_SIZE,
+):
+    """
+    QR image for a payload digest, rendered on first request. The digest is
+    unguessable and its image never changes, so the response is immutable.
+    """
+    error = validate_variant(fmt, size)
+    if error:
+        return 400, {"error": error}
+
+    tag = etag(digest, fmt, size)
+    headers = {"ETag": tag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if tag in request.headers.get("If-None-Match", ""):
+        return HttpResponse(status=304, headers=headers)
+
+    content = get_cached_qr(digest, fmt, size)
+    if content is None:
+        patient = PatientProfile.objects.filter(qr_digest=digest).first()
+        if not patient:
+            return 404, {"error": "QR code not found"}
+        payload = qr_payload(patient)
+        if payload_digest(payload) != digest:
+            # The payload changed since this URL was handed out (e.g. the tx hash was back-filled)
+            return HttpResponseRedirect(qr_code_url(request, refresh_qr_digest(patient), fmt, size))
+        content = get_qr_image(payload, fmt, size)
+    return HttpResponse(content, content_type=CONTENT_TYPES[fmt], headers=headers)
 
 
 @router.get("/patient/visits/", response=list[VisitModel], auth=AuthBearer())
@@ -3,7 +3,9 @@ from users.auth import AuthBearer
 from .models import Referral
 from patients.models import PatientProfile
 from doctors.models import DoctorProfile, CarePointsTransaction
-from integration.cardano_service import mint_care_points
+from integration.outbox import enqueue_care_points_mint
+from integration.cardano_config import CARDANO_MINT_MODE
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from .schemas import ReferralCreateSchema, ReferralResponseSchema, ReferralUpdateSchema
 from typing import List
@@ -22,40 +24,35 @@ def create_referral(request, payload: ReferralCreateSchema):
 
     patient = get_object_or_404(PatientProfile, id=payload.patient_id)
 
-    referral = Referral.objects.create(
-        from_doctor=doctor_profile,
-        patient=patient,
-        to_hospital=payload.to_hospital,
-        summary=payload.summary,
-        notes=payload.notes or "",
-        status=Referral.STATUS_PENDING
-    )
+    with transaction.atomic():
+        referral = Referral.objects.create(
+            from_doctor=doctor_profile,
+            patient=patient,
+            to_hospital=payload.to_hospital,
+            summary=payload.summary,
+            notes=payload.notes or "",
+            status=Referral.STATUS_PENDING
+        )
 
-    # Award CarePoints for referral (Case Review/Referral)
-    care_points_amount = 15  # Higher reward for referrals/reviews
-    
-    # Update local balance
-    doctor_profile.care_points_balance += care_points_amount
-    doctor_profile.save()
-    
-    # Record transaction
-    tx = CarePointsTransaction.objects.create(
-        doctor=doctor_profile,
-        amount=care_points_amount,
-        description=f"Referral created for {patient.health_id} to {payload.to_hospital}",
-        transaction_type="referral",
-    )
-    
-    # Mint on Cardano if address exists
-    if doctor_profile.cardano_address:
-        mint_result = mint_care_points(
-            address=doctor_profile.cardano_address,
+        # Award CarePoints for referral (Case Review/Referral)
+        care_points_amount = 15  # Higher reward for referrals/reviews
+        
+        # Update local balance
+        doctor_profile.care_points_balance += care_points_amount
+        doctor_profile.save()
+        
+        # Record transaction
+        tx = CarePointsTransaction.objects.create(
+            doctor=doctor_profile,
             amount=care_points_amount,
+            description=f"Referral created for {patient.health_id} to {payload.to_hospital}",
+            transaction_type="referral",
         )
         
-        if mint_result:
-            tx.cardano_tx_hash = mint_result.get("tx_hash")
-            tx.save()
+        # Queue the mint; the outbox worker back-fills cardano_tx_hash.
+        # In batch mode the row is picked up by the aggregated minter.
+        if doctor_profile.cardano_address and CARDANO_MINT_MODE != "batch":
+            enqueue_care_points_mint(tx, address=doctor_profile.cardano_address)
 
     return {
         "id": referral.id,
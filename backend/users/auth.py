@@ -1,4 +1,4 @@
-from ninja_jwt.authentication import JWTAuth #, AsyncJWTAuth
+from ninja_jwt.authentication import JWTAuth, AsyncJWTAuth
 from django.http import HttpRequest
 
 class AuthBearer(JWTAuth):
@@ -7,11 +7,9 @@ class AuthBearer(JWTAuth):
         token = request.COOKIES.get('access_token')
         return token
 
-'''
 # Async Auth with cookie-based token retrieval
 class AsyncAuthBearer(AsyncJWTAuth):
     async def get_authorization(self, request: HttpRequest):
         # Look for the token in cookies instead of headers
         token = request.COOKIES.get('access_token')
         return token
-'''
\ No newline at end of file
@@ -9,8 +9,8 @@ from .schemas import (
     BaseResponse, AuthSuccessResponse,
     UserProfileUpdateSchema, TokenSchema
 )
-from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
+from patients.snapshots import refresh_patient_snapshot
 
 User = get_user_model()
 router = Router(tags=["Authentication & Profiles"])
@@ -60,7 +60,8 @@ def signup(
     if profile_picture:
         file_ext = profile_picture.name.split('.')[-1]
         file_path = f"profile_pictures/{user.username}.{file_ext}"
-        default_storage.save(file_path, ContentFile(profile_picture.read()))
+        # Storage streams the upload in chunks; no need to read it into memory
+        file_path = default_storage.save(file_path, profile_picture)
         user.profile_picture = file_path
         user.save()
 
@@ -198,4 +199,8 @@ def update_profile(request, data: UserProfileUpdateSchema):
         user.bio = data.bio
 
     user.save()
+    patient_profile = getattr(user, "patient_profile", None)
+    if patient_profile and data.full_name is not None:
+        # The name is on the patient's emergency card
+        refresh_patient_snapshot(patient_profile)
     return BaseResponse(success=True, message="Profile updated successfully")
@@ -0,0 +1,184 @@
+"""Append-only store for the mock chain and the record log.
+
+demo.py used to read and rewrite the whole of data/mock_chain.json and
+data/records.json for every record, and verify.py scanned the chain linearly.
+Both now use one SQLite file (data/mock_chain.db): appends are single INSERTs
+and lookup_tx is a primary-key lookup. Rows are never updated or deleted.
+
+The existing JSON files are imported the first time the store is opened;
+`demo.py export-json` writes them back for the browser demo, which reads
+records.json.
+"""
+import os
+import json
+import sqlite3
+
+DB_NAME = "mock_chain.db"
+MIGRATED_KEY = "migrated_json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS txs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    tx_hash TEXT NOT NULL UNIQUE,
+    timestamp INTEGER NOT NULL,
+    wallet TEXT NOT NULL,
+    record_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS txs_record_hash ON txs (record_hash);
+CREATE TABLE IF NOT EXISTS records (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    record_hash TEXT NOT NULL,
+    patient_id TEXT,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_record_hash ON records (record_hash);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+TX_FIELDS = ("tx_hash", "timestamp", "wallet", "record_hash")
+
+
+class ChainStore:
+    """Mock chain transactions and record entries in one SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        # WAL keeps appends cheap and lets verify.py read while demo.py writes
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append_txs(self, entries) -> int:
+        """Append chain entries ({tx_hash, timestamp, wallet, record_hash}) in one transaction."""
+        with self.conn:
+            cur = self.conn.executemany(
+                "INSERT OR IGNORE INTO txs (tx_hash, timestamp, wallet, record_hash) VALUES (?, ?, ?, ?)",
+                ([e[field] for field in TX_FIELDS] for e in entries),
+            )
+        return cur.rowcount
+
+    def append_tx(self, entry: dict):
+        self.append_txs([entry])
+
+    def append_records(self, entries) -> int:
+        """Append record entries ({record, record_hash}) in one transaction."""
+        with self.conn:
+            cur = self.conn.executemany(
+                "INSERT INTO records (record_hash, patient_id, record) VALUES (?, ?, ?)",
+                (
+                    (e["record_hash"], e["record"].get("patient_id"), json.dumps(e["record"]))
+                    for e in entries
+                ),
+            )
+        return cur.rowcount
+
+    def append_record(self, entry: dict):
+        self.append_records([entry])
+
+    def lookup_tx(self, tx_hash: str):
+        row = self.conn.execute(
+            "SELECT tx_hash, timestamp, wallet, record_hash FROM txs WHERE tx_hash = ?",
+            (tx_hash,),
+        ).fetchone()
+        return dict(zip(TX_FIELDS, row)) if row else None
+
+    def lookup_txs(self, tx_hashes) -> dict:
+        """lookup_tx for many hashes: {tx_hash: entry} for the ones found."""
+        tx_hashes = list(tx_hashes)
+        found = {}
+        for start in range(0, len(tx_hashes), 500):
+            chunk = tx_hashes[start:start + 500]
+            rows = self.conn.execute(
+                "SELECT tx_hash, timestamp, wallet, record_hash FROM txs WHERE tx_hash IN (%s)"
+                % ",".join("?" * len(chunk)),
+                chunk,
+            )
+            for row in rows:
+                found[row[0]] = dict(zip(TX_FIELDS, row))
+        return found
+
+    def lookup_records(self, record_hashes) -> dict:
+        """{record_hash: record} for the hashes that have a stored record entry."""
+        record_hashes = list(record_hashes)
+        found = {}
+        for start in range(0, len(record_hashes), 500):
+            chunk = record_hashes[start:start + 500]
+            rows = self.conn.execute(
+                "SELECT record_hash, record FROM records WHERE record_hash IN (%s)" % ",".join("?" * len(chunk)),
+                chunk,
+            )
+            for record_hash, record in rows:
+                found.setdefault(record_hash, json.loads(record))
+        return found
+
+    def iter_txs(self):
+        for row in self.conn.execute("SELECT tx_hash, timestamp, wallet, record_hash FROM txs ORDER BY seq"):
+            yield dict(zip(TX_FIELDS, row))
+
+    def iter_records(self):
+        for record_hash, record in self.conn.execute("SELECT record_hash, record FROM records ORDER BY seq"):
+            yield {"record": json.loads(record), "record_hash": record_hash}
+
+    def counts(self) -> dict:
+        return {
+            "txs": self.conn.execute("SELECT COUNT(*) FROM txs").fetchone()[0],
+            "records": self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0],
+        }
+
+    def is_migrated(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM meta WHERE key = ?", (MIGRATED_KEY,)).fetchone() is not None
+
+    def migrate_json(self, records_path: str, chain_path: str) -> dict:
+        """Import records.json and mock_chain.json once; later calls are no-ops."""
+        if self.is_migrated():
+            return {"txs": 0, "records": 0}
+        records = _read_list(records_path)
+        chain = _read_list(chain_path)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO records (record_hash, patient_id, record) VALUES (?, ?, ?)",
+                ((e["record_hash"], e["record"].get("patient_id"), json.dumps(e["record"])) for e in records),
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO txs (tx_hash, timestamp, wallet, record_hash) VALUES (?, ?, ?, ?)",
+                ([e.get(field) for field in TX_FIELDS] for e in chain),
+            )
+            self.conn.execute("INSERT INTO meta (key, value) VALUES (?, '1')", (MIGRATED_KEY,))
+        return {"txs": len(chain), "records": len(records)}
+
+    def export_json(self, records_path: str, chain_path: str) -> dict:
+        """Write the store back out in the old JSON layout."""
+        records = list(self.iter_records())
+        chain = list(self.iter_txs())
+        for path, data in ((records_path, records), (chain_path, chain)):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+        return {"txs": len(chain), "records": len(records)}
+
+
+def _read_list(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def open_store(data_dir: str) -> ChainStore:
+    """Open data_dir/mock_chain.db, importing the JSON files on first use."""
+    store = ChainStore(os.path.join(data_dir, DB_NAME))
+    if not store.is_migrated():
+        store.migrate_json(os.path.join(data_dir, "records.json"), os.path.join(data_dir, "mock_chain.json"))
+    return store
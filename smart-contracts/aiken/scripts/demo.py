@@ -3,16 +3,28 @@
 Usage examples:
   python scripts/demo.py create-patient --name "Alice"
   python scripts/demo.py add-record --patient P12345 --diagnosis "Malaria" --treatment "ACT"
+  python scripts/demo.py ingest --file backfill.csv --batch-size 500
+  python scripts/demo.py export-json
 """
 import os
+import sys
+import csv
 import json
+import time
 import uuid
-import hashlib
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(ROOT, "data")
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(ROOT)), "backend")
+
+# Same canonical record hash as the backend
+sys.path.insert(0, BACKEND_DIR)
+from integration.record_hashing import hash_record  # noqa: E402
+from chain_store import open_store  # noqa: E402
+
 PATIENTS = os.path.join(DATA_DIR, "patient.json")
 RECORDS = os.path.join(DATA_DIR, "records.json")
 MOCK_CHAIN = os.path.join(DATA_DIR, "mock_chain.json")
@@ -25,7 +37,7 @@ except Exception:
 
 def ensure_data_dir():
     os.makedirs(DATA_DIR, exist_ok=True)
-    for p, default in [(PATIENTS, []), (RECORDS, []), (MOCK_CHAIN, [])]:
+    for p, default in [(PATIENTS, [])]:
         if not os.path.exists(p):
             with open(p, "w", encoding="utf-8") as f:
                 json.dump(default, f, indent=2)
@@ -59,33 +71,122 @@ def add_record(patient_id: str, diagnosis: str, treatment: str, date: str = None
         "treatment": treatment,
         "date": date,
     }
-    record_string = json.dumps(record, sort_keys=True)
-    record_hash = hashlib.sha256(record_string.encode()).hexdigest()
+    record_hash = hash_record(record)
     record_entry = {"record": record, "record_hash": record_hash}
-    records = read_json(RECORDS)
-    records.append(record_entry)
-    write_json(RECORDS, records)
-    tx = submit_to_mock_chain(record_hash)
+    with open_store(DATA_DIR) as store:
+        store.append_record(record_entry)
+        tx = submit_to_mock_chain(store, record_hash)
     return {"record": record_entry, "tx": tx}
 
 
-def submit_to_mock_chain(record_hash: str) -> dict:
-    chain = read_json(MOCK_CHAIN)
-    tx_hash = "mock_tx_" + uuid.uuid4().hex[:8]
-    ts = int(datetime.utcnow().timestamp())
-    wallet = "mock_wallet_" + uuid.uuid4().hex[:8]
-    entry = {"tx_hash": tx_hash, "timestamp": ts,
-             "wallet": wallet, "record_hash": record_hash}
-    chain.append(entry)
-    write_json(MOCK_CHAIN, chain)
-    # generate QR image if qrcode available
-    qr_path = None
-    if qrcode:
-        img = qrcode.make(tx_hash)
-        qr_fn = f"qr_{tx_hash}.png"
-        qr_path = os.path.join(DATA_DIR, qr_fn)
-        img.save(qr_path)
-    return {"tx_hash": tx_hash, "timestamp": ts, "wallet": wallet, "qr_path": qr_path}
+def new_tx_entry(record_hash: str) -> dict:
+    return {"tx_hash": "mock_tx_" + uuid.uuid4().hex[:8],
+            "timestamp": int(datetime.utcnow().timestamp()),
+            "wallet": "mock_wallet_" + uuid.uuid4().hex[:8],
+            "record_hash": record_hash}
+
+
+def make_qr(tx_hash: str):
+    """Save a QR image for tx_hash if qrcode is available; returns its path."""
+    if not qrcode:
+        return None
+    qr_path = os.path.join(DATA_DIR, f"qr_{tx_hash}.png")
+    qrcode.make(tx_hash).save(qr_path)
+    return qr_path
+
+
+def submit_to_mock_chain(store, record_hash: str) -> dict:
+    entry = new_tx_entry(record_hash)
+    store.append_tx(entry)
+    return {"tx_hash": entry["tx_hash"], "timestamp": entry["timestamp"],
+            "wallet": entry["wallet"], "qr_path": make_qr(entry["tx_hash"])}
+
+
+def unique_tx_entries(store, record_hashes) -> list:
+    """new_tx_entry for each hash, re-rolling the short mock tx ids that collide."""
+    txs = [new_tx_entry(record_hash) for record_hash in record_hashes]
+    while True:
+        taken = set(store.lookup_txs(tx["tx_hash"] for tx in txs))
+        seen = set()
+        clashes = 0
+        for i, tx in enumerate(txs):
+            if tx["tx_hash"] in taken or tx["tx_hash"] in seen:
+                txs[i] = new_tx_entry(tx["record_hash"])
+                clashes += 1
+            seen.add(txs[i]["tx_hash"])
+        if not clashes:
+            return txs
+
+
+def read_ingest_file(path: str, default_date: str = None):
+    """Records from a CSV (header row) or NDJSON file with patient_id, diagnosis, treatment and optional date."""
+    default_date = default_date or datetime.utcnow().date().isoformat()
+    if path == "-":
+        rows = (json.loads(line) for line in sys.stdin if line.strip())
+    elif path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    records = []
+    for n, row in enumerate(rows, 1):
+        missing = [k for k in ("patient_id", "diagnosis", "treatment") if not row.get(k)]
+        if missing:
+            raise ValueError(f"{path} row {n}: missing {', '.join(missing)}")
+        records.append({
+            "patient_id": row["patient_id"],
+            "diagnosis": row["diagnosis"],
+            "treatment": row["treatment"],
+            "date": row.get("date") or default_date,
+        })
+    return records
+
+
+def ingest(path: str, batch_size: int = 500, workers: int = None, qr: bool = True) -> dict:
+    """
+    Backfill many records: hash them in a process pool, append records and
+    transactions to the mock chain one batch per SQLite transaction, and
+    render QR codes in the same pool while later batches are written.
+    """
+    started = time.perf_counter()
+    records = read_ingest_file(path)
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(records) // (workers * 4))
+    qr = qr and qrcode is not None
+    timings = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open_store(DATA_DIR) as store:
+        t = time.perf_counter()
+        hashes = list(pool.map(hash_record, records, chunksize=chunksize))
+        timings["hash"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        qr_futures = []
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            batch_hashes = hashes[start:start + batch_size]
+            txs = unique_tx_entries(store, batch_hashes)
+            store.append_records({"record": r, "record_hash": h} for r, h in zip(batch, batch_hashes))
+            store.append_txs(txs)
+            if qr:
+                qr_futures.append(pool.map(make_qr, [tx["tx_hash"] for tx in txs], chunksize=max(1, len(txs) // workers)))
+        timings["submit"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        qr_count = sum(1 for results in qr_futures for _ in results)
+        timings["qr_wait"] = time.perf_counter() - t
+
+    elapsed = time.perf_counter() - started
+    return {
+        "records": len(records),
+        "batches": -(-len(records) // batch_size),
+        "qr_codes": qr_count,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "records_per_second": round(len(records) / elapsed, 1) if elapsed else None,
+        "timings": {k: round(v, 3) for k, v in timings.items()},
+    }
 
 
 def main():
@@ -102,6 +203,14 @@ def main():
     p2.add_argument("--treatment", required=True)
     p2.add_argument("--date", required=False)
 
+    p3 = sub.add_parser("ingest", help="bulk-load records from a CSV or NDJSON file ('-' for NDJSON on stdin)")
+    p3.add_argument("--file", required=True)
+    p3.add_argument("--batch-size", type=int, default=500)
+    p3.add_argument("--workers", type=int, default=None, help="processes for hashing and QR codes (default: CPU count)")
+    p3.add_argument("--no-qr", action="store_true", help="skip QR image generation")
+
+    sub.add_parser("export-json", help="write records.json and mock_chain.json from the store")
+
     args = parser.parse_args()
     if args.cmd == "create-patient":
         p = create_patient(args.name)
@@ -111,6 +220,15 @@ def main():
                          args.treatment, args.date)
         print("Record added and submitted (mock):")
         print(json.dumps(res, indent=2))
+    elif args.cmd == "ingest":
+        res = ingest(args.file, args.batch_size, args.workers, not args.no_qr)
+        print(f"Ingested {res['records']} records in {res['seconds']}s "
+              f"({res['records_per_second']} records/s, {res['workers']} workers)")
+        print(json.dumps(res, indent=2))
+    elif args.cmd == "export-json":
+        with open_store(DATA_DIR) as store:
+            counts = store.export_json(RECORDS, MOCK_CHAIN)
+        print(f"Exported {counts['records']} records and {counts['txs']} transactions")
     else:
         parser.print_help()
 
@@ -2,38 +2,148 @@
 
 Usage:
   python scripts/verify.py --tx mock_tx_abcd1234
+  python scripts/verify.py --file txs.txt --check-records --report report.json
+  cat export.ndjson | python scripts/verify.py --file - --json
 """
 import os
+import sys
 import json
+import time
+import hashlib
 import argparse
 from datetime import datetime
 
+from chain_store import open_store
+
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(ROOT, "data")
-MOCK_CHAIN = os.path.join(DATA_DIR, "mock_chain.json")
-
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(ROOT)), "backend")
 
-def read_json(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+# Same canonical record hash as the backend
+sys.path.insert(0, BACKEND_DIR)
+from integration.record_hashing import hash_record  # noqa: E402
 
 
 def lookup_tx(tx_hash: str):
-    chain = read_json(MOCK_CHAIN)
-    for e in chain:
-        if e.get("tx_hash") == tx_hash:
-            return e
-    return None
+    with open_store(DATA_DIR) as store:
+        return store.lookup_tx(tx_hash)
 
 
 def format_ts(ts):
     return datetime.utcfromtimestamp(ts).strftime("%Y-%m-%d %H:%M UTC")
 
 
+def record_hash_format(record, record_hash: str):
+    """
+    "canonical" or "legacy" (json.dumps(sort_keys=True), used before the
+    canonical encoder) if record hashes to record_hash, otherwise None.
+    """
+    if hash_record(record) == record_hash:
+        return "canonical"
+    if hashlib.sha256(json.dumps(record, sort_keys=True).encode()).hexdigest() == record_hash:
+        return "legacy"
+    return None
+
+
+def read_batch(path: str) -> list:
+    """
+    Items to verify: one tx hash per line, or NDJSON objects with tx_hash and
+    optionally the exported record (checked against the anchored hash).
+    """
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        items = []
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                obj = json.loads(line)
+                items.append({"tx_hash": obj.get("tx_hash"), "record": obj.get("record")})
+            else:
+                items.append({"tx_hash": line, "record": None})
+        return items
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def verify_batch(items: list, check_records: bool = False) -> dict:
+    """
+    Verify many transactions with one store connection and one IN query per
+    500 hashes.
+
+    A result's status is "verified", "not_found" or "hash_mismatch" (the
+    record given with the item, or the stored record with check_records,
+    hashes to neither the canonical nor the legacy form of the anchored
+    record_hash).
+    """
+    started = time.perf_counter()
+    with open_store(DATA_DIR) as store:
+        entries = store.lookup_txs({item["tx_hash"] for item in items if item["tx_hash"]})
+        stored_records = {}
+        if check_records:
+            stored_records = store.lookup_records({e["record_hash"] for e in entries.values()})
+
+    results = []
+    counts = {"verified": 0, "not_found": 0, "hash_mismatch": 0}
+    for item in items:
+        entry = entries.get(item["tx_hash"])
+        result = {"tx_hash": item["tx_hash"], "status": "not_found"}
+        if entry:
+            result.update(timestamp=entry["timestamp"], record_hash=entry["record_hash"], status="verified")
+            record = item["record"] if item["record"] is not None else stored_records.get(entry["record_hash"])
+            if record is not None:
+                result["record_checked"] = True
+                result["hash_format"] = record_hash_format(record, entry["record_hash"])
+                if result["hash_format"] is None:
+                    result["status"] = "hash_mismatch"
+            elif check_records:
+                result["record_checked"] = False
+        counts[result["status"]] += 1
+        results.append(result)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "summary": dict(
+            total=len(items),
+            **counts,
+            seconds=round(elapsed, 4),
+            per_second=round(len(items) / elapsed, 1) if elapsed else None,
+        ),
+        "results": results,
+    }
+
+
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--tx", required=True)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--tx")
+    target.add_argument("--file", help="tx hashes or NDJSON items to verify ('-' for stdin)")
+    parser.add_argument("--check-records", action="store_true",
+                        help="also recompute the hash of each stored record")
+    parser.add_argument("--report", help="write the JSON report to this path")
+    parser.add_argument("--json", action="store_true", help="print the JSON report instead of a summary")
     args = parser.parse_args()
+
+    if args.file:
+        report = verify_batch(read_batch(args.file), args.check_records)
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            summary = report["summary"]
+            print("Batch Verification Result")
+            print("-------------------------")
+            print(f"Checked: {summary['total']} in {summary['seconds']}s ({summary['per_second']}/s)")
+            print(f"Verified: {summary['verified']}")
+            print(f"Not found: {summary['not_found']}")
+            print(f"Hash mismatch: {summary['hash_mismatch']}")
+            print("Blockchain Mode: SIMULATED (Mock Testnet)")
+        sys.exit(0 if report["summary"]["verified"] == report["summary"]["total"] else 1)
+
     entry = lookup_tx(args.tx)
     if not entry:
         print("Referral Verification Result")